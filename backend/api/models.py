@@ -47,10 +47,12 @@ class StateResponse(BaseModel):
     mode: str
     is_running: bool
     countdown_remaining: Optional[float] = None
+    timing: Optional[dict] = None
 
 
 class EventResponse(BaseModel):
     """Event data response."""
+    id: int
     timestamp: float
     level: str
     category: str
@@ -62,6 +64,8 @@ class EventsResponse(BaseModel):
     """List of events response."""
     events: List[EventResponse]
     total: int
+    next_cursor: int  # Pass as `since` to fetch only newer events
+    prev_cursor: Optional[int] = None  # Pass as `before` to page back
 
 
 class StatsResponse(BaseModel):
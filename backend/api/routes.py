@@ -1,6 +1,12 @@
 """REST API routes for Scare Box."""
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+import asyncio
+import csv
+import io
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
 from .models import (
     ConfigUpdate,
     ModeUpdate,
@@ -10,77 +16,85 @@ from .models import (
     EventsResponse,
     StatsResponse,
     SuccessResponse,
-    EventResponse,
 )
 from typing import Optional
 from pathlib import Path
+from utils import EventLevel, EventCategory, structured_log
+
+log = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api")
 
-# Global controller reference (set by main.py)
+# Routes acting on one box, mounted both at /api (the default box) and at
+# /api/boxes/{box_id}
+box_router = APIRouter()
+
+# Global box manager reference (set by main.py)
 controller = None
 
 
 def set_controller(ctrl):
-    """Set the controller instance."""
+    """Set the box manager instance."""
     global controller
     controller = ctrl
 
 
-@router.get("/config")
-async def get_config():
-    """Get current configuration."""
+def get_box(box_id: Optional[str] = None):
+    """The box a request is for (the default box without a box id)."""
     if not controller:
         raise HTTPException(status_code=500, detail="Controller not initialized")
 
-    return controller.get_config()
+    box = controller.get_box(box_id)
+    if box is None:
+        raise HTTPException(status_code=404, detail=f"Unknown box: {box_id}")
+    return box
 
 
-@router.put("/config")
-async def update_config(config: ConfigUpdate):
-    """Update configuration."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
+@box_router.get("/config")
+async def get_config(box=Depends(get_box)):
+    """Get current configuration."""
+    return box.get_config()
 
-    controller.update_config(config.model_dump(exclude_none=True))
+
+@box_router.put("/config")
+async def update_config(config: ConfigUpdate, box=Depends(get_box)):
+    """Update configuration."""
+    box.update_config(config.model_dump(exclude_none=True))
 
     return SuccessResponse(success=True, message="Configuration updated")
 
 
-@router.get("/mode")
-async def get_mode():
+@box_router.get("/mode")
+async def get_mode(box=Depends(get_box)):
     """Get current mode."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
-
-    return {"mode": controller.state_machine.get_mode().value}
+    return {"mode": box.state_machine.get_mode().value}
 
 
-@router.put("/mode")
-async def set_mode(mode: ModeUpdate):
+@box_router.put("/mode")
+async def set_mode(mode: ModeUpdate, box=Depends(get_box)):
     """Set operating mode."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
-
-    controller.set_mode(mode.mode)
+    box.set_mode(mode.mode)
 
     return SuccessResponse(success=True, message=f"Mode set to {mode.mode}")
 
 
-@router.post("/trigger")
-async def manual_trigger(request: TriggerRequest = TriggerRequest()):
+@box_router.post("/trigger")
+async def manual_trigger(request: TriggerRequest = TriggerRequest(), box=Depends(get_box)):
     """Manually trigger scare sequence."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
-
-    if not controller.state_machine.can_trigger():
+    if not box.state_machine.can_trigger():
         raise HTTPException(status_code=400, detail="Cannot trigger in current state")
 
-    await controller.trigger_sequence()
+    await box.trigger_sequence()
 
     return SuccessResponse(success=True, message="Scare sequence triggered")
 
 
+@box_router.get("/trigger/stats")
+async def get_trigger_stats(box=Depends(get_box)):
+    """Get audio trigger ingestion counts (accepted, debounced, rate limited...)."""
+    return box.triggers.get_stats()
+
+
 @router.post("/start")
 async def start_system():
     """Start the Scare Box system."""
@@ -103,48 +117,80 @@ async def stop_system():
     return SuccessResponse(success=True, message="System stopped")
 
 
-@router.get("/state")
-async def get_state():
-    """Get current system state."""
+@router.get("/boxes")
+async def get_boxes():
+    """List the boxes hosted by this process."""
     if not controller:
         raise HTTPException(status_code=500, detail="Controller not initialized")
 
-    return StateResponse(
-        state=controller.state_machine.get_state().value,
-        mode=controller.state_machine.get_mode().value,
-        is_running=controller.is_running,
-    )
+    return controller.get_status()
 
 
-@router.get("/devices")
-async def get_devices():
-    """Get all device statuses."""
+@router.get("/sync")
+async def get_sync_status():
+    """Get clock offsets to other nodes and the skew of synchronized sequences."""
     if not controller:
         raise HTTPException(status_code=500, detail="Controller not initialized")
 
+    if not controller.sync:
+        return {"enabled": False}
+
+    return {"enabled": True, **controller.sync.get_stats()}
+
+
+@router.post("/boxes/{box_id}/start")
+async def start_box(box=Depends(get_box)):
+    """Start one box."""
+    await box.start()
+
+    return SuccessResponse(success=True, message=f"Box {box.name} started")
+
+
+@router.post("/boxes/{box_id}/stop")
+async def stop_box(box=Depends(get_box)):
+    """Stop one box; the others keep running."""
+    await box.stop()
+
+    return SuccessResponse(success=True, message=f"Box {box.name} stopped")
+
+
+@box_router.get("/state")
+async def get_state(box=Depends(get_box)):
+    """Get current system state."""
+    return StateResponse(
+        state=box.state_machine.get_state().value,
+        mode=box.state_machine.get_mode().value,
+        is_running=box.is_running,
+        timing=box.state_machine.get_timing_stats(),
+    )
+
+
+@box_router.get("/devices")
+async def get_devices(box=Depends(get_box)):
+    """Get all device statuses."""
     return DevicesResponse(
-        microphone=controller.microphone.get_status(),
-        lights=controller.lights.get_status(),
-        speaker=controller.speaker.get_status(),
+        microphone=box.microphone.get_status(),
+        lights=box.lights.get_status(),
+        speaker=box.speaker.get_status(),
     )
 
 
-@router.get("/devices/microphone")
-async def get_microphone_status():
+@box_router.get("/devices/microphone")
+async def get_microphone_status(box=Depends(get_box)):
     """Get microphone status."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
-
-    return controller.microphone.get_status()
+    return box.microphone.get_status()
 
 
-@router.get("/devices/lights")
-async def get_lights_status():
+@box_router.get("/devices/lights")
+async def get_lights_status(box=Depends(get_box)):
     """Get lights status."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
+    return box.lights.get_status()
+
 
-    return controller.lights.get_status()
+@box_router.get("/devices/lights/stats")
+async def get_lights_stats(box=Depends(get_box)):
+    """Get light frame and outbound queue statistics."""
+    return box.lights.get_stats()
 
 
 @router.get("/devices/speaker")
@@ -184,21 +230,18 @@ async def get_available_devices():
     return {"microphones": input_devices, "speakers": output_devices}
 
 
-@router.put("/devices/microphone")
-async def set_microphone_device(request: dict):
+@box_router.put("/devices/microphone")
+async def set_microphone_device(request: dict, box=Depends(get_box)):
     """Change the microphone device."""
-    if not controller:
-        raise HTTPException(status_code=500, detail="Controller not initialized")
-
     device_name = request.get("device_name")
     if not device_name:
         raise HTTPException(status_code=400, detail="device_name required")
 
     # Reinitialize microphone with new device
     try:
-        controller.microphone.stop_listening()
-        controller.microphone.initialize(device_name)
-        await controller.microphone.start_listening()
+        box.microphone.stop_listening()
+        box.microphone.initialize(device_name)
+        await box.microphone.start_listening()
 
         return SuccessResponse(success=True, message=f"Microphone changed to {device_name}")
     except Exception as e:
@@ -228,7 +271,7 @@ async def set_speaker_device(request: dict):
         # Reload audio files
         controller.speaker._load_audio_files()
 
-        print(f"Speaker changed to: {device_name}")
+        log.info("Speaker changed to: %s", device_name)
 
         return SuccessResponse(success=True, message=f"Speaker changed to {device_name}")
     except Exception as e:
@@ -299,16 +342,130 @@ async def upload_happy_halloween_audio(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/events")
-async def get_events(limit: Optional[int] = 100):
-    """Get event history."""
+@router.get("/events", response_model=EventsResponse)
+async def get_events(
+    limit: Optional[int] = 100,
+    level: Optional[EventLevel] = None,
+    category: Optional[EventCategory] = None,
+    since: Optional[int] = None,
+    before: Optional[int] = None,
+):
+    """Get event history, optionally only one level and/or category.
+
+    ``since=<next_cursor>`` returns only events newer than the last fetch;
+    ``before=<prev_cursor>`` pages back through older events.
+    """
     if not controller:
         raise HTTPException(status_code=500, detail="Controller not initialized")
 
-    events = controller.event_logger.get_events(limit=limit)
-    event_responses = [EventResponse(**event.to_dict()) for event in events]
-
-    return EventsResponse(events=event_responses, total=len(events))
+    logger = controller.event_logger
+    filters = {"level": level, "category": category}
+    events = logger.get_events(limit=limit, since=since, before=before, **filters)
+
+    # Reach past the in-memory history into the store only when needed
+    store = logger.store
+    if store and logger.truncated:
+        if since is not None and since < logger.oldest_id - 1:
+            events = await asyncio.to_thread(store.query, limit=limit, since=since, **filters)
+        elif since is None and (not limit or len(events) < limit):
+            older = await asyncio.to_thread(
+                store.query,
+                limit=limit - len(events) if limit else None,
+                before=min(before or logger.oldest_id, logger.oldest_id),
+                **filters,
+            )
+            events = older + events
+
+    # Built from each event's cached JSON rather than a model per event
+    cursors = {
+        "total": len(events),
+        "next_cursor": events[-1].id if events else (since if since is not None else logger.last_id),
+        "prev_cursor": events[0].id if events else None,
+    }
+    body = b'{"events":[' + b",".join(event.to_json() for event in events) + b"],"
+    body += json.dumps(cursors, separators=(",", ":"))[1:].encode()
+    return Response(content=body, media_type="application/json")
+
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_COLUMNS = ["id", "timestamp", "level", "category", "message", "details"]
+
+
+def _export_chunk(events, format: str) -> bytes:
+    if format == "ndjson":
+        return b"".join(event.to_json() + b"\n" for event in events)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for event in events:
+        writer.writerow([
+            event.id,
+            event.timestamp,
+            event.level.value,
+            event.category.value,
+            event.message,
+            json.dumps(event.details, default=str) if event.details else "",
+        ])
+    return buffer.getvalue().encode()
+
+
+@router.get("/events/export")
+async def export_events(
+    format: str = "ndjson",
+    level: Optional[EventLevel] = None,
+    category: Optional[EventCategory] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    chunk_size: int = 1000,
+):
+    """Stream the whole event history as NDJSON or CSV, oldest first.
+
+    ``start`` and ``end`` bound the timestamps. With a store attached the
+    events are read from disk a chunk at a time, so memory stays flat
+    however many there are; without one the in-memory history is exported.
+    """
+    if not controller:
+        raise HTTPException(status_code=500, detail="Controller not initialized")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+        )
+
+    logger = controller.event_logger
+    store = logger.store
+    chunk_size = max(1, chunk_size)
+
+    async def chunks():
+        if format == "csv":
+            yield (",".join(EXPORT_COLUMNS) + "\r\n").encode()
+
+        if store:
+            await asyncio.to_thread(store.flush)  # Include events still queued for writing
+            reader = store.iter_chunks(chunk_size, level, category, start, end)
+            try:
+                while True:
+                    # A read error is raised, aborting the response rather than ending it cleanly
+                    events = await asyncio.to_thread(next, reader, None)
+                    if events is None:
+                        break
+                    yield _export_chunk(events, format)
+            finally:
+                reader.close()  # Lets the store rotate again, also if the client hung up
+            return
+
+        events = [
+            event
+            for event in logger.get_events(level=level, category=category)
+            if (start is None or event.timestamp >= start) and (end is None or event.timestamp < end)
+        ]
+        for i in range(0, len(events), chunk_size):
+            yield _export_chunk(events[i:i + chunk_size], format)
+
+    return StreamingResponse(
+        chunks(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="events.{format}"'},
+    )
 
 
 @router.get("/events/stats")
@@ -320,3 +477,51 @@ async def get_event_stats():
     stats = controller.event_logger.get_stats()
 
     return StatsResponse(**stats)
+
+
+@router.get("/events/rollup")
+async def get_event_rollup(resolution: str = "1m", buckets: Optional[int] = None):
+    """Get event counts per time bucket (1s, 1m or 1h), by level and category."""
+    if not controller:
+        raise HTTPException(status_code=500, detail="Controller not initialized")
+
+    rollups = controller.event_logger.rollups
+    if resolution not in rollups.rings:
+        raise HTTPException(
+            status_code=400,
+            detail=f"resolution must be one of: {', '.join(rollups.rings)}",
+        )
+
+    return rollups.get(resolution, buckets)
+
+
+@router.get("/events/store")
+async def get_event_store_stats():
+    """Get write, overflow and rotation counts of the on-disk event history."""
+    if not controller:
+        raise HTTPException(status_code=500, detail="Controller not initialized")
+
+    store = controller.event_logger.store
+    if not store:
+        return {"enabled": False}
+
+    return {"enabled": True, **store.get_stats()}
+
+
+@router.get("/websocket")
+async def get_websocket_stats():
+    """Get each WebSocket client's send queue depth and dropped telemetry."""
+    if not controller:
+        raise HTTPException(status_code=500, detail="Controller not initialized")
+
+    return controller.stream_manager.manager.get_stats()
+
+
+@router.get("/logging")
+async def get_logging_stats():
+    """Get the log writer's queue depth and dropped records."""
+    return structured_log.get_stats()
+
+
+router.include_router(box_router)
+router.include_router(box_router, prefix="/boxes/{box_id}")
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Benchmark the light engine against simulated LIFX devices.
+
+Runs without hardware or a network: every bulb is an emulated device on
+localhost, and arrival times come from the simulator's receive timestamps.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from backend.box_manager import BoxManager
+from backend.config import BoxConfig
+from backend.controller import ScareBoxController
+from backend.hardware.lifx_controller import GLITCH_LEVELS, LightController
+from backend.hardware.lifx_protocol import LifxClient, MessageType
+from backend.hardware.lifx_simulator import LifxSimulator
+from backend.timeline import Cue
+from backend.hardware.light_effects import EffectEngine, ambient, glitch, to_hsbk
+from backend.hardware.light_frames import ZoneLayout
+from backend.state_machine import StateMachine
+from backend.utils.event_logger import Event, EventCategory, EventLevel
+from backend.utils.virtual_clock import VirtualClock
+
+
+def section(title: str):
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def summarize(label: str, samples, unit: str = "ms", scale: float = 1000.0):
+    values = np.asarray(samples, dtype=np.float64) * scale
+    print(
+        f"  {label}: mean {values.mean():.3f} {unit}, "
+        f"p50 {np.percentile(values, 50):.3f} {unit}, "
+        f"p99 {np.percentile(values, 99):.3f} {unit}, "
+        f"max {values.max():.3f} {unit}"
+    )
+
+
+async def benchmark_frames(
+    controller: LightController,
+    simulator: LifxSimulator,
+    frames: int,
+    fps: float,
+):
+    """Time rendering and sending full ambient frames to every bar at ``fps``."""
+    section(f"Frame push ({len(controller.devices)} devices, {frames} frames at {fps:g} fps)")
+
+    effect = ambient()
+    layout = controller.layout
+    rng = np.random.default_rng(0)
+    render_times, send_times = [], []
+    packets = 0
+
+    simulator.clear()
+    for i in range(frames):
+        started = time.perf_counter()
+        frame = to_hsbk(effect(layout, i * 0.05, rng))
+        rendered = time.perf_counter()
+        packets += controller.push_frame(frame, 50)
+        render_times.append(rendered - started)
+        send_times.append(time.perf_counter() - rendered)
+        await asyncio.sleep(max(0.0, 1.0 / fps - (time.perf_counter() - started)))
+
+    await asyncio.sleep(0.1)
+    delivered = sum(
+        1 for message in simulator.messages
+        if not message.dropped and message.type in (
+            MessageType.SET_EXTENDED_COLOR_ZONES, MessageType.LIGHT_SET_COLOR
+        )
+    )
+
+    summarize("render", render_times)
+    summarize("send", send_times)
+    queue = controller.commands.get_stats()
+    print(f"  packets queued: {packets}, delivered: {delivered}")
+    print(f"  coalesced: {queue['coalesced']}, dropped: {queue['dropped']}, "
+          f"pending: {queue['pending']}")
+
+
+async def benchmark_flash(controller: LightController, simulator: LifxSimulator, rounds: int):
+    """Measure how far apart the bulbs receive each flash."""
+    section(f"Flash skew ({len(controller.devices)} devices, {rounds} flashes)")
+
+    burst_skews, arrival_skews = [], []
+    for _ in range(rounds):
+        simulator.clear()
+        record = controller.trigger_flash(1.0)
+        await asyncio.sleep(0.05)
+
+        arrivals = [
+            message.timestamp for message in simulator.messages
+            if message.type == MessageType.LIGHT_SET_COLOR
+        ]
+        burst_skews.append(record.skew_us / 1e6)
+        arrival_skews.append(max(arrivals) - min(arrivals))
+
+    summarize("send burst", burst_skews, "us", 1e6)
+    summarize("arrival", arrival_skews, "us", 1e6)
+
+
+def benchmark_countdown(layout: ZoneLayout, duration: float, fps: float, steps: int = 20):
+    """Compare streamed and device-side glitch over one countdown.
+
+    Runs the effect engine on a simulated clock, so this measures packets
+    and render CPU rather than wall time.
+    """
+    section(f"Countdown glitch ({layout.device_count} devices, {duration:g} s)")
+
+    totals = {}
+    for label, device_side in (("streamed", False), ("device-side", True)):
+        now = [0.0]
+        packets = [0]
+
+        def push(frame, transition_ms):
+            packets[0] += layout.device_count
+            return layout.device_count
+
+        def push_waveforms(waveforms):
+            packets[0] += len(waveforms)
+            return len(waveforms)
+
+        engine = EffectEngine(
+            push,
+            lambda: layout,
+            fps=fps,
+            seed=0,
+            clock=lambda: now[0],
+            push_waveforms=push_waveforms if device_side else None,
+        )
+
+        # Same stepping and quantization as the state machine and LightController
+        level = None
+        step = duration / steps
+        started = time.perf_counter()
+        for tick in range(int(duration * fps)):
+            now[0] = tick / fps
+            progress = int(now[0] / step) * step / duration
+            quantized = round(progress * GLITCH_LEVELS) / GLITCH_LEVELS
+            if quantized != level:
+                level = quantized
+                engine.play(glitch(level))
+            engine._tick(now[0])
+        cpu = time.perf_counter() - started
+
+        totals[label] = packets[0]
+        print(f"  {label}: {packets[0]} packets, {cpu * 1000:.1f} ms CPU")
+
+    # One waveform per bulb per intensity level, not one per countdown
+    print(f"  reduction: {totals['streamed'] / max(1, totals['device-side']):.1f}x "
+          f"({GLITCH_LEVELS + 1} waveforms per bulb)")
+
+
+async def benchmark_sequence(controller: LightController, runs: int):
+    """Measure cue jitter of full scare sequences driving the simulated lights."""
+    section(f"Sequence cue jitter ({runs} sequences)")
+
+    sm = StateMachine(countdown_duration=0.5, active_duration=0.2, reset_duration=0.3)
+    for action, handler in {
+        "glitch": controller.start_glitch_effect,
+        "flash": controller.trigger_flash,
+        "lights_reset": controller.reset_to_ambient,
+    }.items():
+        sm.register_cue_handler(action, handler)
+
+    def add_light_cues(timeline, mode, phases):
+        for at in phases.countdown_steps:
+            timeline.cues.append(Cue(at, "glitch", at / phases.countdown_duration))
+        timeline.cues.append(Cue(phases.active_at, "flash", 1.0))
+        timeline.cues.append(Cue(phases.reset_at, "lights_reset", phases.end_at - phases.reset_at))
+
+    sm.register_cue_provider(add_light_cues)
+
+    lengths = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await sm.trigger_sequence()
+        await sm.sequence_task
+        lengths.append(time.perf_counter() - started - sm.compiled_timeline().duration)
+
+    lateness = [value for samples in sm.player.jitter.values() for value in samples]
+    summarize("cue lateness", lateness)
+    summarize("length error", lengths)
+
+
+async def benchmark_virtual(runs: int, countdown: float):
+    """Push many trigger/stop/mode-change sequences through a box in virtual time."""
+    section(f"Virtual-time sequences ({runs} sequences)")
+
+    rng = np.random.default_rng(0)
+    clock = VirtualClock()
+    box = ScareBoxController(clock=clock, sleep=clock.sleep)
+    sm = box.state_machine
+    sm.update_timing(countdown_duration=countdown)
+    modes = [mode.value for mode in type(sm.get_mode())]
+
+    stopped = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        if rng.random() < 0.2:
+            box.set_mode(modes[rng.integers(len(modes))])
+        await box.trigger_sequence()
+        if rng.random() < 0.25:
+            # Stop part-way through
+            await clock.advance(rng.uniform(0.0, sm.compiled_timeline().duration))
+            await sm.stop()
+            stopped += 1
+        else:
+            await clock.run()
+    wall = time.perf_counter() - started
+
+    stats = sm.get_timing_stats()
+    print(f"  simulated {clock.now:.0f} s in {wall * 1000:.0f} ms "
+          f"({clock.now / wall:.0f}x real time), {stopped} stopped early")
+    print(f"  {wall / runs * 1e6:.0f} us per sequence, "
+          f"{stats['cues']['cues_played']} cues, {clock.wakeups} wake-ups")
+    print(f"  max cue lateness: {stats['max_lateness_ms']:.3f} ms")
+
+
+@dataclass
+class DataclassEvent:
+    """The event record as it was before it was slotted, for comparison."""
+    timestamp: float
+    level: EventLevel
+    category: EventCategory
+    message: str
+    details: Optional[dict] = None
+    id: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "level": self.level.value,
+            "category": self.category.value,
+            "message": self.message,
+            "details": self.details or {},
+        }
+
+
+def benchmark_events(count: int, clients: int):
+    """Memory and serialization cost of high-rate debug events."""
+    section(f"Event records ({count} events, {clients} clients)")
+
+    def make(record, i: int):
+        return record(
+            timestamp=1000.0 + i / 1000,
+            level=EventLevel.DEBUG,
+            category=EventCategory.HARDWARE,
+            message="Audio frame",  # The same message each time, like real frame events
+            details={"level": round(i % 100 / 100, 2)} if i % 4 == 0 else None,
+            id=i + 1,
+        )
+
+    for name, record in (("dataclass", DataclassEvent), ("slotted", Event)):
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        events = [make(record, i) for i in range(count)]
+        per_event = (tracemalloc.get_traced_memory()[0] - baseline) / count
+        tracemalloc.stop()
+
+        # What streaming each event to every client and serving it once costs
+        started = time.perf_counter()
+        if record is Event:
+            for event in events:
+                for _ in range(clients + 1):
+                    event.to_json()
+        else:
+            for event in events:
+                for _ in range(clients + 1):
+                    json.dumps(event.to_dict())
+        elapsed = time.perf_counter() - started
+
+        print(f"  {name}: {per_event:.0f} bytes per event, "
+              f"{elapsed / count * 1e6:.2f} us to serialize each for {clients + 1} readers")
+
+
+async def benchmark_boxes(boxes: int, devices: int, zones: int, seconds: float):
+    """Run several boxes on one shared socket and measure what each box costs."""
+    section(f"Boxes ({boxes} boxes x {devices} devices, {seconds:g} s)")
+
+    simulator = LifxSimulator(count=boxes * devices, zones=zones, seed=0)
+    known = await simulator.start()
+    configs = [
+        BoxConfig(
+            name=f"box{i + 1}",
+            lights=[f"Sim {i * devices + j + 1}" for j in range(devices)],
+        )
+        for i in range(boxes)
+    ]
+
+    tracemalloc.start()
+    manager = BoxManager(configs[:1])
+    baseline = tracemalloc.get_traced_memory()[0]
+    for box_config in configs[1:]:
+        manager.add_box(box_config)
+    per_box = (tracemalloc.get_traced_memory()[0] - baseline) / max(1, boxes - 1)
+    tracemalloc.stop()
+
+    try:
+        await manager.lights.connect(known=known)
+        manager._assign_lights()
+        for box in manager.boxes.values():
+            await box.start()
+
+        simulator.clear()
+        cpu, wall = time.process_time(), time.perf_counter()
+        await asyncio.sleep(seconds)
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+        engines = [box.lights.engine.get_stats() for box in manager.boxes.values()]
+        lateness = [stats["max_lateness_ms"] / 1000 for stats in engines]
+        frames = sum(stats["frames_rendered"] for stats in engines)
+        delivered = sum(1 for message in simulator.messages if not message.dropped)
+
+        print(f"  memory per box: {per_box / 1024:.1f} KiB")
+        print(f"  CPU: {cpu / wall * 100:.1f}% of one core, "
+              f"{cpu / wall / boxes * 100:.2f}% per box")
+        print(f"  frames rendered: {frames}, packets delivered: {delivered}")
+        summarize("max engine lateness per box", lateness)
+    finally:
+        for box in manager.boxes.values():
+            await box.stop()
+        manager.lights.client.close()
+        simulator.stop()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--zones", type=int, default=16)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--fps", type=float, default=20.0)
+    parser.add_argument("--flashes", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--countdown", type=float, default=3.0)
+    parser.add_argument("--sequences", type=int, default=5)
+    parser.add_argument("--virtual-sequences", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--event-clients", type=int, default=4)
+    parser.add_argument("--boxes", type=int, default=12)
+    parser.add_argument("--box-devices", type=int, default=4)
+    parser.add_argument("--box-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print("\n" + "🎃" * 30)
+    print("   SCARE BOX LIGHT BENCHMARK")
+    print("🎃" * 30)
+
+    simulator = LifxSimulator(
+        count=args.devices, zones=args.zones, latency=args.latency, loss=args.loss, seed=0
+    )
+    devices = await simulator.start()
+    client = LifxClient(timeout=max(0.1, args.latency * 4))
+    await client.open(("0.0.0.0", 0))
+    controller = LightController(client, seed=0)
+
+    try:
+        section("Connect")
+        started = time.perf_counter()
+        count = await controller.connect(known=devices)
+        print(f"  connected {count}/{args.devices} devices in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+        await benchmark_frames(controller, simulator, args.frames, args.fps)
+        await benchmark_flash(controller, simulator, args.flashes)
+        benchmark_countdown(controller.layout, args.countdown, args.fps)
+        await benchmark_sequence(controller, args.sequences)
+    finally:
+        controller.shutdown()
+        client.close()
+        simulator.stop()
+
+    await benchmark_virtual(args.virtual_sequences, args.countdown)
+    benchmark_events(args.events, args.event_clients)
+    await benchmark_boxes(args.boxes, args.box_devices, args.zones, args.box_seconds)
+
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    exit(asyncio.run(main()))
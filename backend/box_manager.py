@@ -0,0 +1,308 @@
+"""Hosts several scare boxes in one process."""
+
+import asyncio
+import sqlite3
+from typing import Dict, List, Optional
+from hardware import (
+    MicrophoneController,
+    LightController,
+    SpeakerController,
+    DiscoveryCache,
+    LifxDevice,
+    LifxSimulator,
+)
+from controller import DEFAULT_BOX, ScareBoxController
+from node_sync import NodeSync
+from utils import event_logger, EventCategory
+from utils.event_store import EventStore
+from websocket import StreamManager, manager as ws_manager
+from config import BoxConfig, config
+
+
+class BoxManager:
+    """Owns the shared hardware and the boxes that use it.
+
+    All boxes run on one event loop and share one LIFX socket (with its
+    per-bulb command queues and health tracking), one microphone stream per
+    input device and the speaker. Each box has its own state machine,
+    trigger profile, subset of the bulbs and effect engine. With no boxes
+    configured a single box uses every device, as before.
+    """
+
+    def __init__(self, boxes: Optional[List[BoxConfig]] = None):
+        self.config = config
+        hardware = config.hardware
+
+        # Every bulb on the network; discovery and rediscovery run here and
+        # the bulbs are then shared out to the boxes' light controllers
+        self.lights = LightController(
+            max_rate=hardware.lifx_max_rate,
+            failure_threshold=hardware.lifx_failure_threshold,
+            max_backoff=hardware.lifx_probe_max_backoff,
+        )
+        self.lights.register_devices_callback(self._assign_lights)
+        self.speaker = SpeakerController()
+        self.microphones: Dict[Optional[str], MicrophoneController] = {}
+
+        self.event_logger = event_logger
+        self.stream_manager = StreamManager(ws_manager)
+
+        # Event history on disk, written by a background thread
+        self.event_store: Optional[EventStore] = None
+        if config.events.store:
+            self.event_store = EventStore(
+                config.events.path,
+                batch_size=config.events.batch_size,
+                flush_interval=config.events.flush_interval,
+                max_queue=config.events.queue_size,
+                max_bytes=int(config.events.rotate_mb * 1024 * 1024),
+                max_age=config.events.rotate_hours * 3600.0,
+                keep=config.events.keep_files,
+            )
+
+        # State
+        self.is_running = False
+        self.light_discovery_task: Optional[asyncio.Task] = None
+        self.light_simulator: Optional[LifxSimulator] = None
+
+        # Triggers shared with scare boxes on other machines
+        self.sync: Optional[NodeSync] = None
+        if config.sync.enabled:
+            self.sync = NodeSync(
+                config.sync.node_id,
+                group=config.sync.group,
+                port=config.sync.port,
+                peers=config.sync.peers,
+                loopback=config.sync.loopback,
+                lead=config.sync.lead,
+                ping_interval=config.sync.ping_interval,
+            )
+            self.sync.register_trigger_callback(self._on_remote_trigger)
+
+        self.boxes: Dict[str, ScareBoxController] = {}
+        for box_config in boxes or config.boxes or [BoxConfig(name=DEFAULT_BOX)]:
+            self.add_box(box_config)
+
+        self.event_logger.register_callback(self._on_event)
+
+    def add_box(self, box_config: BoxConfig) -> ScareBoxController:
+        """Create a box on the shared hardware."""
+        if box_config.name in self.boxes:
+            raise ValueError(f"Duplicate box name: {box_config.name}")
+
+        hardware = self.config.hardware
+        lights = LightController(
+            self.lights.client,
+            frame_rate=hardware.lifx_frame_rate,
+            seed=hardware.lifx_effect_seed,
+            broadcast_flash=hardware.lifx_broadcast_flash,
+            device_waveforms=hardware.lifx_device_waveforms,
+            commands=self.lights.commands,
+            health=self.lights.health,
+        )
+        box = ScareBoxController(
+            box_config.name,
+            box_config,
+            microphone=self._microphone(box_config.microphone_device or hardware.microphone_device),
+            speaker=self.speaker,
+            lights=lights,
+        )
+        box.sync = self.sync
+        self.boxes[box.name] = box
+        return box
+
+    def _microphone(self, device_name: Optional[str]) -> MicrophoneController:
+        """The shared microphone for an input device, created on first use."""
+        microphone = self.microphones.get(device_name)
+        if microphone is None:
+            microphone = self.microphones[device_name] = MicrophoneController(
+                sample_rate=self.config.audio.sample_rate,
+                chunk_size=self.config.audio.chunk_size,
+                trigger_freq_min=self.config.audio.trigger_frequency_min,
+                trigger_freq_max=self.config.audio.trigger_frequency_max,
+                trigger_threshold=self.config.audio.trigger_amplitude_threshold,
+                band_count=self.config.audio.reactive_bands,
+            )
+        return microphone
+
+    @property
+    def default(self) -> ScareBoxController:
+        """The first box; un-namespaced API routes act on it."""
+        return next(iter(self.boxes.values()))
+
+    def get_box(self, name: Optional[str] = None) -> Optional[ScareBoxController]:
+        """A box by name, or the default box."""
+        if name is None:
+            return self.default
+        return self.boxes.get(name)
+
+    def _assign_lights(self):
+        """Share the discovered bulbs out to the boxes.
+
+        Boxes listing bulbs (by label, MAC or IP) get those; boxes listing
+        none get every bulb no other box listed.
+        """
+        claimed = set()
+        selections: Dict[str, List[LifxDevice]] = {}
+        for box in self.boxes.values():
+            selection = set(box.box_config.lights)
+            if not selection:
+                continue
+            devices = [
+                device for device in self.lights.devices
+                if selection & {device.label, device.mac, device.ip}
+            ]
+            selections[box.name] = devices
+            claimed.update(device.mac for device in devices)
+
+        unclaimed = [device for device in self.lights.devices if device.mac not in claimed]
+        for box in self.boxes.values():
+            box.lights.set_devices(selections.get(box.name, unclaimed))
+
+    async def initialize(self):
+        """Initialize all hardware components."""
+        if self.event_store:
+            self.event_store.start()
+            try:
+                self.event_logger.attach_store(self.event_store)
+            except sqlite3.Error as e:
+                # Run on the in-memory history alone
+                self.event_logger.error(EventCategory.SYSTEM, f"Could not load event history: {e}")
+        self.event_logger.info(EventCategory.SYSTEM, "Initializing Scare Box...")
+
+        try:
+            # Initialize microphones, one per input device
+            for device_name, microphone in self.microphones.items():
+                microphone.initialize(device_name)
+            self.event_logger.info(
+                EventCategory.HARDWARE,
+                "Microphone initialized",
+                {"microphones": len(self.microphones)},
+            )
+
+            # Initialize lights from known bulbs; rediscovery runs in the background
+            hardware = self.config.hardware
+            if hardware.lifx_simulated_devices:
+                self.light_simulator = LifxSimulator(
+                    count=hardware.lifx_simulated_devices,
+                    zones=hardware.lifx_simulated_zones,
+                )
+                await self.lights.connect(known=await self.light_simulator.start())
+            else:
+                await self.lights.connect(
+                    DiscoveryCache(hardware.lifx_cache_path),
+                    hardware.lifx_devices,
+                )
+            self._assign_lights()
+            self.event_logger.info(
+                EventCategory.HARDWARE,
+                "Lights initialized",
+                {
+                    "devices": len(self.lights.devices),
+                    "boxes": {name: len(box.lights.devices) for name, box in self.boxes.items()},
+                    "time_to_first_light": self.lights.time_to_first_light,
+                },
+            )
+
+            # Initialize speaker
+            self.speaker.discover_and_connect(hardware.speaker_address)
+            self.speaker.initialize()
+            for box in self.boxes.values():
+                box.state_machine.invalidate_timelines()  # Sound lengths are known now
+            self.event_logger.info(EventCategory.HARDWARE, "Speaker initialized")
+
+            self.event_logger.info(EventCategory.SYSTEM, "Initialization complete")
+
+        except Exception as e:
+            self.event_logger.error(EventCategory.SYSTEM, f"Initialization failed: {e}")
+            raise
+
+    async def start(self):
+        """Start every box and the shared hardware."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+
+        self.event_logger.info(
+            EventCategory.SYSTEM,
+            f"Starting Scare Box with {len(self.boxes)} box(es)",
+        )
+
+        # Start streaming
+        self.stream_manager.start_streaming()
+
+        if self.sync:
+            await self.sync.start()
+
+        for box in self.boxes.values():
+            await box.start()
+
+        intensity = self.default._get_intensity_multipliers()
+        self.speaker.play_ambient_music(intensity["volume"])
+
+        # Start microphone listening
+        for microphone in self.microphones.values():
+            await microphone.start_listening()
+
+        if not self.light_simulator:
+            self.light_discovery_task = asyncio.create_task(
+                self.lights.run_rediscovery(self.config.hardware.lifx_rediscovery_interval)
+            )
+
+        self.event_logger.info(EventCategory.SYSTEM, "Scare Box started")
+
+    async def stop(self):
+        """Stop every box and the shared hardware."""
+        if not self.is_running:
+            return
+
+        self.is_running = False
+
+        self.event_logger.info(EventCategory.SYSTEM, "Stopping Scare Box...")
+
+        # Stop microphones first so no trigger arrives mid-shutdown
+        for microphone in self.microphones.values():
+            microphone.stop_listening()
+
+        for box in self.boxes.values():
+            await box.stop()
+
+        if self.light_discovery_task:
+            self.light_discovery_task.cancel()
+
+        if self.sync:
+            self.sync.stop()
+
+        # Stop streaming
+        self.stream_manager.stop_streaming()
+
+        # Stop hardware
+        self.speaker.shutdown()
+        if self.light_simulator:
+            self.light_simulator.stop()
+
+        self.event_logger.info(EventCategory.SYSTEM, "Scare Box stopped")
+
+        if self.event_store:
+            self.event_logger.attach_store(None)
+            await asyncio.to_thread(self.event_store.stop)
+
+    def _on_remote_trigger(self, box_name: str, trigger_id: str, start_at: float):
+        """Start the same box (or the default one) for another node's trigger."""
+        box = self.boxes.get(box_name) or self.default
+        asyncio.create_task(box.trigger_sequence(start_at, trigger_id))
+
+    async def _on_event(self, event):
+        """Stream logged events, to the subscribers of the box that logged them."""
+        await self.stream_manager.stream_event(event)
+
+    def get_status(self) -> dict:
+        """Every box and the shared hardware they use."""
+        return {
+            "is_running": self.is_running,
+            "default": self.default.name,
+            "boxes": [box.get_status() for box in self.boxes.values()],
+            "lights": len(self.lights.devices),
+            "microphones": len(self.microphones),
+        }
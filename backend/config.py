@@ -1,6 +1,6 @@
 """Configuration management for Scare Box."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 import yaml
@@ -14,6 +14,10 @@ class AudioConfig(BaseModel):
     trigger_amplitude_threshold: float = 0.3
     sample_rate: int = 44100
     chunk_size: int = 1024
+    music_reactive: bool = True  # Ambient lights follow the music
+    reactive_bands: int = 8
+    trigger_debounce: float = 0.5  # Seconds of quiet before the mic can trigger again
+    trigger_max_per_minute: int = 6  # Accepted triggers per sliding minute
 
 
 class TimingConfig(BaseModel):
@@ -29,6 +33,18 @@ class HardwareConfig(BaseModel):
     microphone_device: Optional[str] = None
     speaker_address: Optional[str] = None
     lifx_devices: List[str] = []
+    lifx_poll_interval: float = 30.0  # Background reconcile of the light state mirror
+    lifx_cache_path: str = "lifx_devices.json"  # Known bulbs, for fast startup
+    lifx_rediscovery_interval: float = 300.0
+    lifx_frame_rate: float = 20.0  # Effect engine ticks per second
+    lifx_effect_seed: Optional[int] = None  # Fixed seed for reproducible effects
+    lifx_max_rate: float = 15.0  # Messages per second per bulb (LIFX drops above ~20)
+    lifx_device_waveforms: bool = True  # Run compilable effects on the bulbs themselves
+    lifx_broadcast_flash: bool = False  # One broadcast packet; hits every bulb on the LAN
+    lifx_failure_threshold: int = 3  # Consecutive timeouts before a bulb is skipped
+    lifx_probe_max_backoff: float = 60.0  # Longest wait between probes of a dead bulb
+    lifx_simulated_devices: int = 0  # Run against N local emulated bulbs instead of the LAN
+    lifx_simulated_zones: int = 16
 
 
 class IntensityLevel(BaseModel):
@@ -43,11 +59,63 @@ class IntensityConfig(BaseModel):
     adult: IntensityLevel = IntensityLevel(brightness=1.0, volume=1.0)
 
 
+class BoxConfig(BaseModel):
+    """One of several scare boxes hosted by this process.
+
+    Unset fields fall back to the top-level settings.
+    """
+    name: str
+    mode: Optional[str] = None
+    lights: List[str] = []  # Bulb labels, MACs or IPs; empty takes every bulb no other box lists
+    microphone_device: Optional[str] = None  # Boxes naming the same device share one stream
+    trigger_frequency_min: Optional[float] = None
+    trigger_frequency_max: Optional[float] = None
+    trigger_amplitude_threshold: Optional[float] = None
+    countdown_duration: Optional[float] = None
+    active_duration: Optional[float] = None
+    reset_duration: Optional[float] = None
+    scream_delay: Optional[float] = None
+
+
+class SyncConfig(BaseModel):
+    """Trigger synchronization with scare boxes on other machines."""
+    enabled: bool = False
+    node_id: Optional[str] = None  # Defaults to the hostname
+    group: str = "239.255.42.99"  # Multicast group shared by every node
+    port: int = 50505
+    loopback: bool = False  # Unicast to `peers` on 127.0.0.1 instead (testing on one machine)
+    peers: List[str] = []  # host:port of the other nodes in loopback mode
+    lead: float = 0.25  # Seconds from a trigger to the agreed start; must exceed LAN latency
+    ping_interval: float = 1.0  # Clock offset exchanges
+
+
+class EventsConfig(BaseModel):
+    """Event history kept on disk."""
+    store: bool = True
+    path: str = "events.db"  # SQLite database; rotated files are kept next to it
+    batch_size: int = 256  # Events per write transaction
+    flush_interval: float = 0.5  # Max seconds an event waits before being written
+    queue_size: int = 10000  # Events waiting for the writer before new ones are dropped
+    rotate_mb: float = 50.0
+    rotate_hours: float = 24.0
+    keep_files: int = 7  # Rotated databases to keep
+
+
+class LoggingConfig(BaseModel):
+    """Diagnostic logging, written by a background thread."""
+    level: str = "info"
+    levels: Dict[str, str] = {}  # Per-module levels, e.g. {"hardware.microphone": "warning"}
+    format: str = "json"  # "json" lines or human-readable "text"
+    path: Optional[str] = None  # Default: stderr
+    queue_size: int = 10000  # Records waiting to be written before new ones are dropped
+
+
 class ServerConfig(BaseModel):
     """Server configuration."""
     host: str = "0.0.0.0"
     port: int = 8000
     cors_origins: List[str] = ["http://localhost:3000", "http://localhost:5173"]
+    ws_queue_size: int = 256  # Messages queued per WebSocket client before telemetry is dropped
 
 
 class Config(BaseSettings):
@@ -57,6 +125,10 @@ class Config(BaseSettings):
     timing: TimingConfig = TimingConfig()
     hardware: HardwareConfig = HardwareConfig()
     intensity: IntensityConfig = IntensityConfig()
+    boxes: List[BoxConfig] = []  # Empty runs a single box with the settings above
+    sync: SyncConfig = SyncConfig()
+    events: EventsConfig = EventsConfig()
+    logging: LoggingConfig = LoggingConfig()
     server: ServerConfig = ServerConfig()
 
     @classmethod
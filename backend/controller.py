@@ -1,46 +1,116 @@
 """Main orchestration controller for Scare Box."""
 
 import asyncio
-from typing import Optional
-from hardware import MicrophoneController, LightController, SpeakerController, AudioData
-from state_machine import StateMachine, State, Mode, StateChangeEvent
+import time
+from typing import Awaitable, Callable, Optional
+from hardware import (
+    MicrophoneController,
+    LightController,
+    SpeakerController,
+    AudioData,
+    MusicReactor,
+    TriggerProfile,
+)
+from hardware.light_effects import music
+from node_sync import NodeSync
+from state_machine import StateMachine, Mode, State, StateChangeEvent, SequencePhases
+from timeline import Cue, Timeline
 from utils import event_logger, EventCategory
+from utils.trigger_ingest import TriggerIngest
 from websocket import StreamManager, manager as ws_manager
-from config import config
+from config import BoxConfig, config
 
+DEFAULT_BOX = "default"
+
+
+def parse_mode(mode_str: str) -> Mode:
+    """Parse a mode name; anything but "child" is adult."""
+    return Mode.CHILD if mode_str.lower() == "child" else Mode.ADULT
 
-class ScareBoxController:
-    """Main controller coordinating all components."""
 
-    def __init__(self):
+class ScareBoxController:
+    """Controller for one scare box.
+
+    A box has its own state machine, trigger profile, light subset and
+    effects. The microphone, speaker and light connection can be shared
+    with other boxes (see ``BoxManager``); by default the box makes its own.
+    ``clock`` and ``sleep`` time its sequences and effects, e.g. a
+    ``VirtualClock`` to run them without real waiting.
+    """
+
+    def __init__(
+        self,
+        name: str = DEFAULT_BOX,
+        box_config: Optional[BoxConfig] = None,
+        microphone: Optional[MicrophoneController] = None,
+        speaker: Optional[SpeakerController] = None,
+        lights: Optional[LightController] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
         self.config = config
+        self.name = name
+        self.box_config = box_config or BoxConfig(name=name)
 
         # Initialize components
-        self.microphone = MicrophoneController(
+        self.microphone = microphone or MicrophoneController(
             sample_rate=config.audio.sample_rate,
             chunk_size=config.audio.chunk_size,
-            trigger_freq_min=config.audio.trigger_frequency_min,
-            trigger_freq_max=config.audio.trigger_frequency_max,
-            trigger_threshold=config.audio.trigger_amplitude_threshold,
+            band_count=config.audio.reactive_bands,
         )
-
-        self.lights = LightController()
-        self.speaker = SpeakerController()
+        self.trigger_profile = TriggerProfile(
+            freq_min=self._setting("audio", "trigger_frequency_min"),
+            freq_max=self._setting("audio", "trigger_frequency_max"),
+            threshold=self._setting("audio", "trigger_amplitude_threshold"),
+        )
+        self.reactor = MusicReactor(band_count=config.audio.reactive_bands)
+
+        self.lights = lights or LightController(
+            frame_rate=config.hardware.lifx_frame_rate,
+            max_rate=config.hardware.lifx_max_rate,
+            device_waveforms=config.hardware.lifx_device_waveforms,
+            failure_threshold=config.hardware.lifx_failure_threshold,
+            max_backoff=config.hardware.lifx_probe_max_backoff,
+            seed=config.hardware.lifx_effect_seed,
+            broadcast_flash=config.hardware.lifx_broadcast_flash,
+            clock=clock,
+            sleep=sleep,
+        )
+        self.speaker = speaker or SpeakerController()
 
         self.state_machine = StateMachine(
-            countdown_duration=config.timing.countdown_duration,
-            active_duration=config.timing.active_duration,
-            reset_duration=config.timing.reset_duration,
+            countdown_duration=self._setting("timing", "countdown_duration"),
+            active_duration=self._setting("timing", "active_duration"),
+            reset_duration=self._setting("timing", "reset_duration"),
+            clock=clock,
+            sleep=sleep,
+        )
+        self.state_machine.set_mode(parse_mode(self.box_config.mode or config.mode))
+
+        # Triggers arrive on the audio thread; filter them onto the event loop
+        self.triggers = TriggerIngest(
+            self._on_trigger_accepted,
+            window=config.audio.trigger_debounce,
+            max_triggers=config.audio.trigger_max_per_minute,
+            period=60.0,
+            gate=self.state_machine.can_trigger,
+            clock=clock,
         )
 
-        self.event_logger = event_logger
-        self.stream_manager = StreamManager(ws_manager)
+        self.event_logger = event_logger.bind(box=name)
+        self.stream_manager = StreamManager(ws_manager, box=name)
 
         # State
         self.is_running = False
         self.ambient_task: Optional[asyncio.Task] = None
         self.light_stream_task: Optional[asyncio.Task] = None
-        self.scream_delay = config.timing.scream_delay
+        self.light_reconcile_task: Optional[asyncio.Task] = None
+        self.light_health_task: Optional[asyncio.Task] = None
+        self.scream_delay = self._setting("timing", "scream_delay")
+
+        # Trigger synchronization with other nodes (set by the box manager)
+        self.sync: Optional[NodeSync] = None
+        self.sync_id: Optional[str] = None  # Synchronized sequence awaiting its start report
 
         # Register callbacks
         self._setup_callbacks()
@@ -48,42 +118,42 @@ class ScareBoxController:
     def _setup_callbacks(self):
         """Setup callbacks between components."""
         # Microphone callbacks
-        self.microphone.register_trigger_callback(self._on_audio_trigger)
+        self.microphone.register_trigger_callback(self._on_audio_trigger, self.trigger_profile)
         self.microphone.register_audio_callback(self._on_audio_data)
 
         # State machine callbacks
         self.state_machine.register_state_change_callback(self._on_state_change)
 
-        # Event logger callbacks
-        self.event_logger.register_callback(self._on_event)
-
-    async def initialize(self):
-        """Initialize all hardware components."""
-        self.event_logger.info(EventCategory.SYSTEM, "Initializing Scare Box...")
-
-        try:
-            # Initialize microphone
-            self.microphone.initialize(self.config.hardware.microphone_device)
-            self.event_logger.info(EventCategory.HARDWARE, "Microphone initialized")
-
-            # Initialize lights
-            self.lights.discover_devices()
-            self.lights.initialize()
-            self.event_logger.info(EventCategory.HARDWARE, "Lights initialized")
-
-            # Initialize speaker
-            self.speaker.discover_and_connect(self.config.hardware.speaker_address)
-            self.speaker.initialize()
-            self.event_logger.info(EventCategory.HARDWARE, "Speaker initialized")
-
-            self.event_logger.info(EventCategory.SYSTEM, "Initialization complete")
-
-        except Exception as e:
-            self.event_logger.error(EventCategory.SYSTEM, f"Initialization failed: {e}")
-            raise
+        # Scare sequence cues, all played on the state machine's clock
+        self.state_machine.register_cue_provider(self._add_sequence_cues)
+        for action, handler in {
+            "glitch": self.lights.start_glitch_effect,
+            "flash": self._cue_flash,
+            "lights_reset": self.lights.reset_to_ambient,
+            "sound": self.speaker.play_sound,
+            "media": self._cue_media,
+            "distortion": self.speaker.apply_distortion,
+        }.items():
+            self.state_machine.register_cue_handler(action, handler)
+
+    def _setting(self, section: str, key: str):
+        """A box override if set, else the top-level setting."""
+        value = getattr(self.box_config, key)
+        return getattr(getattr(self.config, section), key) if value is None else value
+
+    def _store(self, section: str, key: str, value):
+        """Save a setting on this box's entry, or top-level for a single box."""
+        if any(box is self.box_config for box in self.config.boxes):
+            setattr(self.box_config, key, value)
+        else:
+            setattr(getattr(self.config, section), key, value)
 
     async def start(self):
-        """Start Scare Box operation."""
+        """Start this box's triggers, light effects and streams.
+
+        Shared hardware (microphone stream, ambient music, light discovery)
+        is started by the box manager.
+        """
         if self.is_running:
             return
 
@@ -92,70 +162,86 @@ class ScareBoxController:
 
         self.event_logger.info(
             EventCategory.SYSTEM,
-            f"Starting Scare Box in {mode.value.upper()} mode",
+            f"Starting box {self.name} in {mode.value.upper()} mode",
         )
 
         # Start streaming
         self.stream_manager.start_streaming()
+        self.triggers.attach()
 
         # Start ambient effects
-        intensity = self._get_intensity_multipliers()
-        self.ambient_task = asyncio.create_task(self.lights.set_ambient_pattern())
-        self.speaker.play_ambient_music(intensity["volume"])
-
-        # Start microphone listening
-        await self.microphone.start_listening()
+        base = None
+        if self.config.audio.music_reactive:
+            base = music(self.reactor, max_rate=self.config.hardware.lifx_max_rate)
+        self.ambient_task = asyncio.create_task(self.lights.set_ambient_pattern(base))
 
         # Start periodic light status streaming
         self.light_stream_task = asyncio.create_task(
             self.stream_manager.periodic_light_status_stream(self.lights)
         )
-
-        self.event_logger.info(EventCategory.SYSTEM, "Scare Box started")
+        self.light_reconcile_task = asyncio.create_task(
+            self.lights.run_reconciliation(self.config.hardware.lifx_poll_interval)
+        )
+        self.light_health_task = asyncio.create_task(self.lights.run_health_probes())
 
     async def stop(self):
-        """Stop Scare Box operation."""
+        """Stop this box and switch its lights off."""
         if not self.is_running:
             return
 
         self.is_running = False
 
-        self.event_logger.info(EventCategory.SYSTEM, "Stopping Scare Box...")
+        self.event_logger.info(EventCategory.SYSTEM, f"Stopping box {self.name}")
 
         # Stop streaming
         self.stream_manager.stop_streaming()
 
-        # Stop microphone
-        self.microphone.stop_listening()
-
-        # Stop ambient effects
-        if self.ambient_task:
-            self.ambient_task.cancel()
+        # Stop any running sequence and the ambient effects
+        if not self.state_machine.can_trigger():
+            await self.state_machine.stop()
 
-        if self.light_stream_task:
-            self.light_stream_task.cancel()
+        for task in (
+            self.ambient_task,
+            self.light_stream_task,
+            self.light_reconcile_task,
+            self.light_health_task,
+        ):
+            if task:
+                task.cancel()
 
-        # Stop hardware
         self.lights.shutdown()
-        self.speaker.shutdown()
 
-        self.event_logger.info(EventCategory.SYSTEM, "Scare Box stopped")
+    def get_status(self) -> dict:
+        """Summary of this box."""
+        return {
+            "name": self.name,
+            "state": self.state_machine.get_state().value,
+            "mode": self.state_machine.get_mode().value,
+            "is_running": self.is_running,
+            "lights": len(self.lights.devices),
+            "microphone": self.microphone.device_id,
+        }
 
     def _on_audio_trigger(self):
-        """Handle audio trigger detection."""
-        if not self.state_machine.can_trigger():
-            return
+        """Handle audio trigger detection; called on the audio thread."""
+        self.triggers.submit("audio")
 
+    def _on_trigger_accepted(self, source: str):
+        """Start a sequence for a trigger that passed debounce and rate limits."""
         self.event_logger.info(
             EventCategory.TRIGGER,
-            "Audio trigger detected",
-            {"type": "audio"},
+            f"{source.capitalize()} trigger detected",
+            {"type": source},
         )
 
         asyncio.create_task(self.trigger_sequence())
 
     async def _on_audio_data(self, audio_data: AudioData):
         """Handle audio data updates."""
+        if audio_data.bands is not None and self.reactor.update(audio_data.bands):
+            # Push the beat straight away rather than waiting for the next tick
+            self.lights.engine.request_frame()
+
         await self.stream_manager.stream_audio_data(audio_data)
 
     async def _on_state_change(self, event: StateChangeEvent):
@@ -165,59 +251,94 @@ class ScareBoxController:
             f"State changed: {event.from_state.value} -> {event.to_state.value}",
         )
 
-        await self.stream_manager.stream_state_change(event)
-
-        # Execute hardware effects based on state
-        await self._execute_state_effects(event)
+        # The first cue of a synchronized sequence: report how late we started
+        if self.sync_id and event.from_state == State.NON_TRICK and event.to_state != State.NON_TRICK:
+            self.sync.report(self.sync_id, event.lateness or 0.0)
+            self.sync_id = None
 
-    async def _execute_state_effects(self, event: StateChangeEvent):
-        """Execute hardware effects for state changes."""
-        intensity = self._get_intensity_multipliers()
-        state = event.to_state
-
-        if state == State.TRICK_COUNTDOWN:
-            # Start glitch effects
-            if event.countdown_remaining is not None:
-                progress = 1.0 - (
-                    event.countdown_remaining / self.config.timing.countdown_duration
-                )
-                await self.lights.start_glitch_effect(progress)
-                self.speaker.apply_distortion(progress)
-
-        elif state == State.TRICK_ACTIVE:
-            # Execute scare
-            await self.speaker.play_scare_sequence(
-                volume_multiplier=intensity["volume"],
-                scream_delay=self.scream_delay
-            )
-            self.lights.trigger_flash(intensity["brightness"])
+        await self.stream_manager.stream_state_change(event)
 
-        elif state == State.TRICK_RESET:
-            # Reset to ambient
-            asyncio.create_task(
-                self.lights.reset_to_ambient(self.config.timing.reset_duration)
-            )
-            asyncio.create_task(
-                self.speaker.reset_audio(self.config.timing.reset_duration)
+    def _add_sequence_cues(self, timeline: Timeline, mode: Mode, phases: SequencePhases):
+        """Add light and audio cues to a scare sequence timeline."""
+        intensity = self._get_intensity_multipliers(mode)
+        cues = timeline.cues
+
+        # Countdown: glitch and distortion ramp up with progress
+        for at in phases.countdown_steps:
+            progress = at / phases.countdown_duration
+            cues.append(Cue(at, "glitch", progress))
+            cues.append(Cue(at, "distortion", progress))
+
+        # Active: pause media, BOO and flash together, Happy Halloween after the screams
+        boo_at = phases.active_at
+        halloween_at = boo_at + self.speaker.sound_length("boo") + self.scream_delay
+        cues += [
+            Cue(boo_at, "media", "pause"),
+            Cue(boo_at, "sound", "boo"),
+            Cue(boo_at, "flash", intensity["brightness"]),
+            Cue(halloween_at, "sound", "happy_halloween"),
+            Cue(halloween_at + self.speaker.sound_length("happy_halloween"), "media", "resume"),
+        ]
+
+        # Reset: fade the lights back and ramp distortion down
+        reset_duration = phases.end_at - phases.reset_at
+        cues.append(Cue(phases.reset_at, "lights_reset", reset_duration))
+        steps = max(1, int(reset_duration * 10))
+        for i in range(steps):
+            at = phases.reset_at + i * reset_duration / steps
+            cues.append(Cue(at, "distortion", 1.0 - i / steps))
+        cues.append(Cue(phases.end_at, "distortion", 0.0))
+
+        timeline.cleanup += [
+            Cue(0.0, "media", "resume"),
+            Cue(0.0, "distortion", 0.0),
+            Cue(0.0, "lights_reset", 0.0),
+        ]
+
+    def _cue_media(self, action: str):
+        if action == "pause":
+            self.speaker.pause_media()
+        else:
+            self.speaker.resume_media()
+
+    def _cue_flash(self, brightness: float):
+        flash = self.lights.trigger_flash(brightness)
+        if flash:
+            self.event_logger.debug(
+                EventCategory.HARDWARE,
+                f"Flash sent to {flash.devices} light(s), skew {flash.skew_us:.0f} us",
+                {"skew_us": flash.skew_us, "broadcast": flash.broadcast},
             )
 
-    async def _on_event(self, event):
-        """Handle logged events."""
-        await self.stream_manager.stream_event(event)
+    async def trigger_sequence(
+        self,
+        start_at: Optional[float] = None,
+        sync_id: Optional[str] = None,
+    ):
+        """Manually trigger scare sequence.
+
+        With node sync, the trigger is announced to the other nodes and the
+        sequence starts everywhere at the same instant. ``start_at`` and
+        ``sync_id`` are set for a trigger announced by another node.
+        """
+        details = {"type": "manual" if sync_id is None else "remote"}
+        if self.sync and sync_id is None and self.state_machine.can_trigger():
+            sync_id, start_at = self.sync.announce(self.name)
+        if sync_id:
+            details["sync_id"] = sync_id
 
-    async def trigger_sequence(self):
-        """Manually trigger scare sequence."""
         self.event_logger.info(
             EventCategory.TRIGGER,
             "Scare sequence triggered",
-            {"type": "manual"},
+            details,
         )
 
-        await self.state_machine.trigger_sequence()
+        if await self.state_machine.trigger_sequence(start_at):
+            self.sync_id = sync_id
 
     def set_mode(self, mode_str: str):
         """Set operating mode."""
-        mode = Mode.CHILD if mode_str.lower() == "child" else Mode.ADULT
+        mode = parse_mode(mode_str)
 
         self.state_machine.set_mode(mode)
 
@@ -241,27 +362,28 @@ class ScareBoxController:
             # Update timing
             if key == "countdown_duration":
                 self.state_machine.update_timing(countdown_duration=value)
-                self.config.timing.countdown_duration = value
+                self._store("timing", key, value)
             elif key == "active_duration":
                 self.state_machine.update_timing(active_duration=value)
-                self.config.timing.active_duration = value
+                self._store("timing", key, value)
             elif key == "reset_duration":
                 self.state_machine.update_timing(reset_duration=value)
-                self.config.timing.reset_duration = value
+                self._store("timing", key, value)
             elif key == "scream_delay":
                 self.scream_delay = value
-                self.config.timing.scream_delay = value
+                self._store("timing", key, value)
+                self.state_machine.invalidate_timelines()
 
-            # Update audio settings
+            # Update this box's trigger profile
             elif key == "trigger_frequency_min":
-                self.microphone.trigger_freq_min = value
-                self.config.audio.trigger_frequency_min = value
+                self.trigger_profile.freq_min = value
+                self._store("audio", key, value)
             elif key == "trigger_frequency_max":
-                self.microphone.trigger_freq_max = value
-                self.config.audio.trigger_frequency_max = value
+                self.trigger_profile.freq_max = value
+                self._store("audio", key, value)
             elif key == "trigger_amplitude_threshold":
-                self.microphone.trigger_threshold = value
-                self.config.audio.trigger_amplitude_threshold = value
+                self.trigger_profile.threshold = value
+                self._store("audio", key, value)
 
         # Save config to disk
         self.config.save_to_file()
@@ -271,9 +393,9 @@ class ScareBoxController:
         return {
             "mode": self.state_machine.get_mode().value,
             "audio": {
-                "trigger_frequency_min": self.microphone.trigger_freq_min,
-                "trigger_frequency_max": self.microphone.trigger_freq_max,
-                "trigger_amplitude_threshold": self.microphone.trigger_threshold,
+                "trigger_frequency_min": self.trigger_profile.freq_min,
+                "trigger_frequency_max": self.trigger_profile.freq_max,
+                "trigger_amplitude_threshold": self.trigger_profile.threshold,
                 "sample_rate": self.microphone.sample_rate,
             },
             "timing": {
@@ -284,9 +406,9 @@ class ScareBoxController:
             },
         }
 
-    def _get_intensity_multipliers(self) -> dict:
-        """Get intensity multipliers for current mode."""
-        mode = self.state_machine.get_mode()
+    def _get_intensity_multipliers(self, mode: Optional[Mode] = None) -> dict:
+        """Get intensity multipliers for ``mode`` (the current mode by default)."""
+        mode = mode or self.state_machine.get_mode()
 
         if mode == Mode.CHILD:
             return {
@@ -1,12 +1,22 @@
 """Hardware controllers for Scare Box."""
 
-from .microphone import MicrophoneController, AudioData
+from .microphone import MicrophoneController, AudioData, TriggerProfile
 from .lifx_controller import LightController
+from .lifx_protocol import LifxClient, LifxDevice
+from .discovery_cache import DiscoveryCache
+from .music_reactor import MusicReactor
+from .lifx_simulator import LifxSimulator
 from .speaker import SpeakerController
 
 __all__ = [
     "MicrophoneController",
     "AudioData",
+    "TriggerProfile",
     "LightController",
+    "LifxClient",
+    "LifxDevice",
+    "DiscoveryCache",
+    "MusicReactor",
+    "LifxSimulator",
     "SpeakerController",
 ]
@@ -0,0 +1,219 @@
+"""Per-device outbound command queues for LIFX bulbs.
+
+Bulbs start dropping messages above roughly 20 per second, so every packet
+to a device goes through its queue. Colour state is latest-wins: a frame
+that has not been sent yet is replaced by the next one instead of queueing
+behind it. Flash and power commands are urgent and always go first. A token
+bucket per device enforces the message rate.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .lifx_protocol import LifxClient, LifxDevice
+
+Command = Tuple[int, bytes]  # (message_type, payload)
+
+
+class TokenBucket:
+    """Allows ``rate`` events per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float, debt: float = 0.0) -> bool:
+        """Take one token; ``debt`` lets the balance go that far below zero."""
+        self._refill(now)
+        if self.tokens < 1.0 - debt:
+            return False
+        self.tokens -= 1.0
+        return True
+
+    def wait_time(self, now: float, debt: float = 0.0) -> float:
+        """Seconds until ``take`` with the same ``debt`` would succeed."""
+        self._refill(now)
+        return max(0.0, (1.0 - debt - self.tokens) / self.rate)
+
+
+class DeviceQueue:
+    """Pending commands for one device."""
+
+    def __init__(self, device: LifxDevice, bucket: TokenBucket, urgent_limit: int):
+        self.device = device
+        self.bucket = bucket
+        self.urgent: deque = deque(maxlen=urgent_limit)
+        # Remaining packets of the latest colour frame (several for very long bars)
+        self.color: List[Command] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self.urgent) + len(self.color)
+
+
+class CommandQueue:
+    """Rate-limited, coalescing outbound queues, one per device.
+
+    Commands that fit within the rate limit are sent immediately; the rest
+    are flushed from a timer on the event loop as tokens become available.
+    Urgent commands may borrow up to ``burst`` tokens so a flash reaches
+    every bulb at once, which then delays the colour frames that follow.
+    """
+
+    def __init__(
+        self,
+        client: LifxClient,
+        rate: float = 15.0,
+        burst: float = 3.0,
+        urgent_limit: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.urgent_limit = urgent_limit
+        self.clock = clock
+
+        self.queues: Dict[str, DeviceQueue] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def _queue(self, device: LifxDevice) -> DeviceQueue:
+        queue = self.queues.get(device.mac)
+        if queue is None:
+            bucket = TokenBucket(self.rate, self.burst, self.clock())
+            queue = self.queues[device.mac] = DeviceQueue(device, bucket, self.urgent_limit)
+        queue.device = device
+        return queue
+
+    def submit_color(self, device: LifxDevice, commands: Sequence[Command]):
+        """Queue colour state for a device, replacing any unsent colour."""
+        queue = self._queue(device)
+        if queue.color:
+            self.coalesced += len(queue.color)
+        queue.color = list(commands)
+        self._flush_queue(queue, self.clock())
+        self._schedule()
+
+    def submit_urgent(
+        self,
+        device: LifxDevice,
+        message_type: int,
+        payload: bytes = b"",
+        replaces_color: bool = False,
+    ):
+        """Queue a flash or power command ahead of any colour state.
+
+        ``replaces_color`` discards unsent colour state that would otherwise
+        overwrite this command once it has gone out.
+        """
+        queue = self._queue(device)
+        if replaces_color and queue.color:
+            self.coalesced += len(queue.color)
+            queue.color = []
+        if len(queue.urgent) == queue.urgent.maxlen:
+            self.dropped += 1
+        queue.urgent.append((message_type, payload))
+        self._flush_queue(queue, self.clock())
+        self._schedule()
+
+    def take_urgent(self, device: LifxDevice, replaces_color: bool = False) -> bool:
+        """Reserve a token for an urgent packet the caller sends itself.
+
+        Used for synchronized bursts that are built and sent outside the
+        queue. Returns False when the device is over even its borrowing limit.
+        """
+        queue = self._queue(device)
+        if replaces_color and queue.color:
+            self.coalesced += len(queue.color)
+            queue.color = []
+        if queue.urgent or not queue.bucket.take(self.clock(), debt=self.burst):
+            return False
+        self.sent += 1
+        return True
+
+    def _flush_queue(self, queue: DeviceQueue, now: float) -> int:
+        sent = 0
+        while queue.urgent and queue.bucket.take(now, debt=self.burst):
+            message_type, payload = queue.urgent.popleft()
+            self.client.send(queue.device, message_type, payload)
+            sent += 1
+
+        while queue.color and not queue.urgent and queue.bucket.take(now):
+            message_type, payload = queue.color.pop(0)
+            self.client.send(queue.device, message_type, payload)
+            sent += 1
+
+        self.sent += sent
+        return sent
+
+    def flush(self) -> int:
+        """Send everything the rate limits allow right now; returns packets sent."""
+        now = self.clock()
+        return sum(self._flush_queue(queue, now) for queue in self.queues.values())
+
+    def _next_flush(self) -> Optional[float]:
+        now = self.clock()
+        waits = [
+            queue.bucket.wait_time(now, self.burst if queue.urgent else 0.0)
+            for queue in self.queues.values() if queue.pending
+        ]
+        return min(waits) if waits else None
+
+    def _on_timer(self):
+        self._timer = None
+        if not self.client.is_open:
+            return
+        self.flush()
+        self._schedule()
+
+    def _schedule(self):
+        """Arm a timer for the next token if anything is still pending."""
+        if self._timer is not None:
+            return
+        delay = self._next_flush()
+        if delay is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._timer = loop.call_later(delay, self._on_timer)
+
+    def forget(self, devices: Sequence[LifxDevice]):
+        """Drop the queues of devices that went away."""
+        for device in devices:
+            queue = self.queues.pop(device.mac, None)
+            if queue:
+                self.dropped += queue.pending
+
+    def clear(self):
+        """Drop everything pending and stop the flush timer."""
+        for queue in self.queues.values():
+            self.dropped += queue.pending
+            queue.urgent.clear()
+            queue.color = []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def get_stats(self) -> dict:
+        """Queue statistics."""
+        return {
+            "rate": self.rate,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "pending": sum(queue.pending for queue in self.queues.values()),
+        }
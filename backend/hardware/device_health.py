@@ -0,0 +1,155 @@
+"""Per-device health tracking with circuit breakers.
+
+Every request to a bulb reports its outcome here. After a run of failures
+the device's breaker opens: it is skipped by sends and polls, and only
+probed in the background with exponential backoff until it answers again.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, Optional
+
+
+class BreakerState(str, Enum):
+    """Circuit breaker states."""
+    CLOSED = "closed"  # healthy, used normally
+    OPEN = "open"  # skipped until the next probe is due
+    HALF_OPEN = "half_open"  # a probe is in flight
+
+
+@dataclass
+class DeviceHealth:
+    """Health of one device."""
+    state: BreakerState = BreakerState.CLOSED
+    latency_ewma: Optional[float] = None
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    backoff: float = 0.0
+    next_probe: float = 0.0
+    opened_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state.value,
+            "latency_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000, 2),
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class HealthTracker:
+    """Latency EWMAs, failure counts and circuit breakers keyed by MAC."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        alpha: float = 0.2,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.alpha = alpha
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self.devices: Dict[str, DeviceHealth] = {}
+        self.trips = 0
+        self.recoveries = 0
+
+    @property
+    def changes(self) -> int:
+        """Grows whenever a device becomes available or unavailable."""
+        return self.trips + self.recoveries
+
+    def get(self, mac: str) -> DeviceHealth:
+        health = self.devices.get(mac)
+        if health is None:
+            health = self.devices[mac] = DeviceHealth()
+        return health
+
+    def is_available(self, mac: str) -> bool:
+        """Whether commands should be sent to the device."""
+        health = self.devices.get(mac)
+        return health is None or health.state == BreakerState.CLOSED
+
+    def record_success(self, mac: str, latency: float) -> bool:
+        """Record a reply; returns True when this closed an open breaker."""
+        health = self.get(mac)
+        health.successes += 1
+        health.consecutive_failures = 0
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+        else:
+            health.latency_ewma += self.alpha * (latency - health.latency_ewma)
+
+        if health.state == BreakerState.CLOSED:
+            return False
+
+        health.state = BreakerState.CLOSED
+        health.backoff = 0.0
+        health.opened_at = None
+        self.recoveries += 1
+        return True
+
+    def record_failure(self, mac: str) -> bool:
+        """Record a timeout; returns True when this opened the breaker."""
+        health = self.get(mac)
+        health.failures += 1
+        health.consecutive_failures += 1
+        now = self.clock()
+
+        if health.state == BreakerState.CLOSED:
+            if health.consecutive_failures < self.failure_threshold:
+                return False
+            health.state = BreakerState.OPEN
+            health.opened_at = now
+            health.backoff = self.base_backoff
+            health.next_probe = now + health.backoff
+            self.trips += 1
+            return True
+
+        # A failed probe: back off further before the next one
+        health.state = BreakerState.OPEN
+        health.backoff = min(self.max_backoff, max(self.base_backoff, health.backoff * 2))
+        health.next_probe = now + health.backoff
+        return False
+
+    def due_for_probe(self, mac: str) -> bool:
+        """Whether an open device should be probed now; marks it half-open."""
+        health = self.devices.get(mac)
+        if health is None or health.state != BreakerState.OPEN:
+            return False
+        if self.clock() < health.next_probe:
+            return False
+        health.state = BreakerState.HALF_OPEN
+        return True
+
+    def next_probe_in(self) -> float:
+        """Seconds until the earliest probe is due (``inf`` if none)."""
+        now = self.clock()
+        waits = [
+            health.next_probe - now
+            for health in self.devices.values() if health.state == BreakerState.OPEN
+        ]
+        return max(0.0, min(waits)) if waits else math.inf
+
+    def forget(self, mac: str):
+        self.devices.pop(mac, None)
+
+    def get_stats(self) -> dict:
+        """Breaker counts across all devices."""
+        open_count = sum(
+            1 for health in self.devices.values() if health.state != BreakerState.CLOSED
+        )
+        return {
+            "tracked": len(self.devices),
+            "open": open_count,
+            "trips": self.trips,
+            "recoveries": self.recoveries,
+        }
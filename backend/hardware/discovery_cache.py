@@ -0,0 +1,40 @@
+"""Persisted cache of discovered LIFX devices for fast startup."""
+
+import json
+import logging
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable, List
+
+from .lifx_protocol import LifxDevice
+
+log = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """Stores MAC, IP, port, label and zone count of known bulbs on disk."""
+
+    def __init__(self, path: str = "lifx_devices.json"):
+        self.path = Path(path)
+
+    def load(self) -> List[LifxDevice]:
+        """Load cached devices; a missing or corrupt cache is treated as empty."""
+        if not self.path.exists():
+            return []
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return [LifxDevice(**entry) for entry in data.get("devices", [])]
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("Ignoring unreadable LIFX cache %s: %s", self.path, e)
+            return []
+
+    def save(self, devices: Iterable[LifxDevice]):
+        """Write devices to disk atomically."""
+        data = {"devices": [asdict(device) for device in devices]}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        tmp_path.replace(self.path)
@@ -1,149 +1,671 @@
 """LIFX Light Bar controller for addressable LED lighting."""
 
 import asyncio
-from typing import List, Optional, Tuple
-from lifxlan import LifxLAN, Light
-import random
+import logging
 import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+from .command_queue import CommandQueue
+from .device_health import HealthTracker
+from .discovery_cache import DiscoveryCache
+from .light_effects import (
+    DeviceWaveform,
+    Effect,
+    EffectEngine,
+    ambient,
+    fade,
+    flash,
+    glitch,
+)
+from .light_frames import ZoneLayout, frame_messages, hsbk
+from .lifx_protocol import (
+    BROADCAST_ADDRESS,
+    HSBK,
+    LIFX_PORT,
+    LifxClient,
+    LifxDevice,
+    MessageType,
+    set_color_payload,
+    set_power_payload,
+    set_waveform_optional_payload,
+)
+
+log = logging.getLogger(__name__)
+
+
+# Countdown glitch intensity is quantized so the effect is only replaced
+# (and device-side waveforms re-sent) when the level visibly changes. A
+# waveform's period cannot ramp, so a countdown still costs GLITCH_LEVELS + 1
+# waveforms per bulb: about 2.6x fewer packets than streaming over a 3 s
+# countdown and 7x over 10 s (see benchmark.py), not one per countdown.
+GLITCH_LEVELS = 4
+
+
+@dataclass
+class DeviceState:
+    """Last known power and colour of a device."""
+    power: bool = False
+    color: HSBK = (0, 0, 0, 3500)
+    updated_at: float = 0.0
+    confirmed_at: float = 0.0
+
+
+@dataclass
+class FlashRecord:
+    """Timing of one synchronized flash."""
+    timestamp: float
+    devices: int
+    packets: int
+    skew_us: float
+    broadcast: bool
 
 
 class LightController:
-    """Controls LIFX Light Bars over WiFi/LAN."""
+    """Controls LIFX Light Bars over WiFi/LAN.
+
+    Several controllers can share one client, command queue and health
+    tracker, each driving its own subset of the bulbs with its own effects.
+    """
+
+    def __init__(
+        self,
+        client: Optional[LifxClient] = None,
+        frame_rate: float = 20.0,
+        seed: Optional[int] = None,
+        broadcast_flash: bool = False,
+        max_rate: float = 15.0,
+        device_waveforms: bool = True,
+        failure_threshold: int = 3,
+        max_backoff: float = 60.0,
+        commands: Optional[CommandQueue] = None,
+        health: Optional[HealthTracker] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.client = client or LifxClient()
+        self.commands = commands or CommandQueue(self.client, rate=max_rate)
+        # Unresponsive devices are skipped and only probed in the background
+        self.health = health or HealthTracker(failure_threshold, max_backoff=max_backoff)
+        self.devices: List[LifxDevice] = []
+        self.device_callbacks: List[Callable[[], None]] = []
+        self._layout: Optional[ZoneLayout] = None
+        # Effects that compile to waveforms run on the bulbs instead of being streamed
+        self.engine = EffectEngine(
+            self.push_frame,
+            lambda: self.layout,
+            fps=frame_rate,
+            seed=seed,
+            clock=clock,
+            push_waveforms=self.push_waveforms if device_waveforms else None,
+            sleep=sleep,
+        )
+
+        # In-memory mirror of device state, updated from the commands we send
+        # and reconciled against the bulbs by a slow background poll
+        self.states: Dict[str, DeviceState] = {}
+        self._status_version = 0
+        self._pending_frame: Optional[np.ndarray] = None
+        self._status_cache: Optional[dict] = None
+        self._status_cache_version = -1
+
+        self.cache: Optional[DiscoveryCache] = None
+        self.time_to_first_light: Optional[float] = None
+
+        # Broadcasting reaches every bulb on the LAN, not just ours
+        self.broadcast_flash = broadcast_flash
+        self.flash_history: deque = deque(maxlen=50)
+        self._glitch_level: Optional[float] = None
+
+    async def connect(
+        self,
+        cache: Optional[DiscoveryCache] = None,
+        known_ips: Sequence[str] = (),
+        timeout: float = 1.0,
+        known: Sequence[LifxDevice] = (),
+        verify_timeout: float = 0.25,
+    ) -> int:
+        """Connect to known bulbs by unicast and switch them on.
 
-    def __init__(self):
-        self.lifx = LifxLAN()
-        self.devices: List[Light] = []
-        self.is_running = False
-        self.current_task: Optional[asyncio.Task] = None
+        Cached and ``known`` devices are verified and configured IPs probed,
+        all in parallel, and each bulb is switched on as soon as it answers.
+        Cached bulbs get one short try (``verify_timeout``) so a dead entry
+        does not hold up the rest; ``run_rediscovery`` picks it up if it
+        comes back. Labels and zone counts of probed bulbs are read after
+        first light. A full broadcast discovery only runs when nothing is
+        known yet.
+        """
+        started = time.monotonic()
+        self.cache = cache
+        await self.client.open()
 
-    def discover_devices(self, timeout: int = 5) -> int:
+        cached = list(known) + (cache.load() if cache else [])
+        cached_ips = {device.ip for device in cached}
+        probe_ips = [ip for ip in known_ips if ip not in cached_ips]
+
+        def switch_on(device: LifxDevice):
+            self.commands.submit_urgent(device, MessageType.LIGHT_SET_POWER, set_power_payload(True))
+            if self.time_to_first_light is None:
+                self.time_to_first_light = time.monotonic() - started
+
+        async def verify(device: LifxDevice) -> Optional[LifxDevice]:
+            if await self._verify(device, verify_timeout, retries=0):
+                switch_on(device)
+                return device
+            return None
+
+        async def probe(ip: str) -> Optional[LifxDevice]:
+            device = await self.client.probe(ip)
+            if device:
+                switch_on(device)
+            return device
+
+        self.time_to_first_light = None
+        verified, probed = await asyncio.gather(
+            asyncio.gather(*(verify(device) for device in cached)),
+            asyncio.gather(*(probe(ip) for ip in probe_ips)),
+        )
+        devices = [device for device in verified if device]
+        macs = {device.mac for device in devices}
+        new = [device for device in probed if device and device.mac not in macs]
+
+        self.devices = devices + new
+        self._status_version += 1
+
+        if self.devices:
+            log.info("Connected to %d known LIFX device(s)", len(self.devices))
+            self._record_power(True)
+            await asyncio.gather(*(self._describe(device) for device in new))
+        else:
+            await self.discover_devices(timeout)
+            self.initialize()
+            if self.devices:
+                self.time_to_first_light = time.monotonic() - started
+
+        if self.time_to_first_light is not None:
+            log.info("Time to first light: %.0f ms", self.time_to_first_light * 1000)
+        self._save_cache()
+        return len(self.devices)
+
+    async def discover_devices(self, timeout: float = 1.0) -> int:
         """Discover LIFX devices on network."""
-        print("Discovering LIFX devices...")
-        self.devices = self.lifx.get_lights()
-        print(f"Found {len(self.devices)} LIFX device(s)")
-        for device in self.devices:
-            print(f"  - {device.get_label()}")
+        log.info("Discovering LIFX devices...")
+        await self.client.open()
+        self.devices = await self.client.discover(timeout=timeout)
+
+        # Labels and zone counts for every device, queried concurrently
+        await asyncio.gather(*(self._describe(device) for device in self.devices))
+        self._status_version += 1
+
+        log.info(
+            "Found %d LIFX device(s)", len(self.devices),
+            extra={"fields": {"devices": {device.label: device.zone_count for device in self.devices}}},
+        )
         return len(self.devices)
 
+    async def rediscover(self, timeout: float = 1.0):
+        """Broadcast discovery in the background, adding and removing devices.
+
+        Returns ``(added, removed)`` device counts.
+        """
+        found = await self.client.discover(timeout=timeout)
+        known = {device.mac: device for device in self.devices}
+
+        added = []
+        for device in found:
+            if device.mac in known:
+                # DHCP may have moved a known bulb
+                known[device.mac].ip = device.ip
+                known[device.mac].port = device.port
+            else:
+                added.append(device)
+
+        # Broadcast replies get lost; only drop devices that also fail a direct check
+        found_macs = {device.mac for device in found}
+        missing = [device for device in self.devices if device.mac not in found_macs]
+        alive = await asyncio.gather(*(self._verify(device) for device in missing))
+        removed = [device for device, ok in zip(missing, alive) if not ok]
+
+        await asyncio.gather(*(self._describe(device) for device in added))
+
+        if added or removed:
+            self.devices = [d for d in self.devices if d not in removed] + added
+            self._status_version += 1
+            self.commands.forget(removed)
+            for device in added:
+                self.commands.submit_urgent(
+                    device, MessageType.LIGHT_SET_POWER, set_power_payload(True)
+                )
+            if added:
+                self.engine.resync(added)
+            log.info("LIFX rediscovery: +%d -%d device(s)", len(added), len(removed))
+            self._notify_devices_changed()
+
+        self._save_cache()
+        return len(added), len(removed)
+
+    def register_devices_callback(self, callback: Callable[[], None]):
+        """Register callback for devices added or removed by rediscovery."""
+        self.device_callbacks.append(callback)
+
+    def _notify_devices_changed(self):
+        for callback in self.device_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.error("Error in LIFX devices callback: %s", e)
+
+    def set_devices(self, devices: Sequence[LifxDevice]):
+        """Drive ``devices`` from now on, e.g. one box's share of the bulbs."""
+        previous = {device.mac for device in self.devices}
+        self.devices = list(devices)
+        self._status_version += 1
+        # Bulbs that just joined need the whole current frame or waveform
+        joined = [device for device in self.devices if device.mac not in previous]
+        if joined:
+            self.engine.resync(joined)
+
+    async def run_rediscovery(self, interval: float = 300.0, timeout: float = 1.0):
+        """Rediscover devices now and then every ``interval`` seconds."""
+        while True:
+            try:
+                await self.rediscover(timeout)
+            except Exception as e:
+                log.error("Error rediscovering LIFX devices: %s", e)
+            await asyncio.sleep(interval)
+
+    async def _verify(
+        self,
+        device: LifxDevice,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> Optional[LifxDevice]:
+        """Check a known device answers at its cached address."""
+        state = await self._query(device, timeout, retries)
+        if state is None:
+            return None
+        self._record_state(device, state)
+        return device
+
+    async def _query(
+        self,
+        device: LifxDevice,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> Optional[dict]:
+        """Fetch a device's state, reporting the outcome to its health tracker."""
+        started = time.monotonic()
+        try:
+            state = await self.client.get_light_state(device, timeout, retries)
+        except Exception as e:
+            # A timeout, or a malformed reply or socket error: a failure either way,
+            # which also ends a half-open probe
+            if not isinstance(e, asyncio.TimeoutError):
+                log.warning("Error querying LIFX device %s: %r", device.label or device.mac, e)
+            if self.health.record_failure(device.mac):
+                # Drop queued commands so they are not replayed stale on recovery
+                self.commands.forget([device])
+                log.warning("LIFX device %s is not responding", device.label or device.mac)
+            return None
+
+        if self.health.record_success(device.mac, time.monotonic() - started):
+            log.info("LIFX device %s is back", device.label or device.mac)
+            if device in self.devices:
+                self.commands.submit_urgent(
+                    device, MessageType.LIGHT_SET_POWER, set_power_payload(True)
+                )
+                self.engine.resync([device])
+        return state
+
+    def _save_cache(self):
+        if not self.cache:
+            return
+        try:
+            self.cache.save(self.devices)
+        except OSError as e:
+            log.warning("Could not save LIFX cache: %s", e)
+
+    async def _describe(self, device: LifxDevice):
+        """Fill in label and zone count for a discovered device."""
+        state = await self._query(device)
+        if state is None:
+            log.warning("No response from LIFX device %s", device.mac)
+            return
+        device.label = state["label"]
+        self._record_state(device, state)
+        device.zone_count = await self.client.get_zone_count(device)
+
     def initialize(self):
         """Initialize connection to all LIFX devices."""
         if not self.devices:
-            print("No LIFX devices found. Running in simulation mode.")
+            log.warning("No LIFX devices found. Running in simulation mode.")
             return
 
-        for device in self.devices:
-            device.set_power(True)
+        self._set_power_all(True)
 
-    async def set_ambient_pattern(self):
-        """Set calming, Halloween-themed ambient pattern."""
-        if not self.devices:
-            return
+    def _set_power_all(self, on: bool):
+        """Switch every device on or off in one tick."""
+        payload = set_power_payload(on)
+        for device in self.available_devices:
+            self.commands.submit_urgent(device, MessageType.LIGHT_SET_POWER, payload)
+        self._record_power(on)
 
-        # Turn on all lights first
-        for device in self.devices:
-            device.set_power(True)
+    @property
+    def status_version(self) -> int:
+        """Changes whenever the status would.
 
-        # Halloween colors: Orange, Purple, Green
-        colors = [
-            (30, 65535, 32768, 3500),   # Orange
-            (270, 65535, 32768, 3500),  # Purple
-            (120, 65535, 32768, 3500),  # Green
-        ]
+        Includes breaker trips and recoveries seen by any controller sharing
+        the health tracker, e.g. the box manager's during rediscovery.
+        """
+        return self._status_version + self.health.changes
 
-        self.is_running = True
+    @property
+    def available_devices(self) -> List[LifxDevice]:
+        """Devices whose circuit breaker is closed."""
+        return [device for device in self.devices if self.health.is_available(device.mac)]
 
-        while self.is_running:
-            for device in self.devices:
-                color = random.choice(colors)
-                device.set_color(color, duration=2000)
+    @property
+    def layout(self) -> ZoneLayout:
+        """Zone layout of the current devices, rebuilt when they change."""
+        zone_counts = [device.zone_count for device in self.devices]
+        if self._layout is None or list(self._layout.zone_counts) != zone_counts:
+            self._layout = ZoneLayout(zone_counts)
+        return self._layout
 
-            await asyncio.sleep(3)
+    def push_frame(self, frame: np.ndarray, duration_ms: int = 0) -> int:
+        """Queue a per-zone frame for every device; returns packets queued.
 
-    async def start_glitch_effect(self, intensity: float = 0.0):
-        """Apply glitching effect with increasing intensity."""
-        if not self.devices:
-            return
+        Devices still waiting on an earlier frame have it replaced rather
+        than sending both.
+        """
+        messages = frame_messages(self.devices, frame, duration_ms)
+        commands: Dict[str, list] = {}
+        for device, message_type, payload in messages:
+            commands.setdefault(device.mac, []).append((message_type, payload))
+        for device in self.available_devices:
+            if device.mac in commands:
+                self.commands.submit_color(device, commands[device.mac])
+        self._record_frame(frame)
+        return len(messages)
 
-        # Increase glitch frequency with intensity
-        delay = max(0.05, 0.5 - (intensity * 0.4))
+    def push_waveforms(
+        self,
+        waveforms: Sequence[DeviceWaveform],
+        devices: Optional[Sequence[LifxDevice]] = None,
+    ) -> int:
+        """Start one device-side waveform per device; returns packets queued.
 
-        for device in self.devices:
-            # Random brightness flicker
-            brightness = int(32768 * (1 - intensity * 0.5 + random.random() * intensity))
+        ``devices`` limits the push to some of the bulbs, e.g. one that just
+        came back. Unavailable bulbs are skipped and not counted.
+        """
+        only = None if devices is None else {device.mac for device in devices}
+        colors = hsbk(*np.array([waveform.color for waveform in waveforms]).T)
+        queued = 0
+        for device, waveform, color in zip(self.devices, waveforms, colors):
+            if only is not None and device.mac not in only:
+                continue
+            if not self.health.is_available(device.mac):
+                continue
+            payload = set_waveform_optional_payload(
+                tuple(int(value) for value in color),
+                waveform.waveform,
+                int(waveform.period * 1000),
+                waveform.cycles,
+                waveform.skew_ratio,
+                waveform.transient,
+                waveform.set_hue,
+                waveform.set_saturation,
+                waveform.set_brightness,
+                waveform.set_kelvin,
+            )
+            self.commands.submit_color(
+                device, [(MessageType.LIGHT_SET_WAVEFORM_OPTIONAL, payload)]
+            )
+            queued += 1
+        return queued
 
-            # Random color shift
-            hue = random.randint(0, 65535)
-            saturation = int(65535 * (0.8 + random.random() * 0.2))
+    async def set_ambient_pattern(self, base: Optional[Effect] = None):
+        """Run the effect engine with the calm, Halloween-themed ambient pattern.
 
-            device.set_color((hue, saturation, brightness, 3500), duration=50)
+        ``base`` replaces the default ambient effect (e.g. a music-reactive one).
+        """
+        # Turn on all lights first
+        if self.devices:
+            self._set_power_all(True)
 
-        await asyncio.sleep(delay)
+        self.engine.set_base(base or ambient())
+        await self.engine.run()
 
-    def trigger_flash(self, brightness_multiplier: float = 1.0):
-        """Execute bright flash effect."""
-        if not self.devices:
+    def start_glitch_effect(self, intensity: float = 0.0):
+        """Apply glitching effect with increasing intensity."""
+        level = round(min(1.0, max(0.0, intensity)) * GLITCH_LEVELS) / GLITCH_LEVELS
+        current = self.engine.effect
+        if current is not None and current.name == "glitch" and level == self._glitch_level:
             return
+        self._glitch_level = level
+        self.engine.play(glitch(level))
 
-        brightness = int(65535 * brightness_multiplier)
+    def trigger_flash(self, brightness_multiplier: float = 1.0) -> Optional[FlashRecord]:
+        """Flash every bulb at once, held until the lights are reset.
 
-        for device in self.devices:
-            # Bright white flash
-            device.set_color((0, 0, brightness, 9000), duration=100)
+        Packets for all bulbs are built before the first one is sent and then
+        go out back to back (or as one broadcast), so the porch flashes
+        together. The inter-bulb skew of the burst is recorded.
+        """
+        effect = flash(brightness_multiplier)
+        if not self.devices:
+            self.engine.play(effect)
+            return None
+
+        color = (0, 0, int(65535 * min(1.0, brightness_multiplier)), 9000)
+        payload = set_color_payload(color, effect.transition_ms)
+
+        # Reserve rate-limit tokens first; a bulb already over its limit gets
+        # the flash through its queue instead of in the burst
+        available = self.available_devices
+        ready = [
+            device for device in available
+            if self.commands.take_urgent(device, replaces_color=True)
+        ]
+        if self.broadcast_flash:
+            packets = [(
+                self.client.pack_broadcast(MessageType.LIGHT_SET_COLOR, payload),
+                (BROADCAST_ADDRESS, LIFX_PORT),
+            )]
+        else:
+            packets = [
+                (
+                    self.client.pack_for(device, MessageType.LIGHT_SET_COLOR, payload)[0],
+                    device.address,
+                )
+                for device in ready
+            ]
+            for device in available:
+                if device not in ready:
+                    self.commands.submit_urgent(device, MessageType.LIGHT_SET_COLOR, payload)
 
-    async def reset_to_ambient(self, duration: float = 5.0):
-        """Gradually return to ambient pattern."""
-        # Transition back to ambient over duration
-        steps = int(duration * 10)
-        step_delay = duration / steps
+        skew = self.client.send_burst(packets)
+        self.engine.play(effect, rendered=True)
+        self._record_frame(self.layout.solid(color))
 
-        for i in range(steps):
-            progress = i / steps
-            await self.start_glitch_effect(intensity=1.0 - progress)
-            await asyncio.sleep(step_delay)
+        record = FlashRecord(
+            timestamp=time.time(),
+            devices=len(available),
+            packets=len(packets),
+            skew_us=round(skew * 1e6, 1),
+            broadcast=self.broadcast_flash,
+        )
+        self.flash_history.append(record)
+        return record
 
-        # Resume ambient pattern
-        if self.current_task:
-            self.current_task.cancel()
-        self.current_task = asyncio.create_task(self.set_ambient_pattern())
+    def reset_to_ambient(self, duration: float = 5.0):
+        """Fade from full glitch back to the ambient pattern over ``duration``."""
+        decay = glitch(lambda t: max(0.0, 1.0 - t / duration) if duration > 0 else 0.0)
+        self.engine.play(fade(decay, self.engine.base or ambient(), duration), duration)
 
     def shutdown(self):
         """Turn off all lights."""
-        self.is_running = False
-        if self.current_task:
-            self.current_task.cancel()
+        self.engine.stop()
+        # Only our own devices: the queue may be shared with other controllers
+        self.commands.forget(self.devices)
+
+        if self.devices and self.client.is_open:
+            self._set_power_all(False)
+
+    # State mirror
+
+    def _state_for(self, device: LifxDevice) -> DeviceState:
+        state = self.states.get(device.mac)
+        if state is None:
+            state = self.states[device.mac] = DeviceState()
+        return state
 
+    def _record_power(self, on: bool):
+        """Mirror a power command sent to every device."""
+        self._apply_pending_frame()
+        now = time.time()
         for device in self.devices:
-            device.set_power(False)
+            state = self._state_for(device)
+            state.power = on
+            state.updated_at = now
+        self._status_version += 1
+
+    def _record_frame(self, frame: np.ndarray):
+        """Mirror a frame sent to every device.
+
+        Only the frame reference is kept here; it is folded into the
+        per-device states when the status is next read.
+        """
+        self._pending_frame = frame
+        self._status_version += 1
+
+    def _apply_pending_frame(self):
+        frame = self._pending_frame
+        if frame is None:
+            return
+        self._pending_frame = None
+
+        now = time.time()
+        for index, device in enumerate(self.devices[:len(frame)]):
+            state = self._state_for(device)
+            state.color = tuple(int(value) for value in frame[index, 0])
+            state.updated_at = now
+
+    def _record_state(self, device: LifxDevice, reported: dict) -> bool:
+        """Reconcile the mirror with a LightState reply; returns whether it changed."""
+        state = self._state_for(device)
+        state.confirmed_at = time.time()
+
+        if (state.power, state.color) == (reported["power"], reported["color"]):
+            return False
+
+        state.power = reported["power"]
+        state.color = reported["color"]
+        state.updated_at = state.confirmed_at
+        self._status_version += 1
+        return True
+
+    async def reconcile(self) -> int:
+        """Poll every healthy device once and correct the mirror; returns devices changed.
+
+        Devices with an open breaker are left to ``run_health_probes``.
+        """
+        devices = self.available_devices
+        results = await asyncio.gather(*(self._query(device) for device in devices))
+        self._apply_pending_frame()
+
+        changed = 0
+        for device, reported in zip(devices, results):
+            if reported is None:
+                continue
+
+            if not device.label:
+                device.label = reported["label"]
+            changed += self._record_state(device, reported)
+
+        return changed
+
+    async def run_reconciliation(self, interval: float = 30.0):
+        """Reconcile the state mirror with the bulbs every ``interval`` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            if not self.devices:
+                continue
+            try:
+                await self.reconcile()
+            except Exception as e:
+                log.error("Error reconciling light state: %s", e)
+
+    async def probe_unhealthy(self, timeout: float = 0.25) -> int:
+        """Probe every device whose breaker is due; returns devices recovered."""
+        due = [device for device in self.devices if self.health.due_for_probe(device.mac)]
+        results = await asyncio.gather(
+            *(self._query(device, timeout=timeout, retries=0) for device in due)
+        )
+        return sum(1 for state in results if state is not None)
+
+    async def run_health_probes(self, interval: float = 1.0):
+        """Probe unresponsive devices with backoff, never blocking the others."""
+        while True:
+            await asyncio.sleep(min(interval, self.health.next_probe_in()))
+            try:
+                await self.probe_unhealthy()
+            except Exception as e:
+                log.error("Error probing LIFX devices: %s", e)
+
+    def get_stats(self) -> dict:
+        """Frame scheduling, outbound queue and device health statistics."""
+        return {
+            "engine": self.engine.get_stats(),
+            "commands": self.commands.get_stats(),
+            "health": {
+                **self.health.get_stats(),
+                "devices": {
+                    device.mac: self.health.get(device.mac).to_dict()
+                    for device in self.devices
+                },
+            },
+        }
 
     def get_status(self) -> dict:
-        """Get current light status."""
+        """Get current light status from the state mirror."""
+        if self._status_cache_version == self.status_version:
+            return self._status_cache
+
+        self._apply_pending_frame()
+
         if not self.devices:
-            return {
+            status = {
                 "connected": False,
                 "devices": [],
             }
-
-        device_status = []
-        for device in self.devices:
-            try:
-                color = device.get_color()
-                power = device.get_power()
-
+        else:
+            device_status = []
+            for device in self.devices:
+                state = self._state_for(device)
+                hue, saturation, brightness, _kelvin = state.color
                 device_status.append({
-                    "id": str(device.get_mac_addr()),
-                    "name": device.get_label(),
-                    "power": power > 0,
-                    "brightness": color[2] / 65535,
+                    "id": device.mac,
+                    "name": device.label,
+                    "power": state.power,
+                    "available": self.health.is_available(device.mac),
+                    "brightness": brightness / 65535,
                     "color": {
-                        "hue": color[0],
-                        "saturation": color[1],
+                        "hue": hue,
+                        "saturation": saturation,
                     },
                 })
-            except Exception as e:
-                print(f"Error getting device status: {e}")
 
-        return {
-            "connected": True,
-            "device_count": len(self.devices),
-            "devices": device_status,
-        }
+            status = {
+                "connected": True,
+                "device_count": len(self.devices),
+                "devices": device_status,
+            }
+            if self.flash_history:
+                status["last_flash"] = asdict(self.flash_history[-1])
+
+        self._status_cache = status
+        self._status_cache_version = self.status_version
+        return status
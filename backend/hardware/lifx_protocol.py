@@ -0,0 +1,632 @@
+"""Asyncio implementation of the LIFX LAN protocol.
+
+Only the messages Scare Box needs are implemented: discovery, power, colour,
+light state, waveforms and extended multizone. All traffic goes through a
+single shared UDP socket, so sending to every bulb is a handful of
+non-blocking ``sendto`` calls in one event-loop tick.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+LIFX_PORT = 56700
+BROADCAST_ADDRESS = "255.255.255.255"
+
+HEADER_FORMAT = "<HHI8s6sBBQHH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+PROTOCOL_NUMBER = 1024
+ADDRESSABLE_BIT = 1 << 12
+TAGGED_BIT = 1 << 13
+RES_REQUIRED_BIT = 1 << 0
+ACK_REQUIRED_BIT = 1 << 1
+
+MAX_EXTENDED_ZONES = 82
+
+HSBK = Tuple[int, int, int, int]
+
+
+class MessageType(IntEnum):
+    """LIFX LAN message types used by Scare Box."""
+    GET_SERVICE = 2
+    STATE_SERVICE = 3
+    GET_POWER = 20
+    SET_POWER = 21
+    STATE_POWER = 22
+    GET_LABEL = 23
+    STATE_LABEL = 25
+    ACKNOWLEDGEMENT = 45
+    LIGHT_GET = 101
+    LIGHT_SET_COLOR = 102
+    LIGHT_SET_WAVEFORM = 103
+    LIGHT_STATE = 107
+    LIGHT_SET_POWER = 117
+    LIGHT_STATE_POWER = 118
+    LIGHT_SET_WAVEFORM_OPTIONAL = 119
+    SET_EXTENDED_COLOR_ZONES = 510
+    GET_EXTENDED_COLOR_ZONES = 511
+    STATE_EXTENDED_COLOR_ZONES = 512
+
+
+class Waveform(IntEnum):
+    """Device-side waveforms for SetWaveform messages."""
+    SAW = 0
+    SINE = 1
+    HALF_SINE = 2
+    TRIANGLE = 3
+    PULSE = 4
+
+
+@dataclass
+class LifxDevice:
+    """A LIFX device reachable on the LAN."""
+    mac: str
+    ip: str
+    port: int = LIFX_PORT
+    label: str = ""
+    zone_count: int = 1
+
+    @property
+    def target(self) -> bytes:
+        """8-byte frame address target for this device."""
+        return mac_to_target(self.mac)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """UDP address of this device."""
+        return (self.ip, self.port)
+
+    @property
+    def is_multizone(self) -> bool:
+        """Whether the device has more than one addressable zone."""
+        return self.zone_count > 1
+
+
+@dataclass
+class Header:
+    """Decoded LIFX packet header."""
+    size: int
+    tagged: bool
+    source: int
+    target: bytes
+    ack_required: bool
+    res_required: bool
+    sequence: int
+    type: int
+
+    @property
+    def mac(self) -> str:
+        """Target MAC address as colon-separated hex."""
+        return target_to_mac(self.target)
+
+
+@dataclass
+class Message:
+    """A received LIFX message."""
+    header: Header
+    payload: bytes
+    address: Tuple[str, int] = field(default=("", 0))
+
+
+def mac_to_target(mac: str) -> bytes:
+    """Convert ``d0:73:d5:12:34:56`` to an 8-byte frame target."""
+    raw = bytes.fromhex(mac.replace(":", ""))
+    return raw.ljust(8, b"\x00")
+
+
+def target_to_mac(target: bytes) -> str:
+    """Convert an 8-byte frame target to a colon-separated MAC."""
+    return ":".join(f"{b:02x}" for b in target[:6])
+
+
+def pack_message(
+    message_type: int,
+    payload: bytes = b"",
+    target: bytes = b"\x00" * 8,
+    source: int = 0,
+    sequence: int = 0,
+    tagged: bool = False,
+    ack_required: bool = False,
+    res_required: bool = False,
+) -> bytes:
+    """Build a complete LIFX packet."""
+    flags = PROTOCOL_NUMBER | ADDRESSABLE_BIT
+    if tagged:
+        flags |= TAGGED_BIT
+
+    response_flags = 0
+    if res_required:
+        response_flags |= RES_REQUIRED_BIT
+    if ack_required:
+        response_flags |= ACK_REQUIRED_BIT
+
+    header = struct.pack(
+        HEADER_FORMAT,
+        HEADER_SIZE + len(payload),
+        flags,
+        source,
+        target,
+        b"\x00" * 6,
+        response_flags,
+        sequence & 0xFF,
+        0,
+        message_type,
+        0,
+    )
+    return header + payload
+
+
+def unpack_header(data: bytes) -> Header:
+    """Decode the header of a LIFX packet."""
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Packet too short: {len(data)} bytes")
+
+    (
+        size,
+        flags,
+        source,
+        target,
+        _reserved,
+        response_flags,
+        sequence,
+        _reserved2,
+        message_type,
+        _reserved3,
+    ) = struct.unpack_from(HEADER_FORMAT, data)
+
+    return Header(
+        size=size,
+        tagged=bool(flags & TAGGED_BIT),
+        source=source,
+        target=target,
+        ack_required=bool(response_flags & ACK_REQUIRED_BIT),
+        res_required=bool(response_flags & RES_REQUIRED_BIT),
+        sequence=sequence,
+        type=message_type,
+    )
+
+
+# Payload builders
+
+def set_power_payload(on: bool, duration_ms: int = 0) -> bytes:
+    """Payload for LightSetPower."""
+    return struct.pack("<HI", 65535 if on else 0, duration_ms)
+
+
+def set_color_payload(color: HSBK, duration_ms: int = 0) -> bytes:
+    """Payload for LightSetColor."""
+    return struct.pack("<B4HI", 0, *color, duration_ms)
+
+
+def set_waveform_payload(
+    color: HSBK,
+    waveform: Waveform,
+    period_ms: int,
+    cycles: float,
+    skew_ratio: float = 0.5,
+    transient: bool = True,
+) -> bytes:
+    """Payload for LightSetWaveform.
+
+    ``skew_ratio`` is given in [0, 1] and mapped to the signed 16-bit range
+    the protocol expects.
+    """
+    skew = int(round(skew_ratio * 65535)) - 32768
+    return struct.pack(
+        "<BB4HIfhB",
+        0,
+        int(transient),
+        *color,
+        period_ms,
+        cycles,
+        skew,
+        int(waveform),
+    )
+
+
+def set_waveform_optional_payload(
+    color: HSBK,
+    waveform: Waveform,
+    period_ms: int,
+    cycles: float,
+    skew_ratio: float = 0.5,
+    transient: bool = True,
+    set_hue: bool = True,
+    set_saturation: bool = True,
+    set_brightness: bool = True,
+    set_kelvin: bool = True,
+) -> bytes:
+    """Payload for LightSetWaveformOptional."""
+    return set_waveform_payload(
+        color, waveform, period_ms, cycles, skew_ratio, transient
+    ) + struct.pack(
+        "<4B",
+        int(set_hue),
+        int(set_saturation),
+        int(set_brightness),
+        int(set_kelvin),
+    )
+
+
+def set_extended_color_zones_payload(
+    colors: Iterable[HSBK],
+    duration_ms: int = 0,
+    zone_index: int = 0,
+    apply: int = 1,
+) -> bytes:
+    """Payload for SetExtendedColorZones (up to 82 zones per message)."""
+    colors = list(colors)[:MAX_EXTENDED_ZONES]
+    count = len(colors)
+    flat = [value for color in colors for value in color]
+    flat.extend([0] * (4 * (MAX_EXTENDED_ZONES - count)))
+    return struct.pack(
+        f"<IBHB{4 * MAX_EXTENDED_ZONES}H",
+        duration_ms,
+        apply,
+        zone_index,
+        count,
+        *flat,
+    )
+
+
+# Payload decoders
+
+def decode_state_service(payload: bytes) -> Tuple[int, int]:
+    """Decode StateService into ``(service, port)``."""
+    return struct.unpack_from("<BI", payload)
+
+
+def decode_state_power(payload: bytes) -> bool:
+    """Decode StatePower / LightStatePower into an on/off flag."""
+    return struct.unpack_from("<H", payload)[0] > 0
+
+
+def decode_state_label(payload: bytes) -> str:
+    """Decode StateLabel."""
+    return payload[:32].split(b"\x00", 1)[0].decode("utf-8", errors="replace")
+
+
+def decode_light_state(payload: bytes) -> dict:
+    """Decode LightState into colour, power and label."""
+    hue, saturation, brightness, kelvin, _reserved, power, label, _ = (
+        struct.unpack_from("<4HhH32sQ", payload)
+    )
+    return {
+        "color": (hue, saturation, brightness, kelvin),
+        "power": power > 0,
+        "label": label.split(b"\x00", 1)[0].decode("utf-8", errors="replace"),
+    }
+
+
+def decode_state_extended_color_zones(payload: bytes) -> dict:
+    """Decode StateExtendedColorZones."""
+    zones_count, zone_index, colors_count = struct.unpack_from("<HHB", payload)
+    values = struct.unpack_from(f"<{4 * colors_count}H", payload, 5)
+    colors = [tuple(values[i:i + 4]) for i in range(0, len(values), 4)]
+    return {
+        "zones_count": zones_count,
+        "zone_index": zone_index,
+        "colors": colors,
+    }
+
+
+class LifxClient(asyncio.DatagramProtocol):
+    """Shared-socket asyncio client for the LIFX LAN protocol.
+
+    ``send`` and ``send_many`` are synchronous and never wait on the network;
+    only ``request`` and ``send_acked`` await replies from the bulb.
+    """
+
+    def __init__(self, timeout: float = 0.5, retries: int = 2):
+        self.timeout = timeout
+        self.retries = retries
+        self.source = int.from_bytes(os.urandom(4), "little") or 1
+
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.sequences: Dict[str, int] = {}
+        self.pending: Dict[Tuple[str, int], asyncio.Future] = {}
+        self.discovered: Dict[str, LifxDevice] = {}
+        self.probes: Dict[Tuple[str, int], asyncio.Future] = {}
+
+        self.packets_sent = 0
+        self.packets_received = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the UDP socket is open."""
+        return self.transport is not None
+
+    async def open(self, local_addr: Tuple[str, int] = ("0.0.0.0", 0)):
+        """Open the shared UDP socket."""
+        if self.transport:
+            return
+
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setblocking(False)
+        sock.bind(local_addr)
+        await loop.create_datagram_endpoint(lambda: self, sock=sock)
+
+    def close(self):
+        """Close the socket and fail any outstanding requests."""
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+
+        for future in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+
+    # asyncio.DatagramProtocol interface
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]):
+        try:
+            header = unpack_header(data)
+        except ValueError:
+            return
+
+        if header.source != self.source:
+            return
+
+        self.packets_received += 1
+        message = Message(header=header, payload=data[HEADER_SIZE:], address=addr)
+
+        if header.type == MessageType.STATE_SERVICE:
+            self._on_state_service(message)
+
+        future = self.pending.get((header.mac, header.sequence))
+        if future and not future.done():
+            future.set_result(message)
+
+    def error_received(self, exc):
+        log.warning("LIFX socket error: %s", exc)
+
+    # Sending
+
+    def next_sequence(self, mac: str) -> int:
+        """Advance and return the sequence number for a device."""
+        sequence = (self.sequences.get(mac, -1) + 1) & 0xFF
+        self.sequences[mac] = sequence
+        return sequence
+
+    def pack_for(
+        self,
+        device: LifxDevice,
+        message_type: int,
+        payload: bytes = b"",
+        ack_required: bool = False,
+        res_required: bool = False,
+    ) -> Tuple[bytes, int]:
+        """Build a packet addressed to ``device``; returns ``(packet, sequence)``."""
+        sequence = self.next_sequence(device.mac)
+        packet = pack_message(
+            message_type,
+            payload,
+            target=device.target,
+            source=self.source,
+            sequence=sequence,
+            ack_required=ack_required,
+            res_required=res_required,
+        )
+        return packet, sequence
+
+    def send_packet(self, packet: bytes, address: Tuple[str, int]):
+        """Send a prebuilt packet without waiting."""
+        if not self.transport:
+            raise RuntimeError("LIFX client is not open")
+        self.transport.sendto(packet, address)
+        self.packets_sent += 1
+
+    def send_burst(self, packets: List[Tuple[bytes, Tuple[str, int]]]) -> float:
+        """Send prebuilt packets back to back.
+
+        Returns the seconds between the first and last ``sendto``, i.e. the
+        host-side skew across the burst.
+        """
+        if not self.transport:
+            raise RuntimeError("LIFX client is not open")
+
+        sendto = self.transport.sendto
+        clock = time.perf_counter
+        first = last = clock()
+        for packet, address in packets:
+            sendto(packet, address)
+            last = clock()
+
+        self.packets_sent += len(packets)
+        return last - first
+
+    def pack_broadcast(self, message_type: int, payload: bytes = b"") -> bytes:
+        """Build a tagged packet that every bulb on the LAN will act on."""
+        return pack_message(message_type, payload, source=self.source, tagged=True)
+
+    def send(
+        self,
+        device: LifxDevice,
+        message_type: int,
+        payload: bytes = b"",
+        ack_required: bool = False,
+    ) -> int:
+        """Fire-and-forget a message to one device; returns its sequence."""
+        packet, sequence = self.pack_for(
+            device, message_type, payload, ack_required=ack_required
+        )
+        self.send_packet(packet, device.address)
+        return sequence
+
+    def send_many(
+        self,
+        devices: Iterable[LifxDevice],
+        message_type: int,
+        payload: bytes = b"",
+    ) -> int:
+        """Send the same message to every device in one tick."""
+        count = 0
+        for device in devices:
+            self.send(device, message_type, payload)
+            count += 1
+        return count
+
+    async def request(
+        self,
+        device: LifxDevice,
+        message_type: int,
+        payload: bytes = b"",
+        ack_only: bool = False,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> Message:
+        """Send a message and wait for its response (or acknowledgement).
+
+        Raises ``asyncio.TimeoutError`` once all retries are exhausted.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(retries + 1):
+            packet, sequence = self.pack_for(
+                device,
+                message_type,
+                payload,
+                ack_required=ack_only,
+                res_required=not ack_only,
+            )
+            key = (device.mac, sequence)
+            future = loop.create_future()
+            self.pending[key] = future
+
+            try:
+                self.send_packet(packet, device.address)
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                if attempt == retries:
+                    raise
+            finally:
+                self.pending.pop(key, None)
+
+    async def send_acked(
+        self,
+        device: LifxDevice,
+        message_type: int,
+        payload: bytes = b"",
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Send a message with ack_required; returns whether it was acknowledged."""
+        try:
+            await self.request(
+                device, message_type, payload, ack_only=True, timeout=timeout
+            )
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # Discovery
+
+    async def discover(
+        self,
+        timeout: float = 1.0,
+        broadcast: str = BROADCAST_ADDRESS,
+        port: int = LIFX_PORT,
+    ) -> List[LifxDevice]:
+        """Broadcast GetService and collect devices that answer."""
+        self.discovered = {}
+        packet = pack_message(
+            MessageType.GET_SERVICE,
+            source=self.source,
+            tagged=True,
+            res_required=True,
+        )
+        # UDP is lossy; repeat the broadcast a few times within the window
+        for _ in range(3):
+            self.send_packet(packet, (broadcast, port))
+            await asyncio.sleep(timeout / 3)
+
+        return list(self.discovered.values())
+
+    async def probe(
+        self,
+        ip: str,
+        port: int = LIFX_PORT,
+        timeout: Optional[float] = None,
+    ) -> Optional[LifxDevice]:
+        """Unicast GetService to a known address; returns the device or None."""
+        timeout = self.timeout if timeout is None else timeout
+        future = asyncio.get_running_loop().create_future()
+        self.probes[(ip, port)] = future
+        packet = pack_message(
+            MessageType.GET_SERVICE,
+            source=self.source,
+            tagged=True,
+            res_required=True,
+        )
+
+        try:
+            for _ in range(self.retries + 1):
+                self.send_packet(packet, (ip, port))
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    continue
+            return None
+        finally:
+            self.probes.pop((ip, port), None)
+
+    def _on_state_service(self, message: Message):
+        """Record a device answering discovery or a unicast probe."""
+        service, port = decode_state_service(message.payload)
+        if service != 1:  # UDP service
+            return
+
+        mac = message.header.mac
+        device = self.discovered.get(mac)
+        if device is None:
+            device = self.discovered[mac] = LifxDevice(
+                mac=mac, ip=message.address[0], port=port
+            )
+
+        probe = self.probes.get(message.address)
+        if probe and not probe.done():
+            probe.set_result(device)
+
+    async def get_light_state(
+        self,
+        device: LifxDevice,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+    ) -> dict:
+        """Fetch colour, power and label for a device in one request."""
+        message = await self.request(
+            device, MessageType.LIGHT_GET, timeout=timeout, retries=retries
+        )
+        return decode_light_state(message.payload)
+
+    async def get_zone_count(self, device: LifxDevice) -> int:
+        """Query the number of zones on a device (1 for single-zone bulbs)."""
+        try:
+            message = await self.request(
+                device, MessageType.GET_EXTENDED_COLOR_ZONES, retries=0
+            )
+        except asyncio.TimeoutError:
+            return 1
+
+        if message.header.type != MessageType.STATE_EXTENDED_COLOR_ZONES:
+            return 1
+        return max(1, decode_state_extended_color_zones(message.payload)["zones_count"])
@@ -0,0 +1,302 @@
+"""Local UDP emulator for LIFX devices.
+
+Impersonates any number of single-zone bulbs and multizone bars on
+localhost, each on its own UDP port, with configurable latency, jitter and
+packet loss. Every received packet is recorded with a monotonic timestamp so
+light effects can be benchmarked without real hardware or a network.
+"""
+
+import asyncio
+import struct
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from .lifx_protocol import (
+    HEADER_SIZE,
+    MAX_EXTENDED_ZONES,
+    LifxDevice,
+    MessageType,
+    pack_message,
+    unpack_header,
+)
+
+STATE_UNHANDLED = 223
+
+
+@dataclass
+class ReceivedMessage:
+    """A packet as seen by a simulated device."""
+    timestamp: float
+    mac: str
+    type: int
+    sequence: int
+    source: int
+    size: int
+    dropped: bool = False
+
+
+class SimulatedBulb(asyncio.DatagramProtocol):
+    """One emulated LIFX device."""
+
+    def __init__(
+        self,
+        simulator: "LifxSimulator",
+        mac: str,
+        label: str,
+        zone_count: int = 1,
+    ):
+        self.simulator = simulator
+        self.mac = mac
+        self.label = label
+        self.zone_count = zone_count
+        self.port = 0
+
+        self.online = True  # False simulates an unplugged device
+        self.power = True
+        self.zones = np.zeros((zone_count, 4), dtype=np.uint16)
+        self.zones[:, 3] = 3500
+        self.waveforms = 0
+        self.received: List[ReceivedMessage] = []
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    @property
+    def color(self):
+        """Colour of zone 0 as an HSBK tuple."""
+        return tuple(int(value) for value in self.zones[0])
+
+    @color.setter
+    def color(self, value):
+        self.zones[:] = np.asarray(value, dtype=np.uint16)
+
+    @property
+    def device(self) -> LifxDevice:
+        """How a client would address this bulb."""
+        return LifxDevice(
+            mac=self.mac,
+            ip=self.simulator.host,
+            port=self.port,
+            label=self.label,
+            zone_count=self.zone_count,
+        )
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.port = transport.get_extra_info("sockname")[1]
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            header = unpack_header(data)
+        except ValueError:
+            return
+
+        dropped = not self.online or self.simulator.should_drop()
+        message = ReceivedMessage(
+            timestamp=time.monotonic(),
+            mac=self.mac,
+            type=header.type,
+            sequence=header.sequence,
+            source=header.source,
+            size=len(data),
+            dropped=dropped,
+        )
+        self.received.append(message)
+        self.simulator.messages.append(message)
+
+        if not dropped:
+            self.handle(header, data[HEADER_SIZE:], addr)
+
+    def reply(self, header, message_type: int, payload: bytes, addr):
+        """Send a response after the simulated network latency."""
+        packet = pack_message(
+            message_type,
+            payload,
+            target=bytes.fromhex(self.mac.replace(":", "")) + b"\x00\x00",
+            source=header.source,
+            sequence=header.sequence,
+        )
+        delay = self.simulator.response_delay()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._sendto, packet, addr)
+        else:
+            self._sendto(packet, addr)
+
+    def _sendto(self, packet: bytes, addr):
+        if self.transport and not self.simulator.should_drop():
+            self.transport.sendto(packet, addr)
+
+    def handle(self, header, payload: bytes, addr):
+        """Apply a message to the simulated state and answer it."""
+        message_type = header.type
+
+        if message_type == MessageType.GET_SERVICE:
+            service = struct.pack("<BI", 1, self.port)
+            self.reply(header, MessageType.STATE_SERVICE, service, addr)
+            return
+
+        if message_type in (MessageType.LIGHT_SET_POWER, MessageType.SET_POWER):
+            self.power = struct.unpack_from("<H", payload)[0] > 0
+        elif message_type == MessageType.LIGHT_SET_COLOR:
+            self.color = struct.unpack_from("<4H", payload, 1)
+        elif message_type in (
+            MessageType.LIGHT_SET_WAVEFORM,
+            MessageType.LIGHT_SET_WAVEFORM_OPTIONAL,
+        ):
+            self.waveforms += 1
+        elif message_type == MessageType.SET_EXTENDED_COLOR_ZONES:
+            if self.zone_count > 1:
+                _duration, _apply, index, count = struct.unpack_from("<IBHB", payload)
+                values = np.frombuffer(payload, dtype="<u2", count=4 * count, offset=8)
+                end = min(self.zone_count, index + count)
+                self.zones[index:end] = values.reshape(-1, 4)[:end - index]
+
+        if header.ack_required:
+            self.reply(header, MessageType.ACKNOWLEDGEMENT, b"", addr)
+
+        if not header.res_required:
+            return
+
+        if message_type in (MessageType.LIGHT_GET, MessageType.LIGHT_SET_COLOR):
+            self.reply(header, MessageType.LIGHT_STATE, self._light_state(), addr)
+        elif message_type in (MessageType.GET_POWER, MessageType.SET_POWER):
+            self.reply(header, MessageType.STATE_POWER, self._power_level(), addr)
+        elif message_type == MessageType.LIGHT_SET_POWER:
+            self.reply(header, MessageType.LIGHT_STATE_POWER, self._power_level(), addr)
+        elif message_type == MessageType.GET_LABEL:
+            label = self.label.encode()[:32].ljust(32, b"\x00")
+            self.reply(header, MessageType.STATE_LABEL, label, addr)
+        elif message_type == MessageType.GET_EXTENDED_COLOR_ZONES:
+            if self.zone_count > 1:
+                self.reply(
+                    header, MessageType.STATE_EXTENDED_COLOR_ZONES, self._zones_state(), addr
+                )
+            else:
+                self.reply(header, STATE_UNHANDLED, struct.pack("<H", message_type), addr)
+
+    def _power_level(self) -> bytes:
+        return struct.pack("<H", 65535 if self.power else 0)
+
+    def _light_state(self) -> bytes:
+        return struct.pack(
+            "<4HhH32sQ",
+            *self.color,
+            0,
+            65535 if self.power else 0,
+            self.label.encode()[:32],
+            0,
+        )
+
+    def _zones_state(self) -> bytes:
+        count = min(self.zone_count, MAX_EXTENDED_ZONES)
+        colors = np.zeros((MAX_EXTENDED_ZONES, 4), dtype="<u2")
+        colors[:count] = self.zones[:count]
+        return struct.pack("<HHB", self.zone_count, 0, count) + colors.tobytes()
+
+
+class DiscoveryResponder(asyncio.DatagramProtocol):
+    """Stands in for the broadcast address: every bulb answers GetService."""
+
+    def __init__(self, simulator: "LifxSimulator"):
+        self.simulator = simulator
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            header = unpack_header(data)
+        except ValueError:
+            return
+
+        if header.type == MessageType.GET_SERVICE:
+            for bulb in self.simulator.bulbs:
+                bulb.datagram_received(data, addr)
+
+
+class LifxSimulator:
+    """Runs N emulated LIFX devices on localhost.
+
+    ``zones`` is either one zone count for every device or a sequence with
+    one entry per device (1 for single-zone bulbs). Point
+    ``LifxClient.discover`` at ``(host, discovery_port)`` to find them.
+    """
+
+    def __init__(
+        self,
+        count: int = 10,
+        zones: Union[int, Sequence[int]] = 16,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        loss: float = 0.0,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+    ):
+        self.count = count
+        self.zone_counts = [zones] * count if isinstance(zones, int) else list(zones)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.host = host
+        self.rng = np.random.default_rng(seed)
+
+        self.bulbs: List[SimulatedBulb] = []
+        self.messages: List[ReceivedMessage] = []
+        self.discovery_port = 0
+        self._transports: List[asyncio.DatagramTransport] = []
+
+    @property
+    def devices(self) -> List[LifxDevice]:
+        """Client-side descriptions of every simulated device."""
+        return [bulb.device for bulb in self.bulbs]
+
+    def should_drop(self) -> bool:
+        """Decide whether to lose a packet."""
+        return self.loss > 0 and self.rng.random() < self.loss
+
+    def response_delay(self) -> float:
+        """Latency for one response, including jitter."""
+        if self.jitter <= 0:
+            return self.latency
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    async def start(self) -> List[LifxDevice]:
+        """Bind every simulated device; returns their client descriptions."""
+        loop = asyncio.get_running_loop()
+
+        for index, zone_count in enumerate(self.zone_counts[:self.count]):
+            mac = "d0:73:d5:" + ":".join(f"{b:02x}" for b in index.to_bytes(3, "big"))
+            bulb = SimulatedBulb(self, mac, f"Sim {index + 1}", zone_count)
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: bulb, local_addr=(self.host, 0)
+            )
+            self._transports.append(transport)
+            self.bulbs.append(bulb)
+
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: DiscoveryResponder(self), local_addr=(self.host, 0)
+        )
+        self._transports.append(transport)
+        self.discovery_port = transport.get_extra_info("sockname")[1]
+
+        return self.devices
+
+    def stop(self):
+        """Close every simulated device."""
+        for transport in self._transports:
+            transport.close()
+        self._transports.clear()
+
+    def clear(self):
+        """Forget recorded messages."""
+        self.messages.clear()
+        for bulb in self.bulbs:
+            bulb.received.clear()
+
+    def get_stats(self) -> dict:
+        """Message counts across all simulated devices."""
+        delivered = sum(1 for message in self.messages if not message.dropped)
+        return {
+            "devices": len(self.bulbs),
+            "received": len(self.messages),
+            "delivered": delivered,
+            "dropped": len(self.messages) - delivered,
+        }
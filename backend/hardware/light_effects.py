@@ -0,0 +1,423 @@
+"""Frame-scheduled light effects.
+
+Effects are pure functions of ``(layout, t, rng)`` that return a float frame
+of shape ``(devices, max_zones, 4)`` holding hue (turns), saturation,
+brightness and kelvin. The ``EffectEngine`` renders them on a fixed tick
+against a monotonic clock and drops frames rather than falling behind.
+
+Effects that a bulb can run by itself also carry a ``waveform`` compiler.
+When the engine can push device-side waveforms it sends those once instead
+of streaming frames; otherwise it falls back to rendering.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .light_frames import ZoneLayout, hsbk
+from .lifx_protocol import Waveform
+
+# Halloween palette (in turns): Orange, Purple, Green
+HALLOWEEN_HUES = (30 / 360, 270 / 360, 120 / 360)
+
+Intensity = Union[float, Callable[[float], float]]
+
+# Seconds a device-side glitch runs on the bulbs before the engine re-sends it
+GLITCH_HOLD = 30.0
+
+
+@dataclass(frozen=True)
+class DeviceWaveform:
+    """A waveform one bulb runs on its own (LightSetWaveformOptional).
+
+    ``color`` is a float HSBK tuple like the effect frames (hue in turns).
+    The bulb moves between its current colour and ``color`` every
+    ``period`` seconds for ``cycles`` cycles.
+    """
+    waveform: Waveform
+    color: Tuple[float, float, float, float]
+    period: float
+    cycles: float
+    skew_ratio: float = 0.5
+    transient: bool = True
+    set_hue: bool = True
+    set_saturation: bool = True
+    set_brightness: bool = True
+    set_kelvin: bool = False
+
+
+WaveformCompiler = Callable[[ZoneLayout, np.random.Generator], Optional[List[DeviceWaveform]]]
+
+
+@dataclass(frozen=True)
+class Effect:
+    """A named frame generator.
+
+    ``interval`` is the minimum time between pushed frames (``inf`` renders
+    once) and ``transition_ms`` the fade the bulb applies to each frame.
+    ``waveform``, when set, compiles the effect into one device-side
+    waveform per device, or returns None when it cannot.
+    """
+    name: str
+    render: Callable[[ZoneLayout, float, np.random.Generator], np.ndarray]
+    interval: float = 0.0
+    transition_ms: int = 0
+    waveform: Optional[WaveformCompiler] = None
+
+    def __call__(self, layout: ZoneLayout, t: float, rng: np.random.Generator) -> np.ndarray:
+        return self.render(layout, t, rng)
+
+
+def _frame(layout: ZoneLayout, hue, saturation, brightness, kelvin=3500.0) -> np.ndarray:
+    """Stack broadcastable components into a float frame."""
+    shape = layout.shape
+    frame = np.empty(shape + (4,), dtype=np.float64)
+    frame[..., 0] = np.broadcast_to(hue, shape)
+    frame[..., 1] = np.broadcast_to(saturation, shape)
+    frame[..., 2] = np.broadcast_to(brightness, shape)
+    frame[..., 3] = np.broadcast_to(kelvin, shape)
+    return frame
+
+
+def _lerp_hue(a, b, amount):
+    """Interpolate hues along the shortest arc."""
+    delta = np.mod(b - a + 0.5, 1.0) - 0.5
+    return np.mod(a + delta * amount, 1.0)
+
+
+def to_hsbk(frame: np.ndarray) -> np.ndarray:
+    """Convert a float effect frame to the uint16 frame the bulbs take."""
+    return hsbk(frame[..., 0], frame[..., 1], frame[..., 2], frame[..., 3])
+
+
+def ambient(
+    hues: Sequence[float] = HALLOWEEN_HUES,
+    brightness: float = 0.5,
+    speed: float = 0.02,
+) -> Effect:
+    """Calm palette gradient drifting slowly along the bars."""
+    palette = np.asarray(hues, dtype=np.float64)
+
+    def render(layout, t, rng):
+        # Offset each device so neighbouring bars show different colours
+        offsets = np.arange(layout.device_count)[:, None] / max(layout.device_count, 1)
+        position = np.mod(layout.positions * 0.5 + offsets + t * speed, 1.0)
+
+        scaled = position * len(palette)
+        index = np.floor(scaled).astype(np.int64) % len(palette)
+        hue = _lerp_hue(
+            palette[index], palette[(index + 1) % len(palette)], scaled - np.floor(scaled)
+        )
+        breathing = 0.85 + 0.15 * np.sin(2 * math.pi * (t * 0.1 + layout.positions))
+        return _frame(layout, hue, 1.0, brightness * breathing)
+
+    return Effect("ambient", render, interval=1.0, transition_ms=1000)
+
+
+def music(
+    reactor,
+    hues: Sequence[float] = HALLOWEEN_HUES,
+    brightness: float = 0.5,
+    max_rate: float = 15.0,
+) -> Effect:
+    """Ambient palette whose brightness follows a ``MusicReactor``.
+
+    Bands are spread along each bar (bass at one end, treble at the other)
+    and onsets pulse every zone. ``max_rate`` caps frames per second, which
+    is also the message rate each bulb sees.
+    """
+    base = ambient(hues, brightness)
+
+    def render(layout, t, rng):
+        frame = base(layout, t, rng)
+        levels = reactor.levels
+        zone_levels = np.interp(
+            layout.positions, np.linspace(0.0, 1.0, len(levels)), levels
+        )
+        pulse = reactor.beat_level()
+        frame[..., 2] = np.clip(frame[..., 2] * (0.4 + 0.8 * zone_levels) + 0.4 * pulse, 0.0, 1.0)
+        return frame
+
+    interval = 1.0 / max_rate
+    return Effect("music", render, interval=interval, transition_ms=int(interval * 1000))
+
+
+def glitch(intensity: Intensity = 1.0) -> Effect:
+    """Random per-zone colour shifts and flicker.
+
+    ``intensity`` is in [0, 1] and may be a function of effect time, which
+    is how reset ramps the glitch down. A constant intensity also compiles
+    to a device-side pulse: each bar flickers between its current colour
+    and a random hue, with a random duty cycle so the bars drift apart.
+    """
+    start = intensity(0.0) if callable(intensity) else intensity
+    interval = max(0.05, 0.5 - start * 0.4)
+
+    def render(layout, t, rng):
+        level = intensity(t) if callable(intensity) else intensity
+        shape = layout.shape
+        hue = rng.random(shape)
+        saturation = 0.8 + rng.random(shape) * 0.2
+        brightness = 0.5 * (1 - level * 0.5 + rng.random(shape) * level)
+        return _frame(layout, hue, saturation, brightness)
+
+    def waveform(layout, rng):
+        if callable(intensity):
+            return None
+        count = layout.device_count
+        hues = rng.random(count)
+        skews = 0.2 + rng.random(count) * 0.6
+        period = interval * 2
+        return [
+            DeviceWaveform(
+                Waveform.PULSE,
+                (float(hue), 0.9, 0.5 * (1 + start * 0.5), 3500.0),
+                period=period,
+                cycles=GLITCH_HOLD / period,
+                skew_ratio=float(skew),
+            )
+            for hue, skew in zip(hues, skews)
+        ]
+
+    # Faster glitching at higher intensity
+    return Effect("glitch", render, interval=interval, transition_ms=50, waveform=waveform)
+
+
+def flash(brightness: float = 1.0, kelvin: float = 9000) -> Effect:
+    """Bright white flash, rendered once."""
+
+    def render(layout, t, rng):
+        return _frame(layout, 0.0, 0.0, brightness, kelvin)
+
+    return Effect("flash", render, interval=math.inf, transition_ms=100)
+
+
+def fade(start: Effect, end: Effect, duration: float) -> Effect:
+    """Crossfade from ``start`` to ``end`` over ``duration`` seconds."""
+
+    def render(layout, t, rng):
+        amount = 1.0 if duration <= 0 else min(1.0, max(0.0, t / duration))
+        a = start(layout, t, rng)
+        b = end(layout, t, rng)
+        frame = a + (b - a) * amount
+        frame[..., 0] = _lerp_hue(a[..., 0], b[..., 0], amount)
+        return frame
+
+    return Effect(
+        f"fade({start.name}->{end.name})",
+        render,
+        interval=min(start.interval, end.interval),
+        transition_ms=min(start.transition_ms, end.transition_ms),
+    )
+
+
+class EffectEngine:
+    """Renders effects on a fixed tick and pushes them to the lights.
+
+    A base effect (usually ambient) runs continuously; ``play`` layers a
+    temporary effect on top, optionally for a fixed duration measured on the
+    engine's monotonic clock. When a tick is late by more than a period the
+    missed frames are dropped and counted instead of being rendered late.
+
+    With ``push_waveforms`` set, played effects that compile to device-side
+    waveforms are sent once and then left to the bulbs; no frames are
+    rendered for them until another effect takes over.
+    """
+
+    def __init__(
+        self,
+        push: Callable[[np.ndarray, int], int],
+        layout: Callable[[], ZoneLayout],
+        fps: float = 20.0,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        push_waveforms: Optional[Callable[[List[DeviceWaveform]], int]] = None,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.push = push
+        self.push_waveforms = push_waveforms
+        self.layout = layout
+        self.period = 1.0 / fps
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock
+        self.sleep = sleep
+
+        self.base: Optional[Effect] = None
+        self.base_started = 0.0
+        self.effect: Optional[Effect] = None
+        self.effect_started = 0.0
+        self.effect_until: Optional[float] = None
+        self.device_side: Optional[Effect] = None
+        # When the device-side waveforms are about to run out and must be re-sent
+        self.device_side_renew = math.inf
+        self.last_push = -math.inf
+        self.is_running = False
+
+        self.frames_rendered = 0
+        self.waveforms_pushed = 0
+        self.frames_dropped = 0
+        self.max_lateness = 0.0
+
+    @property
+    def current(self) -> Optional[Effect]:
+        """The effect that would render on the next tick."""
+        return self.effect or self.base
+
+    def set_base(self, effect: Effect):
+        """Set the effect that runs whenever nothing else is playing."""
+        self.base = effect
+        self.base_started = self.clock()
+        if self.effect is None:
+            self.last_push = -math.inf
+
+    def play(
+        self,
+        effect: Effect,
+        duration: Optional[float] = None,
+        rendered: bool = False,
+    ):
+        """Play ``effect`` over the base, for ``duration`` seconds or until replaced.
+
+        Pass ``rendered=True`` when the caller has already sent the first frame
+        itself, so the engine waits one interval before pushing again.
+        """
+        now = self.clock()
+        self.effect = effect
+        self.effect_started = now
+        self.effect_until = None if duration is None else now + duration
+        self.last_push = now if rendered else -math.inf
+        self.device_side = None
+
+        if not rendered and self._push_device_side(effect):
+            self.device_side = effect
+            self.last_push = now
+
+    def _push_device_side(self, effect: Effect, devices=None) -> int:
+        """Send ``effect`` as device-side waveforms if it and the engine allow it.
+
+        ``devices`` limits the push to some of the bulbs.
+        """
+        if self.push_waveforms is None or effect.waveform is None:
+            return 0
+        layout = self.layout()
+        if layout.device_count == 0:
+            return 0
+        waveforms = effect.waveform(layout, self.rng)
+        if not waveforms:
+            return 0
+        self.waveforms_pushed += 1
+        if devices is None:
+            # Renew a period before the shortest waveform ends
+            lasts = min(waveform.period * waveform.cycles for waveform in waveforms)
+            longest_period = max(waveform.period for waveform in waveforms)
+            self.device_side_renew = self.clock() + max(0.0, lasts - longest_period)
+            return self.push_waveforms(waveforms)
+        return self.push_waveforms(waveforms, devices)
+
+    def resync(self, devices=None) -> int:
+        """Bring bulbs that just joined or came back up to date.
+
+        A device-side effect is sent again to ``devices`` (all bulbs if
+        None), since it only ever went out once; otherwise the next tick
+        pushes a full frame.
+        """
+        effect = self.current
+        if effect is not None and effect is self.device_side:
+            return self._push_device_side(effect, devices)
+        self.last_push = -math.inf
+        return 0
+
+    def clear(self):
+        """Return to the base effect."""
+        self.effect = None
+        self.effect_until = None
+        self.device_side = None
+        self.last_push = -math.inf
+
+    def request_frame(self) -> int:
+        """Render immediately if the current effect's interval allows it.
+
+        Used for low-latency reactions (e.g. a musical onset) between ticks.
+        """
+        effect = self.current
+        now = self.clock()
+        if effect is None or effect is self.device_side or now - self.last_push < effect.interval:
+            return 0
+        return self._tick(now)
+
+    def render_now(self) -> int:
+        """Render and push the current effect immediately; returns packets sent."""
+        return self._tick(self.clock(), force=True)
+
+    def _tick(self, now: float, force: bool = False) -> int:
+        if self.effect_until is not None and now >= self.effect_until:
+            self.clear()
+
+        effect = self.current
+        if effect is None:
+            return 0
+        if effect is self.device_side and not force:
+            if now < self.device_side_renew:
+                return 0
+            # The bulbs stop once the waveform's cycles are done: send it again
+            return self._push_device_side(effect)
+        if not force and now - self.last_push < effect.interval:
+            return 0
+
+        layout = self.layout()
+        if layout.device_count == 0:
+            return 0
+
+        started = self.effect_started if effect is self.effect else self.base_started
+        frame = to_hsbk(effect(layout, now - started, self.rng))
+        transition = effect.transition_ms
+        if transition == 0:
+            transition = int(self.period * 1000)
+
+        self.last_push = now
+        self.frames_rendered += 1
+        return self.push(frame, transition)
+
+    async def run(self):
+        """Tick until ``stop`` is called."""
+        self.is_running = True
+        next_tick = self.clock()
+
+        try:
+            while self.is_running:
+                now = self.clock()
+                late = now - next_tick
+                if late >= self.period:
+                    # Too far behind: skip to the latest tick instead of catching up
+                    missed = int(late // self.period)
+                    self.frames_dropped += missed
+                    next_tick += missed * self.period
+                self.max_lateness = max(self.max_lateness, late)
+
+                self._tick(now)
+
+                next_tick += self.period
+                await self.sleep(max(0.0, next_tick - self.clock()))
+        finally:
+            self.is_running = False
+
+    def stop(self):
+        """Stop ticking after the current frame."""
+        self.is_running = False
+
+    def get_stats(self) -> dict:
+        """Frame scheduling statistics."""
+        effect = self.current
+        return {
+            "effect": effect.name if effect else None,
+            "fps": round(1.0 / self.period, 2),
+            "device_side": effect is not None and effect is self.device_side,
+            "frames_rendered": self.frames_rendered,
+            "waveforms_pushed": self.waveforms_pushed,
+            "frames_dropped": self.frames_dropped,
+            "max_lateness_ms": round(self.max_lateness * 1000, 2),
+        }
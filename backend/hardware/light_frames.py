@@ -0,0 +1,135 @@
+"""Multizone frame rendering for LIFX light bars.
+
+A frame is a ``uint16`` array of shape ``(devices, max_zones, 4)`` holding
+one HSBK value per zone. Single-zone bulbs use column 0; zones beyond a
+device's ``zone_count`` are ignored when the frame is sent.
+"""
+
+import struct
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .lifx_protocol import (
+    MAX_EXTENDED_ZONES,
+    LifxDevice,
+    MessageType,
+    set_color_payload,
+)
+
+EXTENDED_ZONES_PREFIX = struct.Struct("<IBHB")
+
+# SetExtendedColorZones apply field
+NO_APPLY = 0
+APPLY = 1
+
+
+class ZoneLayout:
+    """Zone geometry for an ordered set of devices."""
+
+    def __init__(self, zone_counts: Sequence[int]):
+        self.zone_counts = np.asarray(zone_counts, dtype=np.int64).reshape(-1)
+        self.device_count = len(self.zone_counts)
+        self.max_zones = int(self.zone_counts.max()) if self.device_count else 1
+
+        zone_index = np.arange(self.max_zones)
+        self.mask = zone_index[None, :] < self.zone_counts[:, None]
+
+        # Position of every zone along its bar, 0.0 at one end and 1.0 at the other
+        spans = np.maximum(self.zone_counts - 1, 1)[:, None]
+        self.positions = np.where(self.mask, zone_index[None, :] / spans, 0.0)
+
+    @classmethod
+    def from_devices(cls, devices: Sequence[LifxDevice]) -> "ZoneLayout":
+        """Build a layout from discovered devices."""
+        return cls([device.zone_count for device in devices])
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """``(devices, max_zones)``."""
+        return (self.device_count, self.max_zones)
+
+    def blank(self) -> np.ndarray:
+        """An all-off frame."""
+        return np.zeros((self.device_count, self.max_zones, 4), dtype=np.uint16)
+
+    def solid(self, color: Tuple[int, int, int, int]) -> np.ndarray:
+        """A frame with every zone set to ``color``."""
+        frame = self.blank()
+        frame[:] = np.asarray(color, dtype=np.uint16)
+        return frame
+
+
+def hsbk(hue, saturation, brightness, kelvin=3500) -> np.ndarray:
+    """Convert normalized components to a uint16 HSBK frame.
+
+    ``hue`` is in turns (wrapped to [0, 1)), ``saturation`` and
+    ``brightness`` are clipped to [0, 1] and ``kelvin`` is in degrees.
+    Arguments broadcast against each other like any NumPy expression.
+    """
+    hue, saturation, brightness, kelvin = np.broadcast_arrays(
+        np.asarray(hue, dtype=np.float64),
+        np.asarray(saturation, dtype=np.float64),
+        np.asarray(brightness, dtype=np.float64),
+        np.asarray(kelvin, dtype=np.float64),
+    )
+    frame = np.empty(hue.shape + (4,), dtype=np.uint16)
+    frame[..., 0] = np.mod(hue, 1.0) * 65535
+    frame[..., 1] = np.clip(saturation, 0.0, 1.0) * 65535
+    frame[..., 2] = np.clip(brightness, 0.0, 1.0) * 65535
+    frame[..., 3] = np.clip(kelvin, 1500, 9000)
+    return frame
+
+
+def extended_zones_payloads(
+    zones: np.ndarray, duration_ms: int = 0
+) -> List[bytes]:
+    """Encode one device's zones as SetExtendedColorZones payloads.
+
+    Bars with more than 82 zones need several messages; all but the last are
+    sent with ``NO_APPLY`` so the whole bar changes at once.
+    """
+    zones = np.ascontiguousarray(zones, dtype="<u2")
+    payloads = []
+
+    for start in range(0, len(zones), MAX_EXTENDED_ZONES):
+        chunk = zones[start:start + MAX_EXTENDED_ZONES]
+        last = start + MAX_EXTENDED_ZONES >= len(zones)
+        padding = b"\x00" * (8 * (MAX_EXTENDED_ZONES - len(chunk)))
+        payloads.append(
+            EXTENDED_ZONES_PREFIX.pack(
+                duration_ms, APPLY if last else NO_APPLY, start, len(chunk)
+            )
+            + chunk.tobytes()
+            + padding
+        )
+
+    return payloads
+
+
+def frame_messages(
+    devices: Sequence[LifxDevice],
+    frame: np.ndarray,
+    duration_ms: int = 0,
+) -> List[Tuple[LifxDevice, int, bytes]]:
+    """Turn a frame into ``(device, message_type, payload)`` triples.
+
+    Multizone bars get one extended-multizone message (more only past 82
+    zones); single-zone bulbs get a plain SetColor from zone 0.
+    """
+    messages = []
+
+    for index, device in enumerate(devices):
+        if device.is_multizone:
+            zones = frame[index, :device.zone_count]
+            for payload in extended_zones_payloads(zones, duration_ms):
+                messages.append(
+                    (device, MessageType.SET_EXTENDED_COLOR_ZONES, payload)
+                )
+        else:
+            color = tuple(int(value) for value in frame[index, 0])
+            messages.append(
+                (device, MessageType.LIGHT_SET_COLOR, set_color_payload(color, duration_ms))
+            )
+
+    return messages
@@ -1,11 +1,14 @@
 """USB-C Microphone controller for audio input and trigger detection."""
 
 import asyncio
+import logging
 import numpy as np
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Tuple
 import sounddevice as sd
 from dataclasses import dataclass
 
+log = logging.getLogger(__name__)
+
 
 @dataclass
 class AudioData:
@@ -15,6 +18,21 @@ class AudioData:
     peak: float
     frequency_peak: float
     triggered: bool
+    bands: Optional[np.ndarray] = None
+
+
+@dataclass
+class TriggerProfile:
+    """Peak frequency band and loudness that count as a trigger."""
+    freq_min: float = 800.0
+    freq_max: float = 1200.0
+    threshold: float = 0.3
+
+    def matches(self, analysis: AudioData) -> bool:
+        return (
+            self.freq_min <= analysis.frequency_peak <= self.freq_max
+            and analysis.rms >= self.threshold
+        )
 
 
 class MicrophoneController:
@@ -27,18 +45,27 @@ class MicrophoneController:
         trigger_freq_min: float = 800.0,
         trigger_freq_max: float = 1200.0,
         trigger_threshold: float = 0.3,
+        band_count: int = 8,
     ):
         self.sample_rate = sample_rate
         self.chunk_size = chunk_size
         self.trigger_freq_min = trigger_freq_min
         self.trigger_freq_max = trigger_freq_max
         self.trigger_threshold = trigger_threshold
+        self.band_count = band_count
+
+        # FFT bin frequencies and band weights, cached per chunk length
+        self._fft_length = 0
+        self._freqs: Optional[np.ndarray] = None
+        self._band_weights: Optional[np.ndarray] = None
 
         self.device_id: Optional[int] = None
         self.stream: Optional[sd.InputStream] = None
         self.is_listening = False
 
-        self.trigger_callbacks: List[Callable] = []
+        # Each trigger callback has its own profile, so boxes sharing this
+        # microphone can listen for different sounds from one FFT
+        self.trigger_callbacks: List[Tuple[Callable, Optional[TriggerProfile]]] = []
         self.audio_callbacks: List[Callable[[AudioData], None]] = []
 
     def initialize(self, device_name: Optional[str] = None):
@@ -59,7 +86,7 @@ class MicrophoneController:
             raise RuntimeError("Microphone device not found")
 
         device_info = sd.query_devices(self.device_id)
-        print(f"Microphone: {device_info['name']}")
+        log.info("Microphone: %s", device_info["name"])
 
     async def start_listening(self):
         """Start listening to microphone input."""
@@ -82,7 +109,8 @@ class MicrophoneController:
         def audio_callback(indata, frames, time_info, status):
             """Process audio chunk in callback."""
             if status:
-                print(f"Audio status: {status}")
+                # Only enqueued here; written out by the logging thread
+                log.warning("Audio status: %s", status)
 
             audio_data = indata[:, 0]  # Mono
             analysis = self._analyze_audio(audio_data)
@@ -96,8 +124,8 @@ class MicrophoneController:
                     asyncio.run_coroutine_threadsafe(result, loop)
 
             # Check for trigger
-            if analysis.triggered:
-                for callback in self.trigger_callbacks:
+            for callback, profile in self.trigger_callbacks:
+                if analysis.triggered if profile is None else profile.matches(analysis):
                     callback()
 
         self.stream = sd.InputStream(
@@ -130,7 +158,10 @@ class MicrophoneController:
         # Perform FFT
         fft = np.fft.rfft(audio_data)
         magnitude = np.abs(fft)
-        freqs = np.fft.rfftfreq(len(audio_data), 1 / self.sample_rate)
+        freqs = self._frequencies(len(audio_data))
+
+        # Per-band energies for the light reactor, from the same FFT
+        bands = self._band_weights @ (magnitude ** 2)
 
         # Find peak frequency
         peak_idx = np.argmax(magnitude)
@@ -149,11 +180,42 @@ class MicrophoneController:
             peak=peak,
             frequency_peak=frequency_peak,
             triggered=triggered,
+            bands=bands,
         )
 
-    def register_trigger_callback(self, callback: Callable):
-        """Register callback for trigger events."""
-        self.trigger_callbacks.append(callback)
+    def _frequencies(self, length: int) -> np.ndarray:
+        """FFT bin frequencies for a chunk, building the band weights once."""
+        if self._fft_length != length:
+            self._fft_length = length
+            self._freqs = np.fft.rfftfreq(length, 1 / self.sample_rate)
+            self._band_weights = self._build_band_weights(self._freqs)
+        return self._freqs
+
+    def _build_band_weights(self, freqs: np.ndarray) -> np.ndarray:
+        """Averaging matrix mapping FFT bins to log-spaced bands."""
+        edges = np.geomspace(40.0, min(16000.0, self.sample_rate / 2), self.band_count + 1)
+        weights = np.zeros((self.band_count, len(freqs)))
+
+        for band in range(self.band_count):
+            in_band = (freqs >= edges[band]) & (freqs < edges[band + 1])
+            if not in_band.any():
+                # Low bands can be narrower than one bin; use the nearest bin
+                in_band[np.argmin(np.abs(freqs - edges[band]))] = True
+            weights[band, in_band] = 1.0 / in_band.sum()
+
+        return weights
+
+    def register_trigger_callback(
+        self,
+        callback: Callable,
+        profile: Optional[TriggerProfile] = None,
+    ):
+        """Register callback for trigger events.
+
+        ``profile`` replaces the microphone's own trigger settings for this
+        callback. It is read on every chunk, so it can be changed in place.
+        """
+        self.trigger_callbacks.append((callback, profile))
 
     def register_audio_callback(self, callback: Callable[[AudioData], None]):
         """Register callback for audio data updates."""
@@ -0,0 +1,93 @@
+"""Music analysis for reactive lighting.
+
+Turns the per-band energies the microphone already computes for every chunk
+into smoothed, normalized band levels and an onset (beat) envelope that the
+``music`` light effect reads on each frame.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class MusicReactor:
+    """Smooths band energies and detects onsets."""
+
+    def __init__(
+        self,
+        band_count: int = 8,
+        attack: float = 0.6,
+        release: float = 0.15,
+        peak_decay: float = 0.995,
+        noise_floor: float = 1.0,
+        onset_sensitivity: float = 1.5,
+        refractory: float = 0.12,
+        beat_decay: float = 0.15,
+        history: int = 43,  # ~1 s of 1024-sample chunks at 44.1 kHz
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.band_count = band_count
+        self.attack = attack
+        self.release = release
+        self.peak_decay = peak_decay
+        self.onset_sensitivity = onset_sensitivity
+        self.refractory = refractory
+        self.beat_decay = beat_decay
+        self.clock = clock
+
+        self.levels = np.zeros(band_count)
+        self._previous = np.zeros(band_count)
+        # Peaks never drop below the floor, so silence does not normalize up to full level
+        self._floor = math.log1p(noise_floor)
+        self._peaks = np.full(band_count, self._floor)
+        self._flux_history: deque = deque(maxlen=history)
+
+        self.last_onset = -math.inf
+        self.onsets = 0
+        self.updates = 0
+
+    def update(self, bands: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """Feed one chunk of band energies; returns True on an onset."""
+        now = self.clock() if timestamp is None else timestamp
+        energy = np.log1p(np.asarray(bands, dtype=np.float64)[:self.band_count])
+
+        # Normalize each band against its slowly decaying running peak
+        self._peaks = np.maximum(np.maximum(self._peaks * self.peak_decay, energy), self._floor)
+        level = energy / self._peaks
+
+        # Fast attack, slow release
+        rate = np.where(level > self.levels, self.attack, self.release)
+        self.levels = self.levels + rate * (level - self.levels)
+
+        # Spectral flux against an adaptive threshold
+        flux = float(np.maximum(level - self._previous, 0.0).sum())
+        self._previous = level
+        self.updates += 1
+
+        onset = False
+        if len(self._flux_history) >= 4:
+            history = np.fromiter(self._flux_history, dtype=np.float64)
+            threshold = history.mean() + self.onset_sensitivity * history.std()
+            if flux > threshold and flux > 0.1 and now - self.last_onset >= self.refractory:
+                self.last_onset = now
+                self.onsets += 1
+                onset = True
+        self._flux_history.append(flux)
+
+        return onset
+
+    def beat_level(self, now: Optional[float] = None) -> float:
+        """Envelope in [0, 1] that jumps on each onset and decays after it."""
+        now = self.clock() if now is None else now
+        return math.exp(-max(0.0, now - self.last_onset) / self.beat_decay)
+
+    def get_stats(self) -> dict:
+        """Reactor statistics."""
+        return {
+            "updates": self.updates,
+            "onsets": self.onsets,
+            "levels": [round(float(level), 3) for level in self.levels],
+        }
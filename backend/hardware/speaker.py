@@ -1,6 +1,7 @@
 """Bluetooth speaker controller for audio output."""
 
 import asyncio
+import logging
 import pygame
 from typing import Optional
 from pathlib import Path
@@ -8,6 +9,8 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.chrome_media_control import pause_chrome_media, resume_chrome_media
 
+log = logging.getLogger(__name__)
+
 
 class SpeakerController:
     """Controls Bluetooth speaker for audio playback."""
@@ -16,6 +19,7 @@ class SpeakerController:
         self.is_connected = False
         self.current_volume = 0.5
         self.is_playing = False
+        self.media_paused = False
         self.distortion_level = 0.0
         self.audio_dir = None
         self.boo_sound = None
@@ -29,14 +33,14 @@ class SpeakerController:
         Make sure your Bluetooth speaker is set as the system default
         in macOS System Settings > Sound > Output.
         """
-        print("Audio output will use system default speaker")
-        print("Ensure Bluetooth speaker is connected and set as default output")
+        log.info("Audio output will use system default speaker")
+        log.info("Ensure Bluetooth speaker is connected and set as default output")
         self.is_connected = True
 
     def initialize(self):
         """Initialize audio playback system."""
         pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-        print("Audio system initialized")
+        log.info("Audio system initialized")
 
         # Load audio files
         self._load_audio_files()
@@ -50,19 +54,17 @@ class SpeakerController:
         boo_path = self.audio_dir / "boo.wav"
         if boo_path.exists():
             self.boo_sound = pygame.mixer.Sound(str(boo_path))
-            print(f"  ✓ Loaded: {boo_path.name}")
+            log.info("Loaded: %s", boo_path.name)
         else:
-            print(f"  ✗ Missing: {boo_path}")
-            print(f"    Place your BOO sound at: {boo_path}")
+            log.warning("Missing BOO sound; place it at: %s", boo_path)
 
         # Try to load Happy Halloween sound
         halloween_path = self.audio_dir / "happy_halloween.wav"
         if halloween_path.exists():
             self.happy_halloween_sound = pygame.mixer.Sound(str(halloween_path))
-            print(f"  ✓ Loaded: {halloween_path.name}")
+            log.info("Loaded: %s", halloween_path.name)
         else:
-            print(f"  ✗ Missing: {halloween_path}")
-            print(f"    Place your Happy Halloween sound at: {halloween_path}")
+            log.warning("Missing Happy Halloween sound; place it at: %s", halloween_path)
 
     def play_ambient_music(self, volume_multiplier: float = 1.0):
         """
@@ -70,9 +72,11 @@ class SpeakerController:
         This is just a placeholder - your music plays through the same speaker.
         """
         self.is_playing = True
-        print(f"Ready - Play your ambient music on the laptop (Soundcloud/Spotify/etc)")
-        print(f"  It will route through your Bluetooth speaker (if set as default)")
-        print(f"  Scare sounds will interrupt when triggered")
+        log.info(
+            "Ready - Play your ambient music on the laptop (Soundcloud/Spotify/etc); "
+            "it routes through your Bluetooth speaker if set as default, "
+            "and scare sounds interrupt it when triggered"
+        )
 
     def apply_distortion(self, intensity: float = 0.0):
         """
@@ -83,6 +87,41 @@ class SpeakerController:
         # Could potentially lower system volume here if needed
         # For now, just track the distortion level
 
+    def _sound(self, name: str):
+        return {"boo": self.boo_sound, "happy_halloween": self.happy_halloween_sound}.get(name)
+
+    def has_scare_sounds(self) -> bool:
+        """Whether both scare sounds are loaded."""
+        return bool(self.boo_sound and self.happy_halloween_sound)
+
+    def sound_length(self, name: str) -> float:
+        """Length of a loaded sound in seconds (0 if it is missing)."""
+        sound = self._sound(name)
+        return sound.get_length() if sound else 0.0
+
+    def play_sound(self, name: str, volume: float = 1.0):
+        """Start a scare sound without waiting for it to finish."""
+        sound = self._sound(name)
+        if not sound:
+            log.info({"boo": "BOO! 💀", "happy_halloween": "HAPPY HALLOWEEN! 🎃"}.get(name, name))
+            return
+
+        log.info("Playing %s sound...", name, extra={"fields": {"volume": volume}})
+        sound.set_volume(volume)
+        sound.play()
+
+    def pause_media(self):
+        """Pause external media so scare sounds are heard over it."""
+        if self.has_scare_sounds() and not self.media_paused:
+            pause_chrome_media()
+            self.media_paused = True
+
+    def resume_media(self):
+        """Resume external media if it was paused for the scare."""
+        if self.media_paused:
+            resume_chrome_media()
+            self.media_paused = False
+
     async def play_scare_sequence(self, volume_multiplier: float = 1.0, scream_delay: float = 2.0):
         """
         Play the scare audio sequence.
@@ -93,57 +132,42 @@ class SpeakerController:
         3. Delay for screams
         4. Play HAPPY HALLOWEEN
         5. Restore your music volume
+
+        The controller schedules these steps as timeline cues instead; this
+        blocking version is kept for standalone audio checks.
         """
-        if not self.boo_sound or not self.happy_halloween_sound:
-            print("⚠️  Missing audio files! Printing instead:")
-            print("BOO! 💀")
+        if not self.has_scare_sounds():
+            log.warning("Missing audio files! Logging instead:")
+            self.play_sound("boo")
             await asyncio.sleep(scream_delay)  # Delay for screams
-            print("HAPPY HALLOWEEN! 🎃")
+            self.play_sound("happy_halloween")
             return
 
         # Pause Chrome media using pynput media keys
-        pause_chrome_media()
+        self.pause_media()
 
-        print("Playing BOO sound at MAX VOLUME...")
         # Play BOO sound at MAXIMUM volume
-        self.boo_sound.set_volume(1.0)
-        self.boo_sound.play()
+        self.play_sound("boo")
 
         # Wait for BOO to finish
         while pygame.mixer.get_busy():
             await asyncio.sleep(0.1)
 
-        print(f"Pausing {scream_delay}s for screams...")
+        log.info("Pausing %ss for screams...", scream_delay)
         # Delay for screams/reactions
         await asyncio.sleep(scream_delay)
 
-        print("Playing Happy Halloween at MAX VOLUME...")
         # Play Happy Halloween at MAXIMUM volume
-        self.happy_halloween_sound.set_volume(1.0)
-        self.happy_halloween_sound.play()
+        self.play_sound("happy_halloween")
 
         # Wait for Happy Halloween to finish
         while pygame.mixer.get_busy():
             await asyncio.sleep(0.1)
 
         # Resume Chrome media using pynput media keys
-        resume_chrome_media()
-
-        print("Scare sequence complete - your ambient music continues")
-
-    async def reset_audio(self, duration: float = 5.0):
-        """Gradually return to normal ambient music."""
-        steps = int(duration * 10)
-        step_delay = duration / steps
-
-        for i in range(steps):
-            progress = i / steps
-            self.apply_distortion(intensity=1.0 - progress)
-            await asyncio.sleep(step_delay)
+        self.resume_media()
 
-        # Resume ambient music
-        self.apply_distortion(0.0)
-        self.play_ambient_music()
+        log.info("Scare sequence complete - your ambient music continues")
 
     def set_volume(self, volume: float):
         """Set speaker volume (0.0 to 1.0)."""
@@ -163,7 +187,7 @@ class SpeakerController:
             # Mixer not initialized - already stopped
             pass
         self.is_playing = False
-        print("Audio system shutdown")
+        log.info("Audio system shutdown")
 
     def get_status(self) -> dict:
         """Get current speaker status."""
@@ -1,11 +1,28 @@
 """Main FastAPI application entry point."""
 
+import logging
+from typing import Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from controller import ScareBoxController
+from box_manager import BoxManager
 from websocket import manager
 from api import router, set_controller
 from config import config
+from utils.structured_log import setup_logging, shutdown_logging
+
+# Log through a background writer so console I/O never blocks the event loop
+setup_logging(
+    config.logging.level,
+    config.logging.levels,
+    config.logging.format,
+    config.logging.path,
+    config.logging.queue_size,
+)
+
+log = logging.getLogger(__name__)
+
+# Outbound messages each WebSocket client may have waiting
+manager.queue_size = config.server.ws_queue_size
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,8 +40,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create controller
-controller = ScareBoxController()
+# Create the box manager (one box unless several are configured)
+controller = BoxManager()
 
 # Set controller reference for API routes
 set_controller(controller)
@@ -48,6 +65,8 @@ async def startup_event():
     print("\n🎃 Scare Box ready!")
     print(f"   API: http://{config.server.host}:{config.server.port}/api")
     print(f"   WebSocket: ws://{config.server.host}:{config.server.port}/ws")
+    if len(controller.boxes) > 1:
+        print(f"   Boxes: {', '.join(controller.boxes)} (/api/boxes/<name>, /ws/<name>)")
     print(f"   Docs: http://{config.server.host}:{config.server.port}/docs\n")
 
 
@@ -56,6 +75,7 @@ async def shutdown_event():
     """Cleanup on shutdown."""
     print("\nShutting down Scare Box...")
     await controller.stop()
+    shutdown_logging()
     print("Goodbye! 👻")
 
 
@@ -72,19 +92,36 @@ async def root():
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time communication."""
-    await manager.connect(websocket)
+    """WebSocket endpoint for real-time communication with every box."""
+    await serve_websocket(websocket, None)
+
+
+@app.websocket("/ws/{box_id}")
+async def box_websocket_endpoint(websocket: WebSocket, box_id: str):
+    """WebSocket endpoint for one box's streams."""
+    if box_id not in controller.boxes:
+        await websocket.close(code=4404)
+        return
+    await serve_websocket(websocket, box_id)
+
+
+async def serve_websocket(websocket: WebSocket, box_id: Optional[str]):
+    """Stream to a client until it disconnects."""
+    await manager.connect(websocket, box_id)
+    box = controller.get_box(box_id)
 
     try:
         # Send initial status
-        await websocket.send_json({
+        await manager.send_personal({
             "type": "connected",
             "data": {
                 "message": "Connected to Scare Box",
-                "state": controller.state_machine.get_state().value,
-                "mode": controller.state_machine.get_mode().value,
+                "box": box.name,
+                "boxes": list(controller.boxes),
+                "state": box.state_machine.get_state().value,
+                "mode": box.state_machine.get_mode().value,
             },
-        })
+        }, websocket)
 
         # Keep connection alive
         while True:
@@ -92,15 +129,15 @@ async def websocket_endpoint(websocket: WebSocket):
             data = await websocket.receive_text()
 
             # Echo back (or handle commands)
-            await websocket.send_json({
+            await manager.send_personal({
                 "type": "echo",
                 "data": data,
-            })
+            }, websocket)
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        log.warning("WebSocket error: %s", e)
         manager.disconnect(websocket)
 
 
@@ -0,0 +1,386 @@
+"""Trigger synchronization between scare box backends on a LAN.
+
+Nodes exchange small JSON datagrams over UDP multicast (or, for testing on
+one machine, unicast to a list of peers on the loopback interface). Each
+node estimates every peer's clock offset from ping round trips, keeping the
+sample with the shortest round trip. A trigger is announced with a start
+time a little in the future on the sender's clock; every node converts it
+to its own clock and starts the sequence then. Each node reports how late
+it actually started, and the spread of those reports is the sequence's
+cross-node skew.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import socket
+import struct
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+MULTICAST_GROUP = "239.255.42.99"
+SYNC_PORT = 50505
+PROTOCOL = "scare-box/1"
+
+Address = Tuple[str, int]
+
+
+class PeerClock:
+    """Offset of a peer's clock from ours, from NTP-style ping exchanges.
+
+    ``offset`` is peer time minus local time. Queueing delay only ever
+    lengthens a round trip, so the shortest recent one gives the best
+    estimate; half of it bounds the error.
+    """
+
+    def __init__(self, window: int = 16):
+        self.samples: deque = deque(maxlen=window)  # (rtt, offset)
+        self.address: Optional[Address] = None
+        self.last_seen = 0.0
+
+    def add(self, t0: float, t1: float, t2: float, t3: float):
+        """Record a ping sent at ``t0``, received at ``t1`` (peer clock),
+        answered at ``t2`` (peer clock) and the answer received at ``t3``."""
+        rtt = max(0.0, (t3 - t0) - (t2 - t1))
+        offset = ((t1 - t0) + (t2 - t3)) / 2
+        self.samples.append((rtt, offset))
+
+    @property
+    def synced(self) -> bool:
+        return bool(self.samples)
+
+    @property
+    def offset(self) -> float:
+        return min(self.samples)[1] if self.samples else 0.0
+
+    @property
+    def uncertainty(self) -> Optional[float]:
+        return min(self.samples)[0] / 2 if self.samples else None
+
+    def to_local(self, peer_time: float) -> float:
+        """Convert a time on the peer's clock to ours."""
+        return peer_time - self.offset
+
+
+@dataclass
+class SequenceSync:
+    """Start reports from every node for one synchronized sequence."""
+    trigger_id: str
+    origin: str
+    box: str
+    reports: Dict[str, Tuple[float, Optional[float]]] = field(default_factory=dict)
+
+    @property
+    def skew(self) -> Optional[float]:
+        """Spread of the nodes' start lateness (None until two have reported)."""
+        if len(self.reports) < 2:
+            return None
+        lateness = [late for late, _ in self.reports.values()]
+        return max(lateness) - min(lateness)
+
+    @property
+    def skew_bound(self) -> Optional[float]:
+        """Worst case skew including clock offset error; None if a node was unsynced."""
+        skew = self.skew
+        errors = [error for _, error in self.reports.values()]
+        if skew is None or None in errors:
+            return None
+        return skew + max(errors)
+
+    def to_dict(self) -> dict:
+        skew, bound = self.skew, self.skew_bound
+        return {
+            "id": self.trigger_id,
+            "origin": self.origin,
+            "box": self.box,
+            "nodes": {
+                node: round(late * 1000, 3) for node, (late, _) in self.reports.items()
+            },
+            "skew_ms": None if skew is None else round(skew * 1000, 3),
+            "skew_bound_ms": None if bound is None else round(bound * 1000, 3),
+        }
+
+
+class NodeSync(asyncio.DatagramProtocol):
+    """Coordinates trigger start times with other nodes.
+
+    Every message goes to every node (the multicast group, or each loopback
+    peer); messages meant for one node name it in ``to``.
+    """
+
+    def __init__(
+        self,
+        node_id: Optional[str] = None,
+        group: str = MULTICAST_GROUP,
+        port: int = SYNC_PORT,
+        peers: Sequence[str] = (),
+        loopback: bool = False,
+        lead: float = 0.25,
+        ping_interval: float = 1.0,
+        repeats: int = 2,
+        history: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.node_id = node_id or socket.gethostname()
+        self.group = group
+        self.port = port
+        self.peer_addresses = [parse_address(peer) for peer in peers]
+        self.loopback = loopback
+        self.lead = lead
+        self.ping_interval = ping_interval
+        self.repeats = repeats  # Triggers are sent this many times; UDP may drop one
+        self.clock = clock
+
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.mode: Optional[str] = None
+        self.targets: List[Address] = []
+        self.peers: Dict[str, PeerClock] = {}
+        self.sequences: "OrderedDict[str, SequenceSync]" = OrderedDict()
+        self.history = history
+        self.trigger_callbacks: List[Callable[[str, str, float], None]] = []
+        self._ids = itertools.count(1)
+        self._ping_task: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+
+    # Lifecycle
+
+    async def start(self):
+        """Open the socket and start pinging peers.
+
+        Falls back to loopback unicast if the multicast group cannot be joined.
+        """
+        if self.transport:
+            return
+
+        loop = asyncio.get_running_loop()
+        sock = None
+        if not self.loopback:
+            try:
+                sock = self._multicast_socket()
+                self.mode = "multicast"
+                self.targets = [(self.group, self.port)]
+            except OSError as e:
+                log.warning("Multicast unavailable (%s); using loopback peers", e)
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.bind(("127.0.0.1", self.port))
+            self.mode = "loopback"
+            self.targets = list(self.peer_addresses)
+
+        await loop.create_datagram_endpoint(lambda: self, sock=sock)
+        self._ping_task = asyncio.create_task(self.run_pings())
+        log.info("Node sync: %s on %s port %d", self.node_id, self.mode, self.address[1])
+
+    def _multicast_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            # Several nodes on one machine all listen on the group port
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, "SO_REUSEPORT"):
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(("", self.port))
+            membership = struct.pack("4s4s", socket.inet_aton(self.group), socket.inet_aton("0.0.0.0"))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    @property
+    def address(self) -> Address:
+        """Local socket address."""
+        return self.transport.get_extra_info("sockname")[:2] if self.transport else ("", 0)
+
+    def add_peer(self, host: str, port: int):
+        """Send to another node directly (loopback mode)."""
+        if (host, port) not in self.targets:
+            self.targets.append((host, port))
+
+    def stop(self):
+        """Stop pinging and close the socket."""
+        if self._ping_task:
+            self._ping_task.cancel()
+            self._ping_task = None
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+
+    # asyncio.DatagramProtocol interface
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+    def error_received(self, exc):
+        self.errors += 1
+
+    def datagram_received(self, data: bytes, addr: Address):
+        received_at = self.clock()
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get("p") != PROTOCOL:
+            return
+        node = message.get("node")
+        if node == self.node_id or message.get("to", self.node_id) != self.node_id:
+            return
+
+        self.received += 1
+        peer = self._peer(node)
+        peer.address = addr
+        peer.last_seen = received_at
+
+        handler = getattr(self, f"_on_{message.get('type')}", None)
+        if handler:
+            try:
+                handler(node, message, received_at)
+            except (KeyError, TypeError, ValueError) as e:
+                log.warning("Bad sync message from %s: %s", node, e)
+
+    # Messages
+
+    def _send(self, message: dict):
+        if not self.transport:
+            return
+        message.update(p=PROTOCOL, node=self.node_id)
+        data = json.dumps(message, separators=(",", ":")).encode()
+        for target in self.targets:
+            self.transport.sendto(data, target)
+            self.sent += 1
+
+    def _peer(self, node: str) -> PeerClock:
+        peer = self.peers.get(node)
+        if peer is None:
+            peer = self.peers[node] = PeerClock()
+        return peer
+
+    def ping(self):
+        """Start one clock-offset exchange with every peer."""
+        self._send({"type": "ping", "t0": self.clock()})
+
+    async def run_pings(self):
+        """Keep clock offsets fresh."""
+        while True:
+            self.ping()
+            await asyncio.sleep(self.ping_interval)
+
+    def _on_ping(self, node: str, message: dict, received_at: float):
+        self._send({
+            "type": "pong",
+            "to": node,
+            "t0": message["t0"],
+            "t1": received_at,
+            "t2": self.clock(),
+        })
+
+    def _on_pong(self, node: str, message: dict, received_at: float):
+        self._peer(node).add(message["t0"], message["t1"], message["t2"], received_at)
+
+    def register_trigger_callback(self, callback: Callable[[str, str, float], None]):
+        """Register ``callback(box, trigger_id, start_at)`` for triggers from
+        other nodes; ``start_at`` is on the local clock."""
+        self.trigger_callbacks.append(callback)
+
+    def announce(self, box: str) -> Tuple[str, float]:
+        """Schedule a trigger on every node; returns its id and local start time."""
+        trigger_id = f"{self.node_id}-{next(self._ids)}"
+        now = self.clock()
+        start_at = now + self.lead
+        self._track(trigger_id, self.node_id, box)
+        for _ in range(self.repeats):
+            self._send({"type": "trigger", "id": trigger_id, "box": box, "start": start_at, "sent": now})
+        return trigger_id, start_at
+
+    def _on_trigger(self, node: str, message: dict, received_at: float):
+        trigger_id = message["id"]
+        if trigger_id in self.sequences:
+            return  # A repeat
+        self._track(trigger_id, node, message["box"])
+
+        peer = self._peer(node)
+        if peer.synced:
+            start_at = peer.to_local(message["start"])
+        else:
+            # No offset yet: assume the message took no time to arrive
+            start_at = received_at + message["start"] - message["sent"]
+
+        for callback in self.trigger_callbacks:
+            try:
+                callback(message["box"], trigger_id, start_at)
+            except Exception as e:
+                log.error("Error in sync trigger callback: %s", e)
+
+    def report(self, trigger_id: str, lateness: float):
+        """Report how late this node started a synchronized sequence."""
+        sequence = self.sequences.get(trigger_id)
+        if sequence is None:
+            return
+        uncertainty = 0.0
+        if sequence.origin != self.node_id:
+            uncertainty = self._peer(sequence.origin).uncertainty
+        sequence.reports[self.node_id] = (lateness, uncertainty)
+        self._send({"type": "report", "id": trigger_id, "late": lateness, "error": uncertainty})
+        self._log_skew(sequence)
+
+    def _on_report(self, node: str, message: dict, received_at: float):
+        sequence = self.sequences.get(message["id"])
+        if sequence is None:
+            return
+        sequence.reports[node] = (float(message["late"]), message["error"])
+        self._log_skew(sequence)
+
+    def _track(self, trigger_id: str, origin: str, box: str):
+        self.sequences[trigger_id] = SequenceSync(trigger_id, origin, box)
+        while len(self.sequences) > self.history:
+            self.sequences.popitem(last=False)
+
+    def _log_skew(self, sequence: SequenceSync):
+        # Once every node we know of has reported
+        if len(sequence.reports) == len(self.peers) + 1 and sequence.skew is not None:
+            log.info(
+                "Sequence %s: %d nodes, skew %.2f ms",
+                sequence.trigger_id, len(sequence.reports), sequence.skew * 1000,
+                extra={"fields": {"sequence": sequence.trigger_id, "skew_ms": sequence.skew * 1000}},
+            )
+
+    def get_stats(self) -> dict:
+        """Peer clock offsets and the skew of recent sequences."""
+        return {
+            "node": self.node_id,
+            "mode": self.mode,
+            "sent": self.sent,
+            "received": self.received,
+            "peers": {
+                node: {
+                    "offset_ms": round(peer.offset * 1000, 3),
+                    "uncertainty_ms": (
+                        None if peer.uncertainty is None else round(peer.uncertainty * 1000, 3)
+                    ),
+                    "samples": len(peer.samples),
+                    "last_seen_s": round(self.clock() - peer.last_seen, 1),
+                }
+                for node, peer in self.peers.items()
+            },
+            "sequences": [sequence.to_dict() for sequence in reversed(self.sequences.values())],
+        }
+
+
+def parse_address(address: str) -> Address:
+    """Parse ``host:port`` (or a bare port on 127.0.0.1)."""
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
@@ -1,11 +1,17 @@
 """State machine for scare sequence orchestration."""
 
 import asyncio
+import logging
 from enum import Enum
-from typing import Optional, Callable, List
+from typing import Optional, Awaitable, Callable, Dict, List, Tuple
 from dataclasses import dataclass
 import time
 
+from timeline import CompiledTimeline, Cue, Handler, Timeline, TimelineError, TimelinePlayer
+from utils.timing import DeadlineTimer
+
+log = logging.getLogger(__name__)
+
 
 class State(Enum):
     """System operational states."""
@@ -28,20 +34,48 @@ class StateChangeEvent:
     from_state: State
     to_state: State
     countdown_remaining: Optional[float] = None
+    lateness: Optional[float] = None  # How late the step fired, in seconds
+
+
+@dataclass(frozen=True)
+class SequencePhases:
+    """Offsets (seconds after the trigger) of each phase of a sequence."""
+    countdown_duration: float
+    countdown_steps: Tuple[float, ...]
+    active_at: float
+    reset_at: float
+    end_at: float
+
+
+CueProvider = Callable[[Timeline, Mode, SequencePhases], None]
 
 
 class StateMachine:
-    """Manages state transitions and scare sequence timing."""
+    """Manages state transitions and scare sequence timing.
+
+    Each sequence is a cue-list ``Timeline`` built per mode: state
+    transitions and countdown progress come from here, and registered cue
+    providers add hardware cues (lights, audio) to the same list. The
+    timeline is validated and compiled ahead of time and then played on one
+    deadline clock measured from the trigger, so a sequence takes its
+    configured length regardless of event-loop lag or slow callbacks.
+    """
+
+    COUNTDOWN_STEPS = 20
 
     def __init__(
         self,
         countdown_duration: float = 0.0,
         active_duration: float = 4.0,
         reset_duration: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
     ):
         self.countdown_duration = countdown_duration
         self.active_duration = active_duration
         self.reset_duration = reset_duration
+        self.timer = DeadlineTimer(clock, sleep)
+        self.player = TimelinePlayer(self.timer)
 
         self.current_state = State.NON_TRICK
         self.current_mode = Mode.CHILD
@@ -51,6 +85,13 @@ class StateMachine:
 
         self.state_change_callbacks: List[Callable[[StateChangeEvent], None]] = []
 
+        self.cue_handlers: Dict[str, Handler] = {
+            "state": self._enter_state,
+            "countdown": self._countdown_step,
+        }
+        self.cue_providers: List[CueProvider] = []
+        self._compiled: Dict[tuple, CompiledTimeline] = {}
+
     def set_mode(self, mode: Mode):
         """Set operating mode."""
         self.current_mode = mode
@@ -64,64 +105,139 @@ class StateMachine:
         return self.current_mode
 
     def can_trigger(self) -> bool:
-        """Check if trigger is allowed in current state."""
+        """Check if trigger is allowed in current state.
+
+        A sequence scheduled to start later counts as running.
+        """
+        if self.sequence_task and not self.sequence_task.done():
+            return False
         return self.current_state == State.NON_TRICK
 
-    async def trigger_sequence(self):
-        """Trigger scare sequence if allowed."""
+    # Timelines
+
+    def register_cue_handler(self, action: str, handler: Handler):
+        """Handle cues named ``action``."""
+        self.cue_handlers[action] = handler
+        self.invalidate_timelines()
+
+    def register_cue_provider(self, provider: CueProvider):
+        """Add cues to every sequence built from now on."""
+        self.cue_providers.append(provider)
+        self.invalidate_timelines()
+
+    def invalidate_timelines(self):
+        """Drop compiled timelines, e.g. after anything they depend on changed."""
+        self._compiled.clear()
+
+    def phases(self) -> SequencePhases:
+        """Phase offsets for the current timing configuration."""
+        countdown = max(0.0, self.countdown_duration)
+        active_at = countdown
+        reset_at = active_at + max(0.0, self.active_duration)
+
+        steps: Tuple[float, ...] = ()
+        if countdown > 0:
+            step_duration = countdown / self.COUNTDOWN_STEPS
+            steps = tuple(step * step_duration for step in range(self.COUNTDOWN_STEPS))
+
+        return SequencePhases(
+            countdown_duration=countdown,
+            countdown_steps=steps,
+            active_at=active_at,
+            reset_at=reset_at,
+            end_at=reset_at + max(0.0, self.reset_duration),
+        )
+
+    def build_timeline(self, mode: Optional[Mode] = None) -> Timeline:
+        """Build the cue list for one sequence in ``mode``.
+
+        A zero countdown has no countdown steps. The sequence returns to
+        NON_TRICK at the end of the reset phase, or after the last cue if a
+        provider scheduled one later (e.g. a long audio clip).
+        """
+        mode = mode or self.current_mode
+        phases = self.phases()
+
+        cues = [Cue(0.0, "state", State.TRICK_COUNTDOWN)]
+        cues += [
+            Cue(at, "countdown", phases.countdown_duration - at)
+            for at in phases.countdown_steps
+        ]
+        cues += [
+            Cue(phases.active_at, "state", State.TRICK_ACTIVE),
+            Cue(phases.reset_at, "state", State.TRICK_RESET),
+        ]
+        timeline = Timeline(f"{mode.value}-sequence", cues, phases.end_at)
+
+        for provider in self.cue_providers:
+            provider(timeline, mode, phases)
+
+        timeline.duration = max([phases.end_at] + [cue.at for cue in timeline.cues])
+        timeline.cues.append(Cue(timeline.duration, "state", State.NON_TRICK))
+        timeline.cleanup.append(Cue(0.0, "state", State.NON_TRICK))
+        return timeline
+
+    def compiled_timeline(self, mode: Optional[Mode] = None) -> CompiledTimeline:
+        """The compiled timeline for ``mode``, built on first use."""
+        mode = mode or self.current_mode
+        key = (mode, self.countdown_duration, self.active_duration, self.reset_duration)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = self.build_timeline(mode).compile(self.cue_handlers)
+        return compiled
+
+    async def trigger_sequence(self, start_at: Optional[float] = None) -> bool:
+        """Trigger scare sequence if allowed; returns whether it started.
+
+        ``start_at`` schedules the start on this state machine's clock, e.g.
+        at an instant agreed with other nodes. A time already past starts
+        at once and shows up as lateness of the first cues.
+        """
         if not self.can_trigger():
-            print(f"Cannot trigger in state: {self.current_state.value}")
-            return
+            log.info("Cannot trigger in state: %s", self.current_state.value)
+            return False
 
         if self.sequence_task and not self.sequence_task.done():
-            print("Sequence already running")
-            return
-
-        self.sequence_task = asyncio.create_task(self._run_sequence())
+            log.info("Sequence already running")
+            return False
 
-    async def _run_sequence(self):
-        """Execute the complete scare sequence."""
         try:
-            # Phase 1: Countdown
-            await self._transition_to(State.TRICK_COUNTDOWN)
-            await self._countdown_phase()
-
-            # Phase 2: Active scare
-            await self._transition_to(State.TRICK_ACTIVE)
-            await asyncio.sleep(self.active_duration)
+            timeline = self.compiled_timeline()
+        except TimelineError as e:
+            log.error("Invalid scare sequence: %s", e)
+            return False
 
-            # Phase 3: Reset
-            await self._transition_to(State.TRICK_RESET)
-            await asyncio.sleep(self.reset_duration)
-
-            # Phase 4: Return to normal
-            await self._transition_to(State.NON_TRICK)
+        self.sequence_task = asyncio.create_task(self._run_sequence(timeline, start_at))
+        return True
 
+    async def _run_sequence(self, timeline: CompiledTimeline, start_at: Optional[float] = None):
+        """Execute the complete scare sequence."""
+        try:
+            await self.player.play(timeline, start_at)
         except asyncio.CancelledError:
-            print("Sequence cancelled")
-            await self._transition_to(State.NON_TRICK)
-
-    async def _countdown_phase(self):
-        """Execute countdown phase with progress updates."""
-        steps = 20
-        step_duration = self.countdown_duration / steps
+            log.info("Sequence cancelled")
 
-        for step in range(steps):
-            remaining = self.countdown_duration - (step * step_duration)
+    def _enter_state(self, state: State):
+        """Cue handler for state transitions."""
+        self._set_state(state, self.player.lateness)
 
-            # Notify listeners of countdown progress
-            event = StateChangeEvent(
-                timestamp=time.time(),
-                from_state=self.current_state,
-                to_state=self.current_state,
-                countdown_remaining=remaining,
-            )
-            self._notify_state_change(event)
-
-            await asyncio.sleep(step_duration)
+    def _countdown_step(self, remaining: float):
+        """Cue handler for countdown progress."""
+        # Notify listeners of countdown progress
+        event = StateChangeEvent(
+            timestamp=time.time(),
+            from_state=self.current_state,
+            to_state=self.current_state,
+            countdown_remaining=remaining,
+            lateness=self.player.lateness,
+        )
+        self._notify_state_change(event)
 
-    async def _transition_to(self, new_state: State):
+    async def _transition_to(self, new_state: State, lateness: Optional[float] = None):
         """Transition to new state and notify listeners."""
+        self._set_state(new_state, lateness)
+
+    def _set_state(self, new_state: State, lateness: Optional[float] = None):
         old_state = self.current_state
         self.current_state = new_state
 
@@ -129,10 +245,14 @@ class StateMachine:
             timestamp=time.time(),
             from_state=old_state,
             to_state=new_state,
+            lateness=lateness,
         )
 
         self._notify_state_change(event)
-        print(f"State: {old_state.value} -> {new_state.value}")
+        log.debug(
+            "State: %s -> %s", old_state.value, new_state.value,
+            extra={"fields": {"lateness_ms": None if lateness is None else lateness * 1000}},
+        )
 
     def register_state_change_callback(
         self, callback: Callable[[StateChangeEvent], None]
@@ -149,7 +269,7 @@ class StateMachine:
                 if asyncio.iscoroutine(result):
                     asyncio.create_task(result)
             except Exception as e:
-                print(f"Error in state change callback: {e}")
+                log.error("Error in state change callback: %s", e)
 
     def update_timing(
         self,
@@ -164,11 +284,18 @@ class StateMachine:
             self.active_duration = active_duration
         if reset_duration is not None:
             self.reset_duration = reset_duration
+        self.invalidate_timelines()
+
+    def get_timing_stats(self) -> dict:
+        """How late sequence steps and cues fired relative to their deadlines."""
+        return {**self.timer.get_stats(), "cues": self.player.get_stats()}
 
     async def stop(self):
         """Stop any running sequence and reset to normal."""
         if self.sequence_task and not self.sequence_task.done():
             self.sequence_task.cancel()
-            await asyncio.sleep(0.1)
+            await asyncio.wait([self.sequence_task])
 
-        await self._transition_to(State.NON_TRICK)
+        # A finished or cancelled sequence may already have reset
+        if self.current_state != State.NON_TRICK:
+            await self._transition_to(State.NON_TRICK)
@@ -5,3 +5,16 @@ from pathlib import Path
 
 # Add parent directory to path so we can import backend modules
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from backend.hardware.lifx_simulator import LifxSimulator
+
+
+@pytest.fixture
+async def simulator():
+    """Three emulated single-zone LIFX bulbs on localhost."""
+    sim = LifxSimulator(count=3, zones=1)
+    await sim.start()
+    yield sim
+    sim.stop()
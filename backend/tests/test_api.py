@@ -93,6 +93,115 @@ async def test_get_events(client):
     assert isinstance(data["events"], list)
 
 
+@pytest.mark.asyncio
+async def test_get_events_filtered(client):
+    """Test events can be filtered by level and category."""
+    from api import routes
+
+    routes.controller.event_logger.error(routes.EventCategory.TRIGGER, "Filtered trigger error")
+
+    response = await client.get("/api/events?limit=1&level=error&category=trigger")
+    assert [event["message"] for event in response.json()["events"]] == ["Filtered trigger error"]
+
+    assert (await client.get("/api/events?category=nonsense")).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_events_page_by_cursor(client, tmp_path):
+    """Test since/before cursors, reaching into the store past the in-memory history."""
+    # main.py imports these as top-level modules
+    from api import routes
+    from utils import EventLogger, EventCategory
+    from utils.event_store import EventStore
+
+    store = EventStore(tmp_path / "events.db")
+    store.start()
+    logger = EventLogger(max_events=5)
+    logger.attach_store(store)
+    for i in range(12):
+        logger.info(EventCategory.TRIGGER if i % 2 else EventCategory.STATE, f"Event {i + 1}")
+    store.flush()
+
+    previous = routes.controller.event_logger
+    routes.controller.event_logger = logger
+    try:
+        latest = (await client.get("/api/events?limit=3")).json()
+        assert [event["id"] for event in latest["events"]] == [10, 11, 12]
+        assert (latest["next_cursor"], latest["prev_cursor"]) == (12, 10)
+
+        # Polling: nothing new, then only the new event
+        polled = (await client.get("/api/events?since=12")).json()
+        assert (polled["events"], polled["next_cursor"]) == ([], 12)
+        logger.info(EventCategory.STATE, "Event 13")
+        polled = (await client.get("/api/events?since=12")).json()
+        assert [event["message"] for event in polled["events"]] == ["Event 13"]
+
+        # Paging back past the five events in memory
+        page = (await client.get("/api/events?limit=4&before=10")).json()
+        assert [event["id"] for event in page["events"]] == [6, 7, 8, 9]
+        page = (await client.get("/api/events?limit=4&category=trigger&before=6")).json()
+        assert [event["id"] for event in page["events"]] == [2, 4]
+
+        # A poller that fell behind the in-memory history catches up from the store
+        behind = (await client.get("/api/events?since=3&limit=3")).json()
+        assert [event["id"] for event in behind["events"]] == [4, 5, 6]
+        assert behind["next_cursor"] == 6
+    finally:
+        routes.controller.event_logger = previous
+        store.stop()
+
+
+@pytest.mark.asyncio
+async def test_export_streams_the_stored_history(client, tmp_path):
+    """Test NDJSON and CSV exports read every stored event, with filters."""
+    import csv
+    import json
+    from api import routes
+    from utils import EventLogger, EventCategory
+    from utils.event_store import EventStore
+
+    store = EventStore(tmp_path / "events.db")
+    store.start()
+    logger = EventLogger(max_events=5)
+    logger.attach_store(store)
+    for i in range(12):
+        logger.info(EventCategory.TRIGGER if i % 2 else EventCategory.STATE, f"Event {i + 1}", {"i": i})
+
+    previous = routes.controller.event_logger
+    routes.controller.event_logger = logger
+    try:
+        response = await client.get("/api/events/export?chunk_size=5")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [event["id"] for event in lines] == list(range(1, 13))
+        assert lines[0]["details"] == {"i": 0}
+
+        response = await client.get("/api/events/export?format=csv&category=trigger&chunk_size=2")
+        rows = list(csv.DictReader(response.text.splitlines()))
+        assert [row["message"] for row in rows] == [f"Event {i}" for i in range(2, 13, 2)]
+        assert json.loads(rows[0]["details"]) == {"i": 1}
+
+        assert (await client.get("/api/events/export?format=xml")).status_code == 400
+    finally:
+        routes.controller.event_logger = previous
+        store.stop()
+
+
+@pytest.mark.asyncio
+async def test_event_rollup(client):
+    """Test per-minute counts come back as fixed-length series."""
+    from api import routes
+
+    routes.controller.event_logger.info(routes.EventCategory.TRIGGER, "Rollup trigger")
+
+    rollup = (await client.get("/api/events/rollup?resolution=1m&buckets=10")).json()
+    assert rollup["seconds"] == 60.0
+    assert len(rollup["total"]) == 10
+    assert rollup["by_category"]["trigger"][-1] >= 1
+
+    assert (await client.get("/api/events/rollup?resolution=1d")).status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_get_event_stats(client):
     """Test getting event statistics."""
@@ -105,5 +214,16 @@ async def test_get_event_stats(client):
     assert "by_category" in data
 
 
+@pytest.mark.asyncio
+async def test_get_websocket_stats(client):
+    """Test the WebSocket send queue statistics."""
+    response = await client.get("/api/websocket")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["queue_size"] > 0
+    assert data["clients"] == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""Tests for hosting several boxes in one process."""
+
+import pytest
+import asyncio
+import json
+from httpx import AsyncClient
+from backend.box_manager import BoxManager
+from backend.config import BoxConfig
+from backend.hardware.lifx_protocol import MessageType
+from backend.hardware.microphone import AudioData
+from backend.main import app
+from backend.utils.event_logger import Event, EventLevel, EventCategory
+from backend.websocket.manager import ConnectionManager
+
+
+@pytest.fixture
+def boxes():
+    """A porch box with one named bulb and a yard box taking the rest."""
+    return BoxManager([
+        BoxConfig(name="porch", lights=["Sim 1"], trigger_amplitude_threshold=0.5),
+        BoxConfig(name="yard", mode="adult", trigger_frequency_min=2000.0,
+                  trigger_frequency_max=3000.0),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_bulbs_are_shared_out(boxes, simulator):
+    """Test boxes drive their own bulbs over the one shared socket."""
+    await boxes.lights.client.open(("127.0.0.1", 0))
+    boxes.lights.devices = simulator.devices
+    boxes._assign_lights()
+
+    porch, yard = boxes.boxes["porch"], boxes.boxes["yard"]
+    assert [device.label for device in porch.lights.devices] == ["Sim 1"]
+    assert [device.label for device in yard.lights.devices] == ["Sim 2", "Sim 3"]
+    assert porch.lights.client is yard.lights.client
+    assert porch.lights.commands is yard.lights.commands
+
+    porch.lights.trigger_flash()
+    await asyncio.sleep(0.02)
+    flashed = [
+        bulb.label for bulb in simulator.bulbs
+        if any(message.type == MessageType.LIGHT_SET_COLOR for message in bulb.received)
+    ]
+    assert flashed == ["Sim 1"]
+
+    boxes.lights.client.close()
+
+
+def test_boxes_share_a_microphone_with_their_own_profiles(boxes):
+    """Test each box matches triggers against its own profile."""
+    assert len(boxes.microphones) == 1
+    microphone = boxes.default.microphone
+    squeak = AudioData(timestamp=0.0, rms=0.6, peak=0.7, frequency_peak=1000.0, triggered=True)
+    whistle = AudioData(timestamp=0.0, rms=0.9, peak=1.0, frequency_peak=2500.0, triggered=False)
+
+    matches = {
+        box.name: [profile.matches(squeak), profile.matches(whistle)]
+        for box in boxes.boxes.values()
+        for callback, profile in microphone.trigger_callbacks
+        if callback == box._on_audio_trigger
+    }
+
+    assert matches == {"porch": [True, False], "yard": [False, True]}
+    assert boxes.boxes["yard"].state_machine.get_mode().value == "adult"
+
+
+@pytest.mark.asyncio
+async def test_api_is_namespaced_per_box(boxes):
+    """Test /api/boxes/<name> routes reach that box and /api the default one."""
+    # main.py imports the routes as a top-level module
+    from api import routes
+
+    previous = routes.controller
+    routes.set_controller(boxes)
+    try:
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            listed = (await client.get("/api/boxes")).json()
+            assert [box["name"] for box in listed["boxes"]] == ["porch", "yard"]
+
+            assert (await client.get("/api/boxes/yard/mode")).json() == {"mode": "adult"}
+            assert (await client.get("/api/mode")).json() == {"mode": "child"}
+            assert (await client.get("/api/boxes/attic/state")).status_code == 404
+
+            config = (await client.get("/api/boxes/yard/config")).json()
+            assert config["audio"]["trigger_frequency_min"] == 2000.0
+    finally:
+        routes.set_controller(previous)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+@pytest.mark.asyncio
+async def test_websocket_streams_are_namespaced():
+    """Test box subscribers only get their box's messages."""
+    manager = ConnectionManager()
+    everything, porch, yard = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(everything)
+    await manager.connect(porch, "porch")
+    await manager.connect(yard, "yard")
+
+    await manager.broadcast_state_change({"to": "active"}, "porch")
+    await manager.broadcast_notification("info", "Hello", "everyone")
+    event = Event(1.0, EventLevel.INFO, EventCategory.TRIGGER, "Triggered", {"box": "yard"}, id=7)
+    await manager.broadcast_event(event, "yard")
+    for _ in range(3):
+        await asyncio.sleep(0)  # Let each client's sender run
+
+    assert [message["type"] for message in everything.sent] == ["state_change", "notification", "event"]
+    assert [message["type"] for message in porch.sent] == ["state_change", "notification"]
+    assert [message["type"] for message in yard.sent] == ["notification", "event"]
+    assert porch.sent[0]["box"] == "porch"
+    assert yard.sent[1] == {"type": "event", "data": event.to_dict(), "box": "yard"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
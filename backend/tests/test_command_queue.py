@@ -0,0 +1,103 @@
+"""Tests for the per-device LIFX command queue."""
+
+import pytest
+import asyncio
+from backend.hardware.command_queue import CommandQueue, TokenBucket
+from backend.hardware.lifx_protocol import LifxClient, MessageType
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+async def queue(simulator):
+    """CommandQueue at 10 messages/s on a manual clock."""
+    client = LifxClient()
+    await client.open(("127.0.0.1", 0))
+    clock = FakeClock()
+
+    yield CommandQueue(client, rate=10.0, burst=2.0, clock=clock), clock, simulator
+
+    client.close()
+
+
+def test_token_bucket_refills_at_rate():
+    """Test the bucket allows a burst then one token per 1/rate seconds."""
+    bucket = TokenBucket(rate=10.0, burst=2.0, now=0.0)
+
+    assert bucket.take(0.0) and bucket.take(0.0)
+    assert not bucket.take(0.0)
+    assert bucket.wait_time(0.0) == pytest.approx(0.1)
+    assert bucket.take(0.1)
+    assert bucket.take(0.1, debt=2.0)
+
+
+@pytest.mark.asyncio
+async def test_color_frames_coalesce_latest_wins(queue):
+    """Test unsent colour state is replaced instead of queued behind."""
+    commands, clock, simulator = queue
+    device, bulb = simulator.devices[0], simulator.bulbs[0]
+
+    for brightness in range(5):
+        payload = bytes(1) + (brightness * 1000).to_bytes(2, "little") * 4 + bytes(4)
+        commands.submit_color(device, [(MessageType.LIGHT_SET_COLOR, payload)])
+
+    assert commands.sent == 2
+    assert commands.coalesced == 2
+    assert commands.get_stats()["pending"] == 1
+
+    clock.now = 0.1
+    assert commands.flush() == 1
+    await asyncio.sleep(0.02)
+    assert len(bulb.received) == 3
+    assert bulb.color[2] == 4000
+
+
+@pytest.mark.asyncio
+async def test_urgent_commands_jump_the_queue(queue):
+    """Test power goes out ahead of pending colour, borrowing tokens."""
+    commands, clock, simulator = queue
+    device, bulb = simulator.devices[0], simulator.bulbs[0]
+    color = [(MessageType.LIGHT_SET_COLOR, bytes(13))]
+
+    for _ in range(3):
+        commands.submit_color(device, color)
+    commands.submit_urgent(device, MessageType.LIGHT_SET_POWER, bytes(6))
+    await asyncio.sleep(0.02)
+
+    assert [m.type for m in bulb.received] == [
+        MessageType.LIGHT_SET_COLOR,
+        MessageType.LIGHT_SET_COLOR,
+        MessageType.LIGHT_SET_POWER,
+    ]
+    assert commands.get_stats()["pending"] == 1
+
+    # Borrowed tokens are repaid before colour state flows again
+    clock.now = 0.1
+    assert commands.flush() == 0
+    clock.now = 0.2
+    assert commands.flush() == 1
+
+
+@pytest.mark.asyncio
+async def test_urgent_overflow_is_counted(queue):
+    """Test urgent commands beyond the queue limit drop the oldest."""
+    commands, _, simulator = queue
+    device = simulator.devices[0]
+
+    for _ in range(4 + commands.urgent_limit + 3):
+        commands.submit_urgent(device, MessageType.LIGHT_SET_POWER, bytes(6))
+
+    stats = commands.get_stats()
+    assert stats["sent"] == 4
+    assert stats["pending"] == commands.urgent_limit
+    assert stats["dropped"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
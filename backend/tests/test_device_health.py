@@ -0,0 +1,64 @@
+"""Tests for per-device health tracking and circuit breakers."""
+
+import pytest
+from backend.hardware.device_health import BreakerState, HealthTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """Test the breaker trips only after the failure threshold."""
+    health = HealthTracker(failure_threshold=3, clock=FakeClock())
+
+    assert not health.record_failure("a")
+    health.record_success("a", 0.01)
+    assert not health.record_failure("a")
+    assert not health.record_failure("a")
+    assert health.record_failure("a")
+
+    assert not health.is_available("a")
+    assert health.get("a").state == BreakerState.OPEN
+    assert health.get_stats()["trips"] == 1
+
+
+def test_probes_back_off_exponentially():
+    """Test failed probes double the wait up to the maximum."""
+    clock = FakeClock()
+    health = HealthTracker(failure_threshold=1, base_backoff=1.0, max_backoff=4.0, clock=clock)
+    health.record_failure("a")
+
+    waits = []
+    for _ in range(4):
+        assert not health.due_for_probe("a")
+        waits.append(health.next_probe_in())
+        clock.now += health.next_probe_in()
+        assert health.due_for_probe("a")
+        assert health.get("a").state == BreakerState.HALF_OPEN
+        health.record_failure("a")
+
+    assert waits == [1.0, 2.0, 4.0, 4.0]
+
+
+def test_successful_probe_closes_breaker():
+    """Test a reply closes the breaker and updates the latency EWMA."""
+    clock = FakeClock()
+    health = HealthTracker(failure_threshold=1, alpha=0.5, clock=clock)
+    health.record_success("a", 0.010)
+    health.record_failure("a")
+    clock.now = 1.0
+
+    assert health.due_for_probe("a")
+    assert health.record_success("a", 0.030)
+    assert health.is_available("a")
+    assert health.get("a").latency_ewma == pytest.approx(0.020)
+    assert health.get_stats()["recoveries"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,7 +1,8 @@
 """Tests for event logger."""
 
+import json
 import pytest
-from backend.utils.event_logger import EventLogger, EventLevel, EventCategory
+from backend.utils.event_logger import Event, EventLogger, EventLevel, EventCategory
 
 
 def test_event_logger_initialization():
@@ -61,6 +62,62 @@ def test_event_logger_limit():
     assert events[-1].message == "Message 9"
 
 
+def test_indexes_follow_eviction():
+    """Test filtered queries and stats only cover the retained history."""
+    logger = EventLogger(max_events=6)
+
+    for i in range(10):
+        category = EventCategory.TRIGGER if i % 3 == 0 else EventCategory.STATE
+        logger.info(category, f"Message {i}")
+    logger.error(EventCategory.TRIGGER, "Trigger failed")
+
+    # Retained: 5..9 and the error
+    triggers = logger.get_events(category=EventCategory.TRIGGER)
+    assert [e.message for e in triggers] == ["Message 6", "Message 9", "Trigger failed"]
+    assert [e.message for e in logger.get_events(limit=2, category=EventCategory.TRIGGER)] == [
+        "Message 9", "Trigger failed",
+    ]
+    assert logger.get_events(level=EventLevel.ERROR, category=EventCategory.TRIGGER)[0].message == "Trigger failed"
+    assert logger.get_events(level=EventLevel.WARNING) == []
+
+    assert logger.get_stats() == {
+        "total_events": 6,
+        "by_level": {"info": 5, "error": 1},
+        "by_category": {"trigger": 3, "state": 3},
+    }
+
+    logger.clear()
+    assert logger.get_stats()["by_category"] == {}
+    assert logger.get_events(category=EventCategory.TRIGGER) == []
+
+
+def test_cursors():
+    """Test event IDs page forwards with since and backwards with before."""
+    logger = EventLogger()
+    for i in range(10):
+        logger.info(EventCategory.SYSTEM, f"Message {i}")
+
+    assert [e.id for e in logger.get_events(limit=3)] == [8, 9, 10]
+    assert [e.id for e in logger.get_events(limit=3, since=4)] == [5, 6, 7]
+    assert [e.id for e in logger.get_events(since=8)] == [9, 10]
+    assert logger.get_events(since=10) == []
+    assert [e.id for e in logger.get_events(limit=3, before=8)] == [5, 6, 7]
+    assert [e.id for e in logger.get_events(before=3)] == [1, 2]
+
+
+def test_truncated_only_after_an_eviction():
+    """Test a full history is not truncated until an event is actually evicted."""
+    logger = EventLogger(max_events=3)
+    for i in range(3):
+        logger.info(EventCategory.SYSTEM, f"Message {i}")
+    assert logger.truncated is False
+
+    logger.info(EventCategory.SYSTEM, "Message 3")
+    assert logger.truncated is True
+    logger.clear()
+    assert logger.truncated is False
+
+
 def test_event_logger_callbacks():
     """Test event callbacks."""
     logger = EventLogger()
@@ -96,5 +153,20 @@ def test_event_logger_stats():
     assert stats["by_category"]["system"] == 2
 
 
+def test_event_record_is_compact_and_caches_json():
+    """Test events have no __dict__, share enum members and serialize once."""
+    event = Event(12.5, "info", "trigger", "Scare sequence triggered", {"box": "porch"}, id=3)
+
+    assert not hasattr(event, "__dict__")
+    assert event.level is EventLevel.INFO
+    assert event.category is EventCategory.TRIGGER
+    assert json.loads(event.to_json()) == event.to_dict()
+    assert event.to_json() is event.to_json()
+
+    # Renumbering (as when a store is attached) invalidates the cached JSON
+    event.id = 4
+    assert json.loads(event.to_json())["id"] == 4
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
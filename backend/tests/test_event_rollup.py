@@ -0,0 +1,57 @@
+"""Tests for time-bucketed event rollups."""
+
+import pytest
+from backend.utils.event_rollup import EventRollups, RollupRing
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ring_reuses_slots_as_time_moves_on():
+    """Test counts land in their bucket and expire when the ring wraps."""
+    ring = RollupRing(1.0, 4, ["total"])
+    for timestamp in (10.2, 10.7, 11.5, 13.0):
+        ring.add(timestamp, ["total"])
+
+    assert ring.series(13.5)["counts"]["total"] == [2, 1, 0, 1]
+    assert ring.series(13.5)["start"] == 10.0
+
+    # Bucket 14 takes bucket 10's slot; bucket 10 is now out of reach
+    ring.add(14.1, ["total"])
+    ring.add(10.9, ["total"])
+    assert ring.series(14.5)["counts"]["total"] == [1, 0, 1, 1]
+    assert ring.series(14.5, buckets=2)["counts"]["total"] == [1, 1]
+
+
+def test_rollups_by_level_and_category():
+    """Test every resolution counts totals, levels and categories."""
+    clock = FakeClock(3600.0 * 5 + 120.7)
+    rollups = EventRollups(["info", "error"], ["trigger", "system"], clock=clock)
+    rollups.add(clock.now - 0.5, "info", "trigger")
+    rollups.add(clock.now - 0.5, "error", "trigger")
+    rollups.add(clock.now - 30.0, "info", "system")
+    rollups.add(clock.now - 90.0, "info", "trigger")
+
+    seconds = rollups.get("1s", buckets=60)
+    assert seconds["seconds"] == 1.0
+    assert seconds["total"][-1] == 2
+    assert seconds["total"][-31] == 1
+    assert sum(seconds["total"]) == 3  # 90 s ago is out of range
+
+    minutes = rollups.get("1m", buckets=3)
+    assert minutes["total"] == [1, 1, 2]
+    assert minutes["by_category"] == {"trigger": [1, 0, 2], "system": [0, 1, 0]}
+    assert minutes["by_level"]["error"] == [0, 0, 1]
+
+    hours = rollups.get("1h", buckets=1)
+    assert hours["total"] == [4]
+    assert len(rollups.get("1h")["total"]) == 48
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
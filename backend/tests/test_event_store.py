@@ -0,0 +1,231 @@
+"""Tests for the on-disk event store."""
+
+import pytest
+import sqlite3
+import threading
+from backend.utils.event_logger import Event, EventLogger, EventLevel, EventCategory
+from backend.utils.event_store import EventStore
+
+
+def make_event(i: int, category: EventCategory = EventCategory.SYSTEM) -> Event:
+    return Event(
+        timestamp=1000.0 + i,
+        level=EventLevel.INFO,
+        category=category,
+        message=f"event {i}",
+        details={"i": i},
+        id=i + 1,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(tmp_path / "events.db", batch_size=100, flush_interval=0.05)
+    yield store
+    store.stop()
+
+
+def test_events_are_written_in_batches(store):
+    """Test queued events reach the database in a few transactions."""
+    store.start()
+    for i in range(500):
+        store.append(make_event(i, EventCategory.TRIGGER if i % 10 == 0 else EventCategory.SYSTEM))
+
+    assert store.flush() is True
+    stats = store.get_stats()
+    assert stats["written"] == 500
+    assert stats["batches"] <= 10
+    assert stats["queue_depth"] == 0
+
+    triggers = store.query(limit=3, category=EventCategory.TRIGGER)
+    assert [event.message for event in triggers] == ["event 470", "event 480", "event 490"]
+    assert triggers[-1].details == {"i": 490}
+    assert len(store.query(limit=None, start=1100.0, end=1200.0)) == 100
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    """Test appends never block: overflowing events are dropped and counted."""
+    store = EventStore(tmp_path / "events.db", max_queue=5)
+    results = [store.append(make_event(i)) for i in range(8)]
+
+    assert results == [True] * 5 + [False] * 3
+    assert store.get_stats()["overflowed"] == 3
+
+    store.start()
+    store.stop()
+    assert store.written == 5
+
+
+def test_conflicting_id_costs_only_its_own_event(store):
+    """Test an ID already stored is skipped without losing the rest of its batch."""
+    store.start()
+    store.append(make_event(0))
+    store.flush()
+
+    for i in (1, 0, 2):
+        store.append(make_event(i))
+    store.flush()
+
+    assert [event.id for event in store.query()] == [1, 2, 3]
+    stats = store.get_stats()
+    assert (stats["written"], stats["conflicts"], stats["errors"]) == (3, 1, 0)
+
+
+def test_rotation_keeps_the_newest_files(tmp_path):
+    """Test the database rotates past its size limit and old files are pruned."""
+    store = EventStore(tmp_path / "events.db", max_bytes=1, keep=2)
+    store.start()
+    for i in range(4):
+        store.append(make_event(i))
+        store.flush()
+
+    assert store.rotations == 4
+    assert len(store.rotated_files()) == 2
+    assert store.query() == []  # The current database is new and empty
+
+
+def test_chunks_cover_rotated_files_in_order(tmp_path):
+    """Test chunked reads walk rotated files then the current one, oldest first."""
+    store = EventStore(tmp_path / "events.db", max_bytes=1)
+    store.start()
+    for i in range(10):
+        store.append(make_event(i))
+    store.flush()  # Rotates after writing
+    store.max_bytes = 1 << 30
+    for i in range(10, 25):
+        store.append(make_event(i, EventCategory.TRIGGER if i % 2 else EventCategory.SYSTEM))
+    store.flush()
+    store.stop()
+
+    chunks = list(store.iter_chunks(chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2, 4, 4, 4, 3]
+    assert [event.id for chunk in chunks for event in chunk] == list(range(1, 26))
+
+    triggers = [event.id for chunk in store.iter_chunks(4, category=EventCategory.TRIGGER) for event in chunk]
+    assert triggers == [12, 14, 16, 18, 20, 22, 24]
+    timed = [event.id for chunk in store.iter_chunks(4, start=1005.0, end=1012.0) for event in chunk]
+    assert timed == list(range(6, 13))
+
+
+def test_rotation_waits_for_an_export(tmp_path):
+    """Test a rotation due mid-export is held off until the export finishes."""
+    store = EventStore(tmp_path / "events.db", max_bytes=1)
+    store.rotate_wait = 0.05
+    store.start()
+    store.max_bytes = 1 << 30
+    for i in range(10):
+        store.append(make_event(i))
+    store.flush()
+    store.max_bytes = 1
+
+    reader = store.iter_chunks(chunk_size=4)
+    first = next(reader)
+    store.append(make_event(10))
+    store.flush()  # Would rotate the file being read
+    assert store.rotations == 0
+
+    rest = [event.id for chunk in reader for event in chunk]
+    assert [event.id for event in first] + rest == list(range(1, 12))
+
+    store.append(make_event(11))
+    store.flush()
+    store.stop()
+    assert store.rotations == 1
+
+
+def test_rotation_waits_for_open_queries(tmp_path):
+    """Test a database is not renamed under a reader and leaves no sidecar files behind."""
+    store = EventStore(tmp_path / "events.db", max_bytes=1)
+    store.rotate_wait = 0.05
+    store.start()
+
+    with store.reading():  # As a query does while it runs
+        store.append(make_event(0))
+        store.flush()
+        assert store.rotations == 0
+        assert [event.id for event in store.query()] == [1]
+
+    store.append(make_event(1))
+    store.flush()
+    assert store.rotations == 1
+    assert list(tmp_path.glob("events-*.db-*")) == []
+
+
+def test_queries_during_rotation_see_every_event(tmp_path):
+    """Test queries racing the writer neither fail nor lose events across rotations."""
+    store = EventStore(tmp_path / "events.db", max_bytes=1, keep=100)
+    store.start()
+    done = threading.Event()
+    errors = []
+
+    def poll():
+        while not done.is_set():
+            try:
+                store.query(limit=10)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    for i in range(30):
+        store.append(make_event(i))
+        store.flush()
+    done.set()
+    poller.join()
+    store.stop()
+
+    assert errors == []
+    assert store.rotations > 0
+    assert [event.id for chunk in store.iter_chunks() for event in chunk] == list(range(1, 31))
+
+
+def test_unreadable_database_is_an_error(tmp_path):
+    """Test a missing database reads as empty but a corrupt one raises."""
+    store = EventStore(tmp_path / "events.db")
+    assert store.query() == []
+    assert list(store.iter_chunks()) == []
+
+    (tmp_path / "events.db").write_bytes(b"not a database" * 100)
+    with pytest.raises(sqlite3.DatabaseError):
+        list(store.iter_chunks())
+    with pytest.raises(sqlite3.DatabaseError):
+        EventLogger().attach_store(store)
+
+
+def test_logger_persists_without_writing_on_the_caller(store):
+    """Test logging only queues, and a new logger picks up the history."""
+    writer_threads = set()
+    write = store._write
+
+    def recording_write(batch):
+        writer_threads.add(threading.current_thread().name)
+        write(batch)
+
+    store._write = recording_write
+    store.start()
+    logger = EventLogger()
+    logger.attach_store(store)
+
+    logger.warning(EventCategory.HARDWARE, "Bulb offline", {"bulb": "Porch"})
+    logger.info(EventCategory.TRIGGER, "Scare sequence triggered")
+    assert store.flush() is True
+    assert writer_threads == {"event-store"}
+
+    # After a restart
+    restarted = EventLogger(max_events=10)
+    restarted.info(EventCategory.SYSTEM, "Initializing")
+    restarted.attach_store(store)
+    assert [event.message for event in restarted.events] == [
+        "Bulb offline", "Scare sequence triggered", "Initializing",
+    ]
+    assert restarted.events[0].details == {"bulb": "Porch"}
+    assert restarted.truncated is False
+
+    # A history longer than fits in memory counts as truncated without evicting
+    small = EventLogger(max_events=1)
+    small.attach_store(store)
+    assert small.truncated is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,226 @@
+"""Tests for the LIFX light controller."""
+
+import pytest
+import asyncio
+import struct
+from backend.hardware.discovery_cache import DiscoveryCache
+from backend.hardware.lifx_controller import LightController
+from backend.hardware.lifx_protocol import LifxClient, LifxDevice, MessageType
+
+
+@pytest.fixture
+async def lights(simulator):
+    """LightController wired to three simulated bulbs."""
+    client = LifxClient(timeout=0.1, retries=0)
+    await client.open(("127.0.0.1", 0))
+
+    controller = LightController(client)
+    controller.devices = simulator.devices
+
+    yield controller, simulator.bulbs
+
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_status_reads_do_not_touch_the_network(lights):
+    """Test get_status is served from the mirror."""
+    controller, bulbs = lights
+
+    status = controller.get_status()
+    await asyncio.sleep(0.02)
+
+    assert status["device_count"] == 3
+    assert all(len(bulb.received) == 0 for bulb in bulbs)
+    assert controller.get_status() is status
+
+
+@pytest.mark.asyncio
+async def test_sent_commands_update_the_mirror(lights):
+    """Test flash and power commands are reflected without polling."""
+    controller, _ = lights
+    version = controller.status_version
+
+    controller.initialize()
+    controller.trigger_flash(0.5)
+    status = controller.get_status()
+
+    assert controller.status_version > version
+    assert all(device["power"] for device in status["devices"])
+    assert status["devices"][0]["brightness"] == pytest.approx(0.5, abs=0.01)
+    assert status["devices"][0]["color"]["saturation"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_only_bumps_version_on_change(lights):
+    """Test background reconcile corrects the mirror from bulb replies."""
+    controller, bulbs = lights
+
+    assert await controller.reconcile() == 3
+    version = controller.status_version
+
+    assert await controller.reconcile() == 0
+    assert controller.status_version == version
+
+    bulbs[1].power = False
+    assert await controller.reconcile() == 1
+    assert controller.get_status()["devices"][1]["power"] is False
+
+
+
+@pytest.mark.asyncio
+async def test_flash_is_one_burst_with_recorded_skew(lights):
+    """Test flash reaches every bulb in one burst and records its skew."""
+    controller, bulbs = lights
+
+    record = controller.trigger_flash(1.0)
+    controller.engine.request_frame()
+    await asyncio.sleep(0.02)
+
+    assert record.devices == record.packets == 3
+    assert record.skew_us >= 0
+    assert controller.get_status()["last_flash"]["skew_us"] == record.skew_us
+    for bulb in bulbs:
+        assert [message.type for message in bulb.received] == [MessageType.LIGHT_SET_COLOR]
+
+
+@pytest.mark.asyncio
+async def test_glitch_is_one_waveform_per_bulb(lights):
+    """Test the countdown glitch runs on the bulbs rather than being streamed."""
+    controller, bulbs = lights
+
+    controller.start_glitch_effect(0.5)
+    controller.engine.request_frame()
+    await asyncio.sleep(0.02)
+
+    for bulb in bulbs:
+        assert bulb.waveforms == 1
+        assert [m.type for m in bulb.received] == [MessageType.LIGHT_SET_WAVEFORM_OPTIONAL]
+
+
+@pytest.mark.asyncio
+async def test_recovered_bulb_rejoins_a_running_glitch(lights):
+    """Test a bulb that comes back mid-glitch gets the waveform it missed."""
+    controller, bulbs = lights
+    controller.health.base_backoff = 0.0
+    bulbs[2].online = False
+    for _ in range(3):
+        await controller.reconcile()
+
+    controller.start_glitch_effect(0.5)
+    assert controller.engine.device_side is not None
+    waveforms = controller.engine.effect.waveform(controller.layout, controller.engine.rng)
+    assert controller.push_waveforms(waveforms) == 2  # The dead bulb is not counted
+    await asyncio.sleep(0.02)
+    assert bulbs[2].waveforms == 0
+
+    bulbs[2].online = True
+    assert await controller.probe_unhealthy() == 1
+    await asyncio.sleep(0.02)
+    assert bulbs[2].waveforms == 1
+
+
+@pytest.mark.asyncio
+async def test_dead_bulb_is_skipped_and_recovers(lights):
+    """Test an unplugged bulb trips its breaker without affecting the others."""
+    controller, bulbs = lights
+    controller.health.base_backoff = 0.0
+    bulbs[2].online = False
+
+    for _ in range(3):
+        await controller.reconcile()
+    assert [d.mac for d in controller.available_devices] == [b.mac for b in bulbs[:2]]
+    assert controller.get_status()["devices"][2]["available"] is False
+
+    # Sends and polls skip the dead bulb entirely
+    bulbs[2].received.clear()
+    controller.push_frame(controller.layout.blank())
+    await controller.reconcile()
+    await asyncio.sleep(0.02)
+    assert bulbs[2].received == []
+
+    bulbs[2].online = True
+    assert await controller.probe_unhealthy() == 1
+    assert controller.get_status()["devices"][2]["available"] is True
+    assert controller.get_stats()["health"]["recoveries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_health_changes_reach_controllers_sharing_the_tracker(lights):
+    """Test a bulb dropping out changes the status of every controller sharing its health."""
+    controller, bulbs = lights
+    box = LightController(controller.client, commands=controller.commands, health=controller.health)
+    box.set_devices(controller.devices)
+    status = box.get_status()
+    version = box.status_version
+
+    bulbs[2].online = False
+    for _ in range(3):
+        await controller.reconcile()
+
+    assert box.status_version > version
+    assert box.get_status() is not status
+    assert box.get_status()["devices"][2]["available"] is False
+
+
+@pytest.mark.asyncio
+async def test_probe_error_reopens_the_breaker(lights):
+    """Test a probe failing with a non-timeout error is retried later, not stuck half-open."""
+    controller, bulbs = lights
+    controller.health.base_backoff = 0.0
+    bulbs[2].online = False
+    for _ in range(3):
+        await controller.reconcile()
+
+    get_light_state = controller.client.get_light_state
+
+    async def malformed_reply(device, timeout=None, retries=None):
+        if device.mac == bulbs[2].mac:
+            raise struct.error("unpack requires a buffer of 52 bytes")
+        return await get_light_state(device, timeout, retries)
+
+    controller.client.get_light_state = malformed_reply
+    assert await controller.probe_unhealthy() == 0
+    assert controller.health.next_probe_in() == 0.0  # Open again, so still probed
+
+    controller.client.get_light_state = get_light_state
+    bulbs[2].online = True
+    assert await controller.probe_unhealthy() == 1
+
+
+@pytest.mark.asyncio
+async def test_connect_from_cache_skips_broadcast(lights, tmp_path):
+    """Test startup connects to cached bulbs and drops unreachable ones."""
+    known, bulbs = lights
+    dead = LifxDevice(mac="d0:73:d5:00:00:ff", ip="127.0.0.1", port=9, zone_count=16)
+    cache = DiscoveryCache(str(tmp_path / "lifx.json"))
+    cache.save(known.devices + [dead])
+
+    # A dead cached bulb gets one short try, not the client's default retries
+    known.client.timeout, known.client.retries = 0.5, 2
+    controller = LightController(known.client)
+    started = asyncio.get_running_loop().time()
+    count = await controller.connect(cache, verify_timeout=0.05)
+
+    assert count == 3
+    assert controller.time_to_first_light < 0.05
+    assert asyncio.get_running_loop().time() - started < 0.5
+    assert [d.mac for d in cache.load()] == [d.mac for d in known.devices]
+
+    await asyncio.sleep(0.02)
+    assert all(
+        any(message.type == MessageType.LIGHT_SET_POWER for message in bulb.received)
+        for bulb in bulbs
+    )
+
+
+def test_discovery_cache_ignores_corrupt_file(tmp_path):
+    """Test an unreadable cache is treated as empty."""
+    path = tmp_path / "lifx.json"
+    path.write_text("{not json")
+
+    assert DiscoveryCache(str(path)).load() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,130 @@
+"""Tests for the asyncio LIFX LAN protocol client."""
+
+import pytest
+import asyncio
+import struct
+from backend.hardware.lifx_simulator import LifxSimulator
+from backend.hardware.lifx_protocol import (
+    HEADER_SIZE,
+    LifxClient,
+    LifxDevice,
+    MessageType,
+    pack_message,
+    unpack_header,
+    set_color_payload,
+    set_extended_color_zones_payload,
+    decode_light_state,
+)
+
+
+def test_header_round_trip():
+    """Test packing and unpacking a header."""
+    packet = pack_message(
+        MessageType.LIGHT_SET_COLOR,
+        set_color_payload((1, 2, 3, 3500), 100),
+        target=bytes.fromhex("d073d5123456") + b"\x00\x00",
+        source=42,
+        sequence=7,
+        ack_required=True,
+    )
+
+    header = unpack_header(packet)
+
+    assert header.size == len(packet) == HEADER_SIZE + 13
+    assert header.type == MessageType.LIGHT_SET_COLOR
+    assert header.source == 42
+    assert header.sequence == 7
+    assert header.ack_required is True
+    assert header.res_required is False
+    assert header.mac == "d0:73:d5:12:34:56"
+
+
+def test_extended_zones_payload_is_fixed_size():
+    """Test extended multizone payload always carries 82 zone slots."""
+    payload = set_extended_color_zones_payload([(1, 2, 3, 4)] * 10)
+
+    assert len(payload) == 8 + 82 * 8
+    assert payload[7] == 10
+
+
+def test_sequence_wraps_per_device():
+    """Test sequence numbers are tracked per device and wrap at 256."""
+    client = LifxClient()
+
+    for _ in range(256):
+        client.next_sequence("aa")
+    assert client.next_sequence("aa") == 0
+    assert client.next_sequence("bb") == 0
+
+
+@pytest.mark.asyncio
+async def test_send_many_reaches_every_device():
+    """Test fan-out delivers one packet to each device."""
+    simulator = LifxSimulator(count=5, zones=1)
+    devices = await simulator.start()
+    client = LifxClient()
+    await client.open(("127.0.0.1", 0))
+
+    try:
+        sent = client.send_many(
+            devices,
+            MessageType.LIGHT_SET_COLOR,
+            set_color_payload((0, 0, 65535, 9000)),
+        )
+        await asyncio.sleep(0.05)
+
+        assert sent == 5
+        for bulb in simulator.bulbs:
+            assert len(bulb.received) == 1
+            assert bulb.received[0].type == MessageType.LIGHT_SET_COLOR
+            assert bulb.color == (0, 0, 65535, 9000)
+    finally:
+        client.close()
+        simulator.stop()
+
+
+@pytest.mark.asyncio
+async def test_request_matches_response(simulator):
+    """Test request waits for the matching LightState reply."""
+    bulb = simulator.bulbs[0]
+    bulb.color = (100, 200, 300, 3500)
+    client = LifxClient()
+    await client.open(("127.0.0.1", 0))
+
+    try:
+        state = await client.get_light_state(bulb.device)
+
+        assert state["label"] == "Sim 1"
+        assert state["power"] is True
+        assert state["color"] == (100, 200, 300, 3500)
+        assert client.pending == {}
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_request_times_out_without_reply():
+    """Test request raises after retries when nothing answers."""
+    client = LifxClient(timeout=0.02, retries=1)
+    await client.open(("127.0.0.1", 0))
+    device = LifxDevice(mac="d0:73:d5:00:00:09", ip="127.0.0.1", port=9)
+
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await client.request(device, MessageType.LIGHT_GET)
+    finally:
+        client.close()
+
+
+def test_decode_light_state_strips_label_padding():
+    """Test label decoding drops NUL padding."""
+    payload = struct.pack("<4HhH32sQ", 1, 2, 3, 4, 0, 0, b"Porch", 0)
+
+    state = decode_light_state(payload)
+
+    assert state["label"] == "Porch"
+    assert state["power"] is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,98 @@
+"""Tests for the local LIFX device simulator."""
+
+import pytest
+import asyncio
+import numpy as np
+from backend.hardware.lifx_controller import LightController
+from backend.hardware.lifx_protocol import LifxClient, MessageType
+from backend.hardware.lifx_simulator import LifxSimulator
+
+
+@pytest.mark.asyncio
+async def test_discovery_finds_every_simulated_device():
+    """Test broadcast discovery against the simulator's discovery port."""
+    simulator = LifxSimulator(count=4, zones=[1, 16, 16, 82])
+    await simulator.start()
+    client = LifxClient(timeout=0.1)
+    await client.open(("127.0.0.1", 0))
+
+    try:
+        found = await client.discover(
+            timeout=0.1, broadcast="127.0.0.1", port=simulator.discovery_port
+        )
+
+        assert sorted(d.mac for d in found) == sorted(d.mac for d in simulator.devices)
+        assert {d.port for d in found} == {d.port for d in simulator.devices}
+    finally:
+        client.close()
+        simulator.stop()
+
+
+@pytest.mark.asyncio
+async def test_multizone_bars_take_extended_zones():
+    """Test a frame pushed to simulated bars lands in every zone."""
+    simulator = LifxSimulator(count=2, zones=[1, 100])
+    await simulator.start()
+    client = LifxClient(timeout=0.1)
+    await client.open(("127.0.0.1", 0))
+    controller = LightController(client)
+
+    try:
+        await controller.connect(known=simulator.devices)
+        assert [d.zone_count for d in controller.devices] == [1, 100]
+
+        frame = controller.layout.blank()
+        frame[:, :, 2] = np.arange(100, dtype=np.uint16)[None, :] + 1
+        controller.push_frame(frame, 0)
+        await asyncio.sleep(0.05)
+
+        bar = simulator.bulbs[1]
+        assert list(bar.zones[:, 2]) == list(range(1, 101))
+        assert simulator.bulbs[0].color[2] == 1
+    finally:
+        client.close()
+        simulator.stop()
+
+
+@pytest.mark.asyncio
+async def test_messages_are_timestamped_and_loss_is_recorded():
+    """Test every packet is recorded, including the ones the simulator loses."""
+    simulator = LifxSimulator(count=1, zones=1, loss=0.5, seed=1)
+    devices = await simulator.start()
+    client = LifxClient()
+    await client.open(("127.0.0.1", 0))
+
+    try:
+        for _ in range(200):
+            client.send(devices[0], MessageType.LIGHT_SET_COLOR, b"\x00" * 13)
+        await asyncio.sleep(0.05)
+
+        stats = simulator.get_stats()
+        timestamps = [message.timestamp for message in simulator.messages]
+        assert stats["received"] == 200
+        assert 50 < stats["dropped"] < 150
+        assert timestamps == sorted(timestamps)
+    finally:
+        client.close()
+        simulator.stop()
+
+
+@pytest.mark.asyncio
+async def test_latency_delays_responses():
+    """Test replies arrive after the configured latency."""
+    simulator = LifxSimulator(count=1, zones=1, latency=0.05)
+    devices = await simulator.start()
+    client = LifxClient(timeout=0.5)
+    await client.open(("127.0.0.1", 0))
+
+    try:
+        started = asyncio.get_running_loop().time()
+        await client.get_light_state(devices[0])
+        assert asyncio.get_running_loop().time() - started >= 0.045
+    finally:
+        client.close()
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
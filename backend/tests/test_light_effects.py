@@ -0,0 +1,180 @@
+"""Tests for light effects and the frame-scheduled effect engine."""
+
+import pytest
+import asyncio
+import time
+import numpy as np
+from backend.hardware.light_frames import ZoneLayout
+from backend.hardware.lifx_protocol import Waveform
+from backend.hardware.light_effects import (
+    Effect,
+    EffectEngine,
+    ambient,
+    glitch,
+    flash,
+    fade,
+    to_hsbk,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_engine(layout, clock=None, fps=20.0, seed=1):
+    pushed = []
+
+    def push(frame, transition_ms):
+        pushed.append((frame, transition_ms))
+        return layout.device_count
+
+    engine = EffectEngine(push, lambda: layout, fps=fps, seed=seed, clock=clock or FakeClock())
+    return engine, pushed
+
+
+def test_effects_are_reproducible_with_seed():
+    """Test effect frames depend only on layout, time and RNG seed."""
+    layout = ZoneLayout([16, 1])
+    effect = glitch(0.7)
+
+    a = effect(layout, 0.5, np.random.default_rng(3))
+    b = effect(layout, 0.5, np.random.default_rng(3))
+
+    assert a.shape == (2, 16, 4)
+    assert np.array_equal(a, b)
+
+
+def test_fade_reaches_end_effect():
+    """Test fade starts at the first effect and ends at the second."""
+    layout = ZoneLayout([8])
+    start, end = flash(1.0), ambient()
+    effect = fade(start, end, duration=2.0)
+    rng = np.random.default_rng(0)
+
+    assert np.allclose(effect(layout, 0.0, rng), start(layout, 0.0, rng))
+    assert np.allclose(effect(layout, 2.0, rng), end(layout, 2.0, rng))
+
+
+def test_flash_is_white():
+    """Test flash converts to full-brightness white."""
+    frame = to_hsbk(flash(1.0)(ZoneLayout([4]), 0.0, None))
+
+    assert (frame[..., 1] == 0).all()
+    assert (frame[..., 2] == 65535).all()
+
+
+def test_play_duration_returns_to_base():
+    """Test a timed effect hands back to the base effect on the engine clock."""
+    clock = FakeClock()
+    engine, pushed = make_engine(ZoneLayout([4]), clock)
+    engine.set_base(ambient())
+    engine.play(flash(), duration=1.0)
+
+    engine._tick(clock.now)
+    assert engine.current.name == "flash"
+
+    clock.now += 1.0
+    engine._tick(clock.now)
+    assert engine.current.name == "ambient"
+    assert len(pushed) == 2
+
+
+def test_interval_limits_frames():
+    """Test effects are not re-pushed faster than their interval."""
+    clock = FakeClock()
+    engine, pushed = make_engine(ZoneLayout([4]), clock)
+    engine.set_base(ambient())  # interval 1.0
+
+    for _ in range(20):
+        engine._tick(clock.now)
+        clock.now += 0.05
+
+    assert len(pushed) == 1
+
+
+def test_glitch_runs_device_side_when_possible():
+    """Test a constant glitch is sent once as waveforms instead of streamed."""
+    clock = FakeClock()
+    engine, pushed = make_engine(ZoneLayout([16, 1]), clock)
+    sent = []
+    engine.push_waveforms = lambda waveforms: sent.append(waveforms) or len(waveforms)
+    engine.set_base(ambient())
+
+    engine.play(glitch(0.5))
+    for _ in range(40):
+        engine._tick(clock.now)
+        clock.now += 0.05
+
+    assert len(sent) == 1 and len(sent[0]) == 2
+    assert sent[0][0].waveform == Waveform.PULSE
+    assert pushed == []
+    assert engine.get_stats()["device_side"] is True
+
+    # A time-varying intensity cannot run on the bulbs, so it is streamed
+    engine.play(glitch(lambda t: 1.0 - t))
+    engine._tick(clock.now)
+    assert len(sent) == 1
+    assert len(pushed) == 1
+
+
+def test_device_side_glitch_is_renewed_before_it_runs_out():
+    """Test a glitch held past its waveform's cycles is sent again, not left dark."""
+    clock = FakeClock()
+    engine, pushed = make_engine(ZoneLayout([16]), clock)
+    sent = []
+    engine.push_waveforms = lambda waveforms: sent.append(waveforms) or len(waveforms)
+
+    engine.play(glitch(0.5))
+    lasts = sent[0][0].period * sent[0][0].cycles
+    for _ in range(int(lasts * 2 / 0.5)):
+        clock.now += 0.5
+        engine._tick(clock.now)
+
+    assert len(sent) == 3  # Renewed twice, a period before each run ends
+    assert pushed == []
+
+
+def test_engine_without_waveform_support_streams_glitch():
+    """Test the frame fallback when the engine cannot push waveforms."""
+    clock = FakeClock()
+    engine, pushed = make_engine(ZoneLayout([4]), clock)
+
+    engine.play(glitch(0.5))
+    engine._tick(clock.now)
+
+    assert len(pushed) == 1
+    assert engine.waveforms_pushed == 0
+
+
+@pytest.mark.asyncio
+async def test_engine_drops_frames_when_late():
+    """Test a stalled tick drops frames instead of catching up."""
+    layout = ZoneLayout([4])
+    stalls = []
+
+    def slow_push(frame, transition_ms):
+        if not stalls:
+            stalls.append(True)
+            time.sleep(0.12)  # simulate a slow network on the first frame
+        return 1
+
+    engine = EffectEngine(slow_push, lambda: layout, fps=50.0, seed=0)
+    engine.set_base(Effect("dark", lambda layout, t, rng: np.zeros(layout.shape + (4,))))
+
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(0.3)
+    engine.stop()
+    await task
+
+    assert engine.frames_dropped >= 4
+    assert engine.frames_rendered < 0.3 * 50
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
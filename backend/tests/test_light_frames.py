@@ -0,0 +1,68 @@
+"""Tests for multizone frame rendering."""
+
+import pytest
+import numpy as np
+from backend.hardware.lifx_protocol import LifxDevice, MessageType
+from backend.hardware.light_frames import (
+    ZoneLayout,
+    hsbk,
+    frame_messages,
+    extended_zones_payloads,
+)
+
+
+def make_devices(zone_counts):
+    return [
+        LifxDevice(mac=f"d0:73:d5:00:00:{i:02x}", ip="127.0.0.1", zone_count=zones)
+        for i, zones in enumerate(zone_counts)
+    ]
+
+
+def test_layout_mask_and_positions():
+    """Test layout masks unused zones and spans positions across each bar."""
+    layout = ZoneLayout([3, 1])
+
+    assert layout.shape == (2, 3)
+    assert layout.mask.tolist() == [[True, True, True], [True, False, False]]
+    assert layout.positions[0].tolist() == [0.0, 0.5, 1.0]
+
+
+def test_hsbk_wraps_hue_and_clips():
+    """Test normalized components convert to uint16 HSBK."""
+    frame = hsbk(np.array([1.25, 0.5]), 2.0, -1.0, 3500)
+
+    assert frame.dtype == np.uint16
+    assert frame[0].tolist() == [16383, 65535, 0, 3500]
+    assert frame[1, 0] == 32767
+
+
+def test_one_message_per_device():
+    """Test a frame becomes one packet per device regardless of zone count."""
+    devices = make_devices([16, 1, 32])
+    layout = ZoneLayout.from_devices(devices)
+    frame = layout.solid((100, 200, 300, 3500))
+
+    messages = frame_messages(devices, frame)
+
+    assert [m[1] for m in messages] == [
+        MessageType.SET_EXTENDED_COLOR_ZONES,
+        MessageType.LIGHT_SET_COLOR,
+        MessageType.SET_EXTENDED_COLOR_ZONES,
+    ]
+
+
+def test_long_bars_split_with_single_apply():
+    """Test bars beyond 82 zones split and only apply on the last chunk."""
+    zones = np.zeros((100, 4), dtype=np.uint16)
+
+    payloads = extended_zones_payloads(zones)
+
+    assert len(payloads) == 2
+    assert payloads[0][4] == 0  # NO_APPLY
+    assert payloads[1][4] == 1  # APPLY
+    assert int.from_bytes(payloads[1][5:7], "little") == 82
+    assert payloads[1][7] == 18
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,80 @@
+"""Tests for music-reactive lighting."""
+
+import pytest
+import numpy as np
+from backend.hardware.light_frames import ZoneLayout
+from backend.hardware.light_effects import music
+from backend.hardware.music_reactor import MusicReactor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def feed(reactor, clock, bands, chunks, step=0.023):
+    onsets = 0
+    for _ in range(chunks):
+        onsets += reactor.update(bands)
+        clock.now += step
+    return onsets
+
+
+def test_onset_detected_on_burst():
+    """Test a loud burst after quiet music registers one onset."""
+    clock = FakeClock()
+    reactor = MusicReactor(clock=clock)
+    quiet = np.full(8, 0.01)
+
+    assert feed(reactor, clock, quiet, 40) == 0
+    assert feed(reactor, clock, np.full(8, 50.0), 1) == 1
+    assert reactor.beat_level() == pytest.approx(np.exp(-0.023 / reactor.beat_decay))
+
+
+def test_refractory_period_limits_onsets():
+    """Test repeated bursts within the refractory window count once."""
+    clock = FakeClock()
+    reactor = MusicReactor(clock=clock, refractory=0.5)
+    feed(reactor, clock, np.full(8, 0.01), 40)
+
+    onsets = 0
+    for loud in (50.0, 0.01, 500.0, 0.01, 5000.0):
+        onsets += feed(reactor, clock, np.full(8, loud), 1)
+
+    assert onsets == 1
+
+
+def test_levels_are_normalized():
+    """Test smoothed levels stay within [0, 1]."""
+    clock = FakeClock()
+    reactor = MusicReactor(clock=clock)
+    rng = np.random.default_rng(0)
+
+    for _ in range(200):
+        reactor.update(rng.random(8) * 100)
+        clock.now += 0.023
+
+    assert reactor.levels.min() >= 0.0
+    assert reactor.levels.max() <= 1.0
+
+
+def test_music_effect_rate_and_brightness():
+    """Test the music effect respects the per-bulb rate and follows levels."""
+    clock = FakeClock()
+    reactor = MusicReactor(clock=clock)
+    effect = music(reactor, max_rate=10.0)
+    layout = ZoneLayout([16])
+
+    quiet = effect(layout, 0.0, None)
+    reactor.levels = np.ones(8)
+    loud = effect(layout, 0.0, None)
+
+    assert effect.interval == pytest.approx(0.1)
+    assert (loud[..., 2] > quiet[..., 2]).all()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,125 @@
+"""Tests for trigger synchronization between nodes."""
+
+import pytest
+import asyncio
+import time
+from backend.node_sync import NodeSync, PeerClock
+from backend.state_machine import StateMachine
+from backend.utils.virtual_clock import VirtualClock
+
+
+def test_offset_uses_the_fastest_round_trip():
+    """Test queueing delay on one exchange does not skew the estimate."""
+    clock = PeerClock()
+    # Peer runs 5 s ahead; 1 ms each way
+    clock.add(0.0, 5.001, 5.001, 0.002)
+    # Same exchange delayed 20 ms on the way out
+    clock.add(1.0, 6.021, 6.021, 1.022)
+
+    assert clock.offset == pytest.approx(5.0)
+    assert clock.uncertainty == pytest.approx(0.001)
+    assert clock.to_local(10.0) == pytest.approx(5.0)
+
+
+@pytest.fixture
+async def nodes():
+    """Two loopback nodes whose clocks are 100 s apart."""
+    a = NodeSync("a", port=0, loopback=True, lead=0.05, ping_interval=0.01)
+    b = NodeSync(
+        "b", port=0, loopback=True, lead=0.05, ping_interval=0.01,
+        clock=lambda: time.monotonic() + 100.0,
+    )
+    await a.start()
+    await b.start()
+    a.add_peer(*b.address)
+    b.add_peer(*a.address)
+    await asyncio.sleep(0.1)  # a few ping exchanges
+
+    yield a, b
+
+    a.stop()
+    b.stop()
+
+
+@pytest.mark.asyncio
+async def test_nodes_estimate_each_others_clock(nodes):
+    """Test both nodes learn the 100 s offset over loopback."""
+    a, b = nodes
+
+    assert a.peers["b"].offset == pytest.approx(100.0, abs=0.002)
+    assert b.peers["a"].offset == pytest.approx(-100.0, abs=0.002)
+
+
+@pytest.mark.asyncio
+async def test_trigger_starts_at_the_same_instant(nodes):
+    """Test a trigger maps to one instant on both clocks and skew is reported."""
+    a, b = nodes
+    received = []
+    b.register_trigger_callback(lambda box, trigger_id, start_at: received.append(
+        (box, trigger_id, start_at)
+    ))
+
+    trigger_id, start_at = a.announce("porch")
+    await asyncio.sleep(0.02)
+
+    assert len(received) == 1  # the repeat is dropped
+    box, remote_id, remote_start = received[0]
+    assert (box, remote_id) == ("porch", trigger_id)
+    assert remote_start - 100.0 == pytest.approx(start_at, abs=0.002)
+
+    a.report(trigger_id, 0.001)
+    b.report(trigger_id, 0.004)
+    await asyncio.sleep(0.02)
+
+    for node in (a, b):
+        sequence = node.get_stats()["sequences"][0]
+        assert sequence["nodes"] == {"a": 1.0, "b": 4.0}
+        assert sequence["skew_ms"] == pytest.approx(3.0)
+        assert sequence["skew_bound_ms"] >= sequence["skew_ms"]
+
+
+@pytest.mark.asyncio
+async def test_sequence_waits_for_a_scheduled_start():
+    """Test a sequence scheduled ahead starts then and blocks other triggers."""
+    clock = VirtualClock()
+    sm = StateMachine(
+        countdown_duration=0.0, active_duration=0.01, reset_duration=0.01,
+        clock=clock, sleep=clock.sleep,
+    )
+    events = []
+    sm.register_state_change_callback(events.append)
+
+    start_at = clock.now + 0.05
+    assert await sm.trigger_sequence(start_at) is True
+    assert sm.can_trigger() is False
+
+    await clock.advance(0.03)
+    assert events == []
+
+    await clock.run()
+    assert sm.sequence_task.done()
+    assert events[0].lateness == pytest.approx(0.0)
+    assert events[0].timestamp >= time.time() - 0.1
+
+
+@pytest.mark.asyncio
+async def test_box_announces_and_reports_its_start(nodes):
+    """Test a box trigger is announced and its start lateness reported."""
+    from backend.controller import ScareBoxController
+
+    a, b = nodes
+    box = ScareBoxController()
+    box.state_machine.update_timing(countdown_duration=0.0, active_duration=0.01, reset_duration=0.01)
+    box.sync = a
+
+    await box.trigger_sequence()
+    await asyncio.sleep(a.lead + 0.03)
+    await box.state_machine.stop()
+
+    sequence = next(iter(b.sequences.values()))
+    assert sequence.origin == "a"
+    assert "a" in sequence.reports
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
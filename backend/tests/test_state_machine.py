@@ -1,8 +1,9 @@
 """Tests for state machine."""
 
 import pytest
-import asyncio
+import time
 from backend.state_machine import StateMachine, State, Mode
+from backend.utils.virtual_clock import VirtualClock
 
 
 @pytest.mark.asyncio
@@ -30,10 +31,13 @@ async def test_state_machine_mode_switching():
 @pytest.mark.asyncio
 async def test_state_machine_trigger_sequence():
     """Test full scare sequence."""
+    clock = VirtualClock()
     sm = StateMachine(
         countdown_duration=0.1,
         active_duration=0.05,
         reset_duration=0.05,
+        clock=clock,
+        sleep=clock.sleep,
     )
 
     states_seen = []
@@ -46,8 +50,8 @@ async def test_state_machine_trigger_sequence():
     # Trigger sequence
     await sm.trigger_sequence()
 
-    # Wait for completion
-    await asyncio.sleep(0.3)
+    # Run to completion
+    assert await clock.run() == pytest.approx(0.2)
 
     # Should have seen all states
     assert State.TRICK_COUNTDOWN in states_seen
@@ -62,25 +66,126 @@ async def test_state_machine_trigger_sequence():
 @pytest.mark.asyncio
 async def test_state_machine_cannot_trigger_during_sequence():
     """Test that trigger is blocked during sequence."""
+    clock = VirtualClock()
     sm = StateMachine(
         countdown_duration=0.2,
         active_duration=0.1,
         reset_duration=0.1,
+        clock=clock,
+        sleep=clock.sleep,
     )
 
     # Start sequence
     await sm.trigger_sequence()
 
-    # Immediately check - should not be able to trigger
-    await asyncio.sleep(0.05)
+    # Shortly after - should not be able to trigger
+    await clock.advance(0.05)
     assert sm.can_trigger() is False
+    assert await sm.trigger_sequence() is False
 
-    # Wait for completion
-    await asyncio.sleep(0.5)
+    # Just before the end it is still running
+    await clock.advance(0.3)
+    assert sm.can_trigger() is False
 
     # Now should be able to trigger again
+    await clock.run()
     assert sm.can_trigger() is True
 
 
+@pytest.mark.asyncio
+async def test_default_sequence_runs_in_virtual_time():
+    """Test a full-length sequence runs on deadline in no real time."""
+    clock = VirtualClock()
+    sm = StateMachine(countdown_duration=3.0, clock=clock, sleep=clock.sleep)
+    events = []
+    sm.register_state_change_callback(events.append)
+
+    started = time.perf_counter()
+    await sm.trigger_sequence()
+    assert await clock.run() == pytest.approx(12.0)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.1
+    assert sm.get_state() == State.NON_TRICK
+    # Every step woke exactly on its deadline
+    assert [round(e.lateness, 9) for e in events] == [0.0] * len(events)
+    assert sm.get_timing_stats()["max_lateness_ms"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_at_once():
+    """Test stopping mid-sequence returns to normal without waiting."""
+    clock = VirtualClock()
+    sm = StateMachine(countdown_duration=1.0, clock=clock, sleep=clock.sleep)
+
+    await sm.trigger_sequence()
+    await clock.advance(1.5)
+    assert sm.get_state() == State.TRICK_ACTIVE
+
+    await sm.stop()
+    assert sm.sequence_task.done()
+    assert sm.get_state() == State.NON_TRICK
+    assert clock.now == pytest.approx(1.5)
+    assert clock.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_does_not_repeat_the_reset():
+    """Test stop only reports a return to normal if the sequence had not reset yet."""
+    clock = VirtualClock()
+    sm = StateMachine(countdown_duration=1.0, clock=clock, sleep=clock.sleep)
+    events = []
+    sm.register_state_change_callback(events.append)
+
+    await sm.trigger_sequence()
+    await clock.run()
+    finished = len(events)
+    await sm.stop()
+    assert len(events) == finished
+
+    await sm.trigger_sequence()
+    await clock.advance(1.5)
+    await sm.stop()
+    assert [e.to_state for e in events[finished:]].count(State.NON_TRICK) == 1
+
+
+@pytest.mark.asyncio
+async def test_zero_countdown_skips_countdown_steps():
+    """Test a zero countdown goes straight to the scare without progress events."""
+    clock = VirtualClock()
+    sm = StateMachine(
+        countdown_duration=0.0, active_duration=0.02, reset_duration=0.02,
+        clock=clock, sleep=clock.sleep,
+    )
+    events = []
+    sm.register_state_change_callback(events.append)
+
+    await sm.trigger_sequence()
+    await clock.run()
+
+    assert [e.to_state for e in events] == [
+        State.TRICK_COUNTDOWN, State.TRICK_ACTIVE, State.TRICK_RESET, State.NON_TRICK,
+    ]
+    assert all(e.countdown_remaining is None for e in events)
+
+
+@pytest.mark.asyncio
+async def test_sequence_length_does_not_drift_with_slow_callbacks():
+    """Test blocking callbacks do not stretch the sequence beyond its length."""
+    sm = StateMachine(countdown_duration=0.2, active_duration=0.05, reset_duration=0.05)
+    sm.register_state_change_callback(lambda event: time.sleep(0.005))
+
+    started = time.monotonic()
+    await sm.trigger_sequence()
+    await sm.sequence_task
+    elapsed = time.monotonic() - started
+
+    # 24 callbacks block for 120 ms in total; sleeping per step would add all of it
+    assert elapsed == pytest.approx(0.3, abs=0.03)
+    stats = sm.get_timing_stats()
+    assert stats["steps"] == 1 + 20 + 3
+    assert stats["max_lateness_ms"] < 30
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
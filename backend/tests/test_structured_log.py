@@ -0,0 +1,54 @@
+"""Tests for structured logging."""
+
+import pytest
+import json
+import logging
+import queue
+from backend.utils import structured_log
+from backend.utils.event_logger import EventLogger, EventCategory
+
+
+def test_json_lines_with_module_levels(tmp_path):
+    """Test records are written as JSON lines, filtered per module."""
+    path = tmp_path / "scare-box.log"
+    structured_log.setup_logging("info", {"test.quiet": "warning"}, path=str(path))
+    try:
+        logging.getLogger("test.loud").info(
+            "Bulb %s is back", "Porch", extra={"fields": {"bulb": "Porch"}}
+        )
+        logging.getLogger("test.quiet").info("Not written")
+        logging.getLogger("test.quiet").warning("Written")
+        EventLogger().warning(EventCategory.HARDWARE, "Bulb offline", {"bulb": "Porch"})
+    finally:
+        structured_log.shutdown_logging()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["message"] for line in lines] == ["Bulb Porch is back", "Written", "Bulb offline"]
+    assert lines[0]["logger"] == "test.loud"
+    assert lines[0]["bulb"] == "Porch"
+    assert lines[2]["level"] == "warning"
+    assert lines[2]["category"] == "hardware"
+    assert lines[2]["details"] == {"bulb": "Porch"}
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Test a backed-up writer costs records, not caller time."""
+    handler = structured_log.DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("test.flood")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        for i in range(5):
+            logger.warning("Audio status: input overflow %d", i)
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    # Not formatted on the caller's thread
+    assert handler.queue.get().args == (0,)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+"""Tests for cue-list timelines."""
+
+import pytest
+import asyncio
+from backend.timeline import Cue, Timeline, TimelineError, TimelinePlayer
+
+
+def test_validation_rejects_unknown_actions_and_late_cues():
+    """Test bad cues fail at compile time, not during playback."""
+    handlers = {"light": print}
+
+    with pytest.raises(TimelineError, match="no handler"):
+        Timeline("t", [Cue(0.0, "lihgt")], 1.0).compile(handlers)
+    with pytest.raises(TimelineError, match="past the end"):
+        Timeline("t", [Cue(2.0, "light")], 1.0).compile(handlers)
+    with pytest.raises(TimelineError, match="invalid time"):
+        Timeline("t", [Cue(-0.1, "light")], 1.0).compile(handlers)
+
+
+@pytest.mark.asyncio
+async def test_player_runs_cues_in_time_order():
+    """Test cues are sorted by time, keep list order on ties, and are timed."""
+    fired = []
+    timeline = Timeline(
+        "t",
+        [Cue(0.04, "a", 3), Cue(0.0, "a", 1), Cue(0.0, "b", 2)],
+        0.05,
+    ).compile({"a": fired.append, "b": fired.append})
+
+    player = TimelinePlayer()
+    await player.play(timeline)
+
+    assert fired == [1, 2, 3]
+    stats = player.get_stats()
+    assert stats["cues_played"] == 3
+    assert stats["actions"]["a"]["count"] == 2
+    assert stats["actions"]["a"]["max_ms"] < 20
+    assert player.timer.elapsed() == pytest.approx(0.05, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_cancel_runs_cleanup_cues():
+    """Test cancelling playback runs the timeline's cleanup cues."""
+    fired = []
+    timeline = Timeline(
+        "t", [Cue(0.0, "a", "start"), Cue(1.0, "a", "late")], 1.0, [Cue(0.0, "a", "cleanup")]
+    ).compile({"a": fired.append})
+
+    task = asyncio.create_task(TimelinePlayer().play(timeline))
+    await asyncio.sleep(0.02)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert fired == ["start", "cleanup"]
+
+
+def test_controller_sequence_compiles_for_each_mode():
+    """Test the controller's light and audio cues form a valid sequence."""
+    from backend.controller import ScareBoxController
+
+    controller = ScareBoxController()
+    sm = controller.state_machine
+    sm.update_timing(countdown_duration=1.0, active_duration=2.0, reset_duration=1.0)
+
+    # The controller imports the state machine as a top-level module
+    for mode in type(sm.get_mode()):
+        timeline = sm.compiled_timeline(mode)
+        actions = [cue.action for cue, _ in timeline.steps]
+        flash = next(cue for cue, _ in timeline.steps if cue.action == "flash")
+
+        assert actions.count("glitch") == sm.COUNTDOWN_STEPS
+        assert flash.at == 1.0
+        assert flash.value == controller._get_intensity_multipliers(mode)["brightness"]
+        last = timeline.steps[-1][0]
+        assert (last.at, last.action, last.value.value) == (timeline.duration, "state", "non_trick")
+        assert timeline.duration >= 4.0
+
+
+
+@pytest.mark.asyncio
+async def test_controller_sequence_runs_in_virtual_time():
+    """Test the controller's whole sequence, effects included, on a virtual clock."""
+    from backend.controller import ScareBoxController
+    from backend.utils.virtual_clock import VirtualClock
+
+    clock = VirtualClock()
+    controller = ScareBoxController(clock=clock, sleep=clock.sleep)
+    sm = controller.state_machine
+    sm.update_timing(countdown_duration=1.0, active_duration=2.0, reset_duration=1.0)
+    timeline = sm.compiled_timeline()
+
+    assert await sm.trigger_sequence() is True
+    assert await clock.run() == pytest.approx(timeline.duration)
+
+    assert sm.player.get_stats()["cues_played"] == len(timeline.steps)
+    assert sm.get_timing_stats()["max_lateness_ms"] == 0.0
+    # The reset fade is timed on the same clock
+    reset = next(cue for cue, _ in timeline.steps if cue.action == "lights_reset")
+    assert controller.lights.engine.effect_until == pytest.approx(reset.at + reset.value)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
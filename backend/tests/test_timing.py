@@ -0,0 +1,36 @@
+"""Tests for deadline-based timing."""
+
+import pytest
+import asyncio
+from backend.utils.timing import DeadlineTimer
+
+
+@pytest.mark.asyncio
+async def test_deadlines_are_absolute():
+    """Test time spent between waits is absorbed instead of accumulating."""
+    timer = DeadlineTimer()
+    timer.start()
+
+    for step in range(1, 6):
+        await timer.wait_until(step * 0.02)
+        await asyncio.sleep(0.01)  # work done after each step
+
+    await timer.wait_until(0.12)
+    assert timer.elapsed() == pytest.approx(0.12, abs=0.01)
+    assert timer.get_stats()["steps"] == 6
+
+
+@pytest.mark.asyncio
+async def test_missed_deadline_reports_lateness():
+    """Test a deadline already in the past returns immediately with its lateness."""
+    timer = DeadlineTimer()
+    timer.start(timer.clock() - 0.05)
+
+    late = await timer.wait_until(0.0)
+
+    assert late >= 0.05
+    assert timer.max_lateness == late
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
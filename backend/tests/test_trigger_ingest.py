@@ -0,0 +1,115 @@
+"""Tests for thread-safe trigger ingestion."""
+
+import pytest
+import asyncio
+import threading
+from backend.utils.trigger_ingest import TriggerIngest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def drain():
+    """Let call_soon_threadsafe callbacks run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_submit_from_audio_thread():
+    """Test triggers from another thread are delivered on the event loop."""
+    threads = []
+    ingest = TriggerIngest(lambda source: threads.append(threading.get_ident()))
+    ingest.attach()
+
+    worker = threading.Thread(target=ingest.submit)
+    worker.start()
+    worker.join()
+    await drain()
+
+    assert ingest.accepted == 1
+    assert threads == [threading.get_ident()]
+
+
+@pytest.mark.asyncio
+async def test_burst_is_debounced():
+    """Test a trigger on every audio chunk fires once until the source goes quiet."""
+    clock = FakeClock()
+    fired = []
+    ingest = TriggerIngest(fired.append, window=0.5, clock=clock)
+    ingest.attach()
+
+    for _ in range(40):  # ~1s of chunks
+        ingest.submit("audio")
+        clock.now += 0.023
+    await drain()
+    assert fired == ["audio"]
+    assert ingest.debounced == 39
+
+    clock.now += 0.6
+    ingest.submit("audio")
+    await drain()
+    assert len(fired) == 2
+
+
+@pytest.mark.asyncio
+async def test_other_source_is_deduplicated():
+    """Test a second source right after an accepted trigger is dropped as a duplicate."""
+    clock = FakeClock()
+    fired = []
+    ingest = TriggerIngest(fired.append, window=0.5, clock=clock)
+    ingest.attach()
+
+    ingest.submit("audio")
+    clock.now += 0.1
+    ingest.submit("manual")
+    await drain()
+
+    assert fired == ["audio"]
+    assert ingest.deduplicated == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_and_gate():
+    """Test the sliding-window limit and the busy gate."""
+    clock = FakeClock()
+    fired = []
+    ready = [True]
+    ingest = TriggerIngest(
+        fired.append, window=0.5, max_triggers=2, period=60.0,
+        gate=lambda: ready[0], clock=clock,
+    )
+    ingest.attach()
+
+    for _ in range(3):
+        ingest.submit("audio")
+        clock.now += 1.0
+    await drain()
+    assert len(fired) == 2
+    assert ingest.rate_limited == 1
+
+    clock.now += 60.0
+    ready[0] = False
+    ingest.submit("audio")
+    await drain()
+    assert ingest.ignored == 1
+
+    stats = ingest.get_stats()
+    assert stats["received"] == 4
+    assert stats["accepted"] == 2
+
+
+def test_submit_without_loop_is_dropped():
+    """Test triggers before the loop is attached are counted, not lost silently."""
+    ingest = TriggerIngest(lambda source: None)
+    ingest.submit()
+    assert ingest.dropped == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+"""Tests for per-client WebSocket send queues."""
+
+import pytest
+import asyncio
+import json
+from backend.websocket.manager import ClientQueue, ConnectionManager, SLOW_CLIENT_CLOSE
+
+
+class FakeWebSocket:
+    """A client whose sends block until ``gate`` is opened."""
+
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def settle(rounds: int = 10):
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_drops_the_oldest_telemetry_first():
+    """Test telemetry makes room for new messages and other messages are kept in order."""
+    queue = ClientQueue(size=3)
+    assert queue.put("audio 1", telemetry=True)
+    assert queue.put("state 1")
+    assert queue.put("audio 2", telemetry=True)
+    assert queue.put("audio 3", telemetry=True)  # Drops audio 1
+    assert queue.put("event 1")  # Drops audio 2
+    assert queue.dropped == 2
+
+    assert queue.put("audio 4", telemetry=True)  # Drops audio 3
+    assert queue.put("state 2") is True  # Drops audio 4
+    assert queue.put("audio 5", telemetry=True) is True  # Nothing to drop: dropped itself
+    assert queue.put("state 3") is False  # Full of messages that must not be dropped
+    assert queue.dropped == 5
+    assert [item[1] for item in sorted(queue.telemetry + queue.messages)] == [
+        "state 1", "event 1", "state 2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slow_client_does_not_hold_up_the_others():
+    """Test broadcasting returns at once and only the slow client falls behind."""
+    manager = ConnectionManager(queue_size=4)
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    await manager.connect(fast)
+    await manager.connect(slow)
+
+    await manager.broadcast_state_change({"to": "active"})
+    await settle()
+    for i in range(10):
+        await manager.broadcast_audio_level({"level": i})
+        await settle()
+
+    assert len(fast.sent) == 11
+    stats = {client["queue_depth"]: client for client in manager.get_stats()["clients"]}
+    assert stats[0]["sent"] == 11
+    assert stats[4]["dropped"] == 6  # Stuck sending the state change, holding the last four levels
+
+    slow.gate.set()
+    await settle()
+    assert [message["type"] for message in slow.sent] == ["state_change"] + ["audio_level"] * 4
+    assert [message["data"]["level"] for message in slow.sent[1:]] == [6, 7, 8, 9]
+
+
+@pytest.mark.asyncio
+async def test_client_too_far_behind_is_disconnected():
+    """Test a client that cannot keep up with undroppable messages is hung up on."""
+    manager = ConnectionManager(queue_size=2)
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow)
+
+    for i in range(4):
+        await manager.broadcast_state_change({"to": f"state {i}"})
+    await settle()
+
+    assert slow.close_code == SLOW_CLIENT_CLOSE
+    assert manager.get_connection_count() == 0
+    assert manager.get_stats()["slow_disconnects"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
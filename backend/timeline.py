@@ -0,0 +1,151 @@
+"""Declarative cue-list timelines for scare sequences.
+
+A sequence is a list of ``Cue``s, each an action name and a value at an
+offset from the trigger. Timelines are validated and compiled against a
+table of handlers before playback, so a typo or an out-of-range cue fails
+when the sequence is built rather than halfway through a scare. Playback
+runs every cue on one deadline clock and records how late each one fired.
+"""
+
+import asyncio
+import logging
+import math
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.timing import DeadlineTimer
+
+log = logging.getLogger(__name__)
+
+Handler = Callable[[Any], Any]
+
+
+class TimelineError(ValueError):
+    """Raised when a timeline fails validation."""
+
+
+@dataclass(frozen=True)
+class Cue:
+    """One timed action: ``action(value)`` at ``at`` seconds after the trigger."""
+    at: float
+    action: str
+    value: Any = None
+
+
+@dataclass
+class Timeline:
+    """An ordered cue list.
+
+    ``cleanup`` cues run immediately, in order, if playback is cancelled.
+    """
+    name: str
+    cues: List[Cue]
+    duration: float
+    cleanup: List[Cue] = field(default_factory=list)
+
+    def validate(self, actions) -> None:
+        """Check timing and that every action has a handler."""
+        if not math.isfinite(self.duration) or self.duration < 0:
+            raise TimelineError(f"{self.name}: invalid duration {self.duration}")
+
+        for cue in self.cues:
+            if not math.isfinite(cue.at) or cue.at < 0:
+                raise TimelineError(f"{self.name}: cue {cue.action} at invalid time {cue.at}")
+            if cue.at > self.duration:
+                raise TimelineError(
+                    f"{self.name}: cue {cue.action} at {cue.at:.3f}s is past the end "
+                    f"({self.duration:.3f}s)"
+                )
+
+        for cue in self.cues + self.cleanup:
+            if cue.action not in actions:
+                raise TimelineError(f"{self.name}: no handler for cue action {cue.action!r}")
+
+    def compile(self, handlers: Dict[str, Handler]) -> "CompiledTimeline":
+        """Validate and bind every cue to its handler, sorted by time.
+
+        Cues at the same time keep their list order.
+        """
+        self.validate(handlers)
+        order = sorted(range(len(self.cues)), key=lambda i: self.cues[i].at)
+        steps = tuple((self.cues[i], handlers[self.cues[i].action]) for i in order)
+        cleanup = tuple((cue, handlers[cue.action]) for cue in self.cleanup)
+        return CompiledTimeline(self.name, self.duration, steps, cleanup)
+
+
+@dataclass(frozen=True)
+class CompiledTimeline:
+    """A validated timeline with its handlers bound."""
+    name: str
+    duration: float
+    steps: Tuple[Tuple[Cue, Handler], ...]
+    cleanup: Tuple[Tuple[Cue, Handler], ...] = ()
+
+
+class TimelinePlayer:
+    """Plays compiled timelines on a deadline timer.
+
+    Handlers are called synchronously at their cue time; a handler that
+    returns a coroutine has it scheduled as a task so it cannot hold up
+    the cues after it.
+    """
+
+    def __init__(self, timer: Optional[DeadlineTimer] = None, history: int = 500):
+        self.timer = timer or DeadlineTimer()
+        self.current: Optional[CompiledTimeline] = None
+        self.lateness = 0.0  # Lateness of the cue being executed
+
+        self.jitter: Dict[str, deque] = defaultdict(lambda: deque(maxlen=history))
+        self.cues_played = 0
+        self.timelines_played = 0
+
+    async def play(self, timeline: CompiledTimeline, origin: Optional[float] = None):
+        """Run every cue at its deadline; runs cleanup cues if cancelled.
+
+        ``origin`` is when the timeline starts on the timer's clock (now by
+        default); cue times are offsets from it.
+        """
+        self.current = timeline
+        self.timer.start(origin)
+        try:
+            for cue, handler in timeline.steps:
+                self.lateness = await self.timer.wait_until(cue.at)
+                self.jitter[cue.action].append(self.lateness)
+                self._call(cue, handler)
+                self.cues_played += 1
+
+            if not timeline.steps or timeline.steps[-1][0].at < timeline.duration:
+                await self.timer.wait_until(timeline.duration)
+            self.timelines_played += 1
+        except asyncio.CancelledError:
+            self.lateness = 0.0
+            for cue, handler in timeline.cleanup:
+                self._call(cue, handler)
+            raise
+        finally:
+            self.current = None
+
+    def _call(self, cue: Cue, handler: Handler):
+        try:
+            result = handler(cue.value)
+            if asyncio.iscoroutine(result):
+                asyncio.create_task(result)
+        except Exception as e:
+            log.error("Error in cue %s at %.3fs: %s", cue.action, cue.at, e)
+
+    def get_stats(self) -> dict:
+        """Cue lateness per action in milliseconds."""
+        per_action = {}
+        for action, samples in self.jitter.items():
+            values = list(samples)
+            per_action[action] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "max_ms": round(max(values) * 1000, 3),
+            }
+        return {
+            "timelines_played": self.timelines_played,
+            "cues_played": self.cues_played,
+            "actions": per_action,
+        }
@@ -1,5 +1,5 @@
 """Utility modules for Scare Box."""
 
-from .event_logger import EventLogger, Event, EventLevel, EventCategory, event_logger
+from .event_logger import EventLogger, BoundEventLogger, Event, EventLevel, EventCategory, event_logger
 
-__all__ = ["EventLogger", "Event", "EventLevel", "EventCategory", "event_logger"]
+__all__ = ["EventLogger", "BoundEventLogger", "Event", "EventLevel", "EventCategory", "event_logger"]
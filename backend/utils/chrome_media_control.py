@@ -1,7 +1,11 @@
 """Control Chrome's built-in media controls."""
 
+import logging
 from pynput.keyboard import Key, Controller
 
+log = logging.getLogger(__name__)
+
+
 def click_chrome_media_button():
     keyboard = Controller()
     
@@ -12,11 +16,11 @@ def click_chrome_media_button():
 
 def pause_chrome_media():
     """Pause all Chrome media by clicking the media control button."""
-    print("⏸️  Pausing Chrome media...")
+    log.info("Pausing Chrome media...")
     return click_chrome_media_button()
 
 
 def resume_chrome_media():
     """Resume all Chrome media by clicking the media control button again."""
-    print("▶️  Resuming Chrome media...")
+    log.info("Resuming Chrome media...")
     return click_chrome_media_button()
\ No newline at end of file
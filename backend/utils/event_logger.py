@@ -1,11 +1,21 @@
 """Event logging and tracking system."""
 
 import asyncio
+import json
+import logging
+import sys
 import time
-from typing import List, Optional, Callable
-from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Callable, Tuple
 from enum import Enum
-from collections import deque
+from collections import Counter, deque
+from itertools import dropwhile, islice, takewhile
+
+from .event_rollup import EventRollups
+
+if TYPE_CHECKING:
+    from .event_store import EventStore
+
+log = logging.getLogger(__name__)
 
 
 class EventLevel(Enum):
@@ -16,6 +26,14 @@ class EventLevel(Enum):
     ERROR = "error"
 
 
+LOG_LEVELS = {
+    EventLevel.DEBUG: logging.DEBUG,
+    EventLevel.INFO: logging.INFO,
+    EventLevel.WARNING: logging.WARNING,
+    EventLevel.ERROR: logging.ERROR,
+}
+
+
 class EventCategory(Enum):
     """Event categories."""
     SYSTEM = "system"
@@ -25,18 +43,68 @@ class EventCategory(Enum):
     CONFIG = "config"
 
 
-@dataclass
+# Enum members by member and by value, so every event shares the same members
+_LEVELS = {**{level: level for level in EventLevel}, **{level.value: level for level in EventLevel}}
+_CATEGORIES = {
+    **{category: category for category in EventCategory},
+    **{category.value: category for category in EventCategory},
+}
+
+
 class Event:
-    """Event data structure."""
-    timestamp: float
-    level: EventLevel
-    category: EventCategory
-    message: str
-    details: Optional[dict] = None
+    """Event data structure.
+
+    A slotted record (no per-event ``__dict__``) holding the shared enum
+    members and an interned message. Its JSON form is built the first time
+    it is streamed or served and then reused, so do not change ``details``
+    after logging the event.
+    """
+
+    __slots__ = ("timestamp", "level", "category", "message", "details", "_id", "_json")
+
+    def __init__(
+        self,
+        timestamp: float,
+        level: EventLevel,
+        category: EventCategory,
+        message: str,
+        details: Optional[dict] = None,
+        id: int = 0,
+    ):
+        self.timestamp = timestamp
+        self.level = _LEVELS.get(level, level)
+        self.category = _CATEGORIES.get(category, category)
+        self.message = sys.intern(message) if type(message) is str else message
+        self.details = details
+        self._id = id  # Increases with every event logged; used as a paging cursor
+        self._json: Optional[bytes] = None
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @id.setter
+    def id(self, value: int):
+        self._id = value
+        self._json = None
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Event(id={self._id}, timestamp={self.timestamp}, level={self.level}, "
+            f"category={self.category}, message={self.message!r}, details={self.details})"
+        )
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
         return {
+            "id": self._id,
             "timestamp": self.timestamp,
             "level": self.level.value,
             "category": self.category.value,
@@ -44,13 +112,71 @@ class Event:
             "details": self.details or {},
         }
 
+    def to_json(self) -> bytes:
+        """The event as UTF-8 JSON, serialized once and cached."""
+        if self._json is None:
+            self._json = json.dumps(
+                self.to_dict(), default=str, ensure_ascii=False, separators=(",", ":")
+            ).encode()
+        return self._json
+
 
 class EventLogger:
-    """Centralized event logging and tracking."""
+    """Centralized event logging and tracking.
+
+    Recent events are kept in memory; with a store attached every event is
+    also queued for writing to disk. The in-memory history is indexed by
+    level, by category and by both, and counted as events come and go, so
+    filtered queries and statistics never scan it. Rollups count the
+    events logged per second, minute and hour.
+    """
 
     def __init__(self, max_events: int = 1000):
-        self.events: deque[Event] = deque(maxlen=max_events)
+        self.max_events = max_events
+        self.events: deque[Event] = deque()
         self.callbacks: List[Callable[[Event], None]] = []
+        self.store: Optional["EventStore"] = None
+        self.last_id = 0
+        # Set once an older event exists only in the store
+        self.evicted = False
+
+        # Retained events per (level, category), (level, None) and (None, category)
+        self.indexes: Dict[Tuple[Optional[EventLevel], Optional[EventCategory]], deque] = {}
+        self.level_counts: Counter = Counter()
+        self.category_counts: Counter = Counter()
+
+        # Events logged per second, minute and hour, for charts
+        self.rollups = EventRollups(
+            [level.value for level in EventLevel],
+            [category.value for category in EventCategory],
+        )
+
+    def _index_keys(self, event: Event):
+        return (
+            (event.level, None),
+            (None, event.category),
+            (event.level, event.category),
+        )
+
+    def _add(self, event: Event):
+        """Append to the history and its indexes, evicting the oldest event if full."""
+        if len(self.events) >= self.max_events:
+            self.evicted = True
+            evicted = self.events.popleft()
+            # The oldest event overall is also the oldest in each of its indexes
+            for key in self._index_keys(evicted):
+                self.indexes[key].popleft()
+            self.level_counts[evicted.level] -= 1
+            self.category_counts[evicted.category] -= 1
+
+        self.events.append(event)
+        for key in self._index_keys(event):
+            index = self.indexes.get(key)
+            if index is None:
+                index = self.indexes[key] = deque()
+            index.append(event)
+        self.level_counts[event.level] += 1
+        self.category_counts[event.category] += 1
 
     def log(
         self,
@@ -60,18 +186,26 @@ class EventLogger:
         details: Optional[dict] = None,
     ):
         """Log an event."""
+        self.last_id += 1
         event = Event(
             timestamp=time.time(),
             level=level,
             category=category,
             message=message,
             details=details,
+            id=self.last_id,
         )
 
-        self.events.append(event)
+        self._add(event)
+        self.rollups.add(event.timestamp, level.value, category.value)
+        if self.store:
+            self.store.append(event)
 
-        # Print to console
-        print(f"[{level.value.upper()}] {category.value}: {message}")
+        # Queued for the logging thread; never blocks on console I/O
+        log.log(
+            LOG_LEVELS[level], message,
+            extra={"fields": {"category": category.value, "event_id": event.id, "details": details}},
+        )
 
         # Notify callbacks
         for callback in self.callbacks:
@@ -81,7 +215,7 @@ class EventLogger:
                 if asyncio.iscoroutine(result):
                     asyncio.create_task(result)
             except Exception as e:
-                print(f"Error in event callback: {e}")
+                log.error("Error in event callback: %s", e)
 
     def info(self, category: EventCategory, message: str, details: Optional[dict] = None):
         """Log info event."""
@@ -104,44 +238,126 @@ class EventLogger:
         limit: Optional[int] = None,
         level: Optional[EventLevel] = None,
         category: Optional[EventCategory] = None,
+        since: Optional[int] = None,
+        before: Optional[int] = None,
     ) -> List[Event]:
-        """Get events with optional filtering."""
-        events = list(self.events)
+        """Get events, oldest first, with optional filtering.
 
-        if level:
-            events = [e for e in events if e.level == level]
+        With ``since`` (an event ID) these are the first ``limit`` events
+        after it, for fetching only new events. Otherwise they are the last
+        ``limit`` events, before the ID ``before`` if given.
+        """
+        if level or category:
+            events = self.indexes.get((level, category), ())
+        else:
+            events = self.events
 
-        if category:
-            events = [e for e in events if e.category == category]
+        # Walk back from the newest event, touching only the events returned
+        newest_first = reversed(events)
+        if since is not None:
+            newer = list(takewhile(lambda event: event.id > since, newest_first))
+            return newer[::-1][:limit] if limit else newer[::-1]
+        if before is not None:
+            newest_first = dropwhile(lambda event: event.id >= before, newest_first)
+        return list(islice(newest_first, limit or None))[::-1]
 
-        if limit:
-            events = events[-limit:]
+    @property
+    def oldest_id(self) -> int:
+        """ID of the oldest event in memory."""
+        return self.events[0].id if self.events else self.last_id + 1
 
-        return events
+    @property
+    def truncated(self) -> bool:
+        """Whether older events have been evicted from memory (and are only in the store)."""
+        return self.evicted
 
     def get_stats(self) -> dict:
         """Get event statistics."""
-        total = len(self.events)
-        by_level = {}
-        by_category = {}
-
-        for event in self.events:
-            by_level[event.level.value] = by_level.get(event.level.value, 0) + 1
-            by_category[event.category.value] = by_category.get(event.category.value, 0) + 1
-
         return {
-            "total_events": total,
-            "by_level": by_level,
-            "by_category": by_category,
+            "total_events": len(self.events),
+            "by_level": {level.value: n for level, n in self.level_counts.items() if n},
+            "by_category": {category.value: n for category, n in self.category_counts.items() if n},
         }
 
     def register_callback(self, callback: Callable[[Event], None]):
         """Register callback for new events."""
         self.callbacks.append(callback)
 
+    def attach_store(self, store: Optional["EventStore"]):
+        """Persist events to ``store`` (None to stop), loading its recent history first.
+
+        Events logged before are renumbered to follow the stored history and
+        then stored too. If the store cannot be read, ``sqlite3.Error`` is
+        raised and nothing changes.
+        """
+        if store is None:
+            self.store = None
+            return
+        # Read everything first: if the store cannot be read, nothing changes
+        history = store.query(limit=self.max_events)
+        older = bool(history) and bool(store.query(limit=1, before=history[0].id))
+        last_id = store.last_id()
+
+        self.store = store
+        recent = list(self.events)
+        self.clear()
+        for event in history:
+            self._add(event)
+            self.rollups.add(event.timestamp, event.level.value, event.category.value)
+        if older:
+            self.evicted = True  # More history on disk than fits in memory
+        self.last_id = last_id
+        for event in recent:
+            self.last_id += 1
+            event.id = self.last_id
+            self._add(event)
+            store.append(event)
+
+    def bind(self, **details) -> "BoundEventLogger":
+        """Get a logger that adds ``details`` (e.g. a box name) to every event."""
+        return BoundEventLogger(self, details)
+
     def clear(self):
         """Clear all events."""
         self.events.clear()
+        self.indexes.clear()
+        self.level_counts.clear()
+        self.category_counts.clear()
+        self.evicted = False
+
+
+class BoundEventLogger:
+    """Logs to an ``EventLogger`` with fixed details merged into every event."""
+
+    def __init__(self, logger: EventLogger, details: dict):
+        self.logger = logger
+        self.details = details
+
+    def log(
+        self,
+        level: EventLevel,
+        category: EventCategory,
+        message: str,
+        details: Optional[dict] = None,
+    ):
+        """Log an event."""
+        self.logger.log(level, category, message, {**self.details, **(details or {})})
+
+    def info(self, category: EventCategory, message: str, details: Optional[dict] = None):
+        """Log info event."""
+        self.log(EventLevel.INFO, category, message, details)
+
+    def warning(self, category: EventCategory, message: str, details: Optional[dict] = None):
+        """Log warning event."""
+        self.log(EventLevel.WARNING, category, message, details)
+
+    def error(self, category: EventCategory, message: str, details: Optional[dict] = None):
+        """Log error event."""
+        self.log(EventLevel.ERROR, category, message, details)
+
+    def debug(self, category: EventCategory, message: str, details: Optional[dict] = None):
+        """Log debug event."""
+        self.log(EventLevel.DEBUG, category, message, details)
 
 
 # Global event logger instance
@@ -0,0 +1,97 @@
+"""Time-bucketed event counts for dashboards.
+
+Each ring holds a fixed number of buckets at one resolution (1 s, 1 min,
+1 h) with a count per level and per category. A slot is reused when time
+moves past it, so memory stays fixed however many events are logged, and
+reading a chart costs one pass over a few hundred numbers.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+class RollupRing:
+    """Per-key event counts in the last ``slots`` buckets of ``resolution`` seconds."""
+
+    def __init__(self, resolution: float, slots: int, keys: Sequence[str]):
+        self.resolution = resolution
+        self.slots = slots
+        self.keys = list(keys)
+        self.columns = {key: i for i, key in enumerate(self.keys)}
+        self.counts: List[List[int]] = [[0] * len(self.keys) for _ in range(slots)]
+        # Which bucket each slot currently holds
+        self.buckets: List[Optional[int]] = [None] * slots
+
+    def add(self, timestamp: float, keys: Sequence[str]):
+        bucket = int(timestamp // self.resolution)
+        slot = bucket % self.slots
+        held = self.buckets[slot]
+        if held != bucket:
+            if held is not None and held > bucket:
+                return  # Older than the ring reaches
+            self.buckets[slot] = bucket
+            self.counts[slot] = [0] * len(self.keys)
+        row = self.counts[slot]
+        for key in keys:
+            row[self.columns[key]] += 1
+
+    def series(self, now: float, buckets: Optional[int] = None) -> dict:
+        """Counts per key for the last ``buckets`` buckets up to ``now``, oldest first."""
+        buckets = min(buckets or self.slots, self.slots)
+        last = int(now // self.resolution)
+        first = last - buckets + 1
+        columns: Dict[str, List[int]] = {key: [0] * buckets for key in self.keys}
+        for i, bucket in enumerate(range(first, last + 1)):
+            slot = bucket % self.slots
+            if self.buckets[slot] != bucket:
+                continue
+            for key, count in zip(self.keys, self.counts[slot]):
+                if count:
+                    columns[key][i] = count
+        return {"start": first * self.resolution, "seconds": self.resolution, "counts": columns}
+
+
+class EventRollups:
+    """Event counts by level and category at several resolutions."""
+
+    RESOLUTIONS = {
+        "1s": (1.0, 120),
+        "1m": (60.0, 120),
+        "1h": (3600.0, 48),
+    }
+
+    def __init__(
+        self,
+        levels: Sequence[str],
+        categories: Sequence[str],
+        clock: Callable[[], float] = time.time,
+    ):
+        self.levels = list(levels)
+        self.categories = list(categories)
+        self.clock = clock
+        keys = ["total"] + [f"level:{level}" for level in self.levels] + [
+            f"category:{category}" for category in self.categories
+        ]
+        self.rings = {
+            name: RollupRing(resolution, slots, keys)
+            for name, (resolution, slots) in self.RESOLUTIONS.items()
+        }
+
+    def add(self, timestamp: float, level: str, category: str):
+        keys = ("total", f"level:{level}", f"category:{category}")
+        for ring in self.rings.values():
+            ring.add(timestamp, keys)
+
+    def get(self, resolution: str = "1m", buckets: Optional[int] = None) -> dict:
+        """Counts per bucket: in total, by level and by category."""
+        ring = self.rings[resolution]
+        series = ring.series(self.clock(), buckets)
+        counts = series["counts"]
+        return {
+            "resolution": resolution,
+            "seconds": series["seconds"],
+            "start": series["start"],
+            "total": counts["total"],
+            "by_level": {level: counts[f"level:{level}"] for level in self.levels},
+            "by_category": {category: counts[f"category:{category}"] for category in self.categories},
+        }
@@ -0,0 +1,449 @@
+"""Durable event history in SQLite.
+
+Events are appended to a bounded in-memory queue and written by a
+background thread in batches, one transaction per batch, so logging never
+touches the disk on the caller's thread. The database runs in WAL mode so
+queries can read while the writer appends. When the database grows past a
+size or age limit it is rotated to a timestamped file and a new one is
+started; only the newest rotated files are kept. No file is renamed under
+a reader: rotation holds new queries back until those running finish, and
+is put off to a later write if an export is still reading.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .event_logger import Event, EventCategory, EventLevel
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    level TEXT NOT NULL,
+    category TEXT NOT NULL,
+    message TEXT NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+"""
+
+SIDECARS = ("-wal", "-shm")
+
+ROTATE_WAIT = 1.0  # Seconds rotation waits for readers before trying again later
+
+INSERT = (
+    "INSERT INTO events (id, timestamp, level, category, message, details)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+class EventStore:
+    """Batched, rotating SQLite event store.
+
+    ``append`` never blocks: when the queue is full the event is dropped
+    and counted. The writer flushes when ``batch_size`` events are waiting
+    or ``flush_interval`` seconds after the first one arrived.
+    """
+
+    def __init__(
+        self,
+        path: str = "events.db",
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        max_bytes: int = 50 * 1024 * 1024,
+        max_age: float = 24 * 3600.0,
+        keep: int = 7,
+    ):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.thread: Optional[threading.Thread] = None
+        self.connection: Optional[sqlite3.Connection] = None
+        self.segment_started = 0.0
+        # Open queries and exports; rotation waits for them so no file moves mid-read
+        self.readers = 0
+        self.readers_changed = threading.Condition()
+        self.rotation_pending = False
+        self.rotate_wait = ROTATE_WAIT
+        self.reading_here = threading.local()
+
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.overflowed = 0
+        self.conflicts = 0
+        self.rotations = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Open the database and start the writer thread."""
+        if self.is_running:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="event-store", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Write everything queued, then stop the writer."""
+        if not self.is_running:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            log.warning("Event store queue full at shutdown; dropping the backlog")
+        self.thread.join(timeout)
+        self.thread = None
+
+    def append(self, event: Event) -> bool:
+        """Queue an event for writing; returns False if it was dropped."""
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed += 1
+            return False
+        self.queued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is on disk."""
+        if not self.is_running:
+            return False
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    # Writer thread
+
+    def _open(self):
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        first = self.connection.execute("SELECT MIN(timestamp) FROM events").fetchone()[0]
+        self.segment_started = first if first is not None else time.time()
+
+    def _run(self):
+        try:
+            self._open()
+        except sqlite3.Error as e:
+            self.errors += 1
+            log.error("Error opening event store %s: %s", self.path, e)
+            return
+
+        running = True
+        while running:
+            item = self.queue.get()
+            batch: List[Event] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+
+            # Collect until the batch is full, the interval passes or a flush is asked for
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if not running or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if not running:
+                # Shutting down: take whatever else is already queued
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not None:
+                        batch.append(item)
+
+            if batch:
+                self._write(batch)
+                self._maybe_rotate()
+            for waiter in waiters:
+                waiter.set()
+
+        self.connection.close()
+        self.connection = None
+
+    def _write(self, batch: List[Event]):
+        rows = [
+            (
+                event.id,
+                event.timestamp,
+                event.level.value,
+                event.category.value,
+                event.message,
+                json.dumps(event.details, default=str) if event.details else None,
+            )
+            for event in batch
+        ]
+        try:
+            with self.connection:
+                self.connection.executemany(INSERT, rows)
+        except sqlite3.IntegrityError:
+            # An ID already stored (e.g. reused after a restart) must not cost
+            # the whole batch: write the rows one by one and skip only those
+            self._write_rows(rows)
+        except sqlite3.Error as e:
+            self.errors += 1
+            log.error("Error writing %d events: %s", len(rows), e)
+            return
+        else:
+            self.written += len(rows)
+        self.batches += 1
+
+    def _write_rows(self, rows: list):
+        """Write rows one at a time, skipping those whose ID is already stored."""
+        written, conflicting = 0, []
+        try:
+            with self.connection:
+                for row in rows:
+                    try:
+                        self.connection.execute(INSERT, row)
+                    except sqlite3.IntegrityError:
+                        conflicting.append(row[0])
+                        continue
+                    written += 1
+        except sqlite3.Error as e:
+            self.errors += 1
+            log.error("Error writing %d events: %s", len(rows), e)
+            return
+        self.written += written
+        self.conflicts += len(conflicting)
+        log.error(
+            "Skipped %d events whose IDs were already stored",
+            len(conflicting),
+            extra={"fields": {"event_ids": conflicting}},
+        )
+
+    def size(self) -> int:
+        """Bytes used by the current database, including its write-ahead log."""
+        wal = self.path.with_name(self.path.name + "-wal")
+        return sum(path.stat().st_size for path in (self.path, wal) if path.exists())
+
+    def _maybe_rotate(self):
+        if self.size() < self.max_bytes and time.time() - self.segment_started < self.max_age:
+            return
+        with self.readers_changed:
+            # New readers wait from here, so a steady stream of queries cannot put rotation off
+            self.rotation_pending = True
+            try:
+                if not self.readers_changed.wait_for(lambda: not self.readers, self.rotate_wait):
+                    return  # An export is still reading: rotate after a later write
+                self.connection.close()  # Checkpoints the WAL into the database
+                stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.segment_started))
+                rotated = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+                serial = 1
+                while rotated.exists():  # Rotated twice within a second
+                    serial += 1
+                    rotated = self.path.with_name(f"{self.path.stem}-{stamp}.{serial}{self.path.suffix}")
+                # Sidecar files left by the last connection go with their database
+                for path, target in [(self.path, rotated)] + [
+                    (self.path.with_name(self.path.name + side), rotated.with_name(rotated.name + side))
+                    for side in SIDECARS
+                ]:
+                    if path.exists():
+                        path.rename(target)
+                self.rotations += 1
+                for old in self.rotated_files()[self.keep:]:
+                    for path in [old] + [old.with_name(old.name + side) for side in SIDECARS]:
+                        path.unlink(missing_ok=True)
+            except OSError as e:
+                self.errors += 1
+                log.error("Error rotating event store: %s", e)
+            finally:
+                self.rotation_pending = False
+                self.readers_changed.notify_all()
+        self._open()
+
+    def rotated_files(self) -> List[Path]:
+        """Rotated databases, newest first."""
+        pattern = f"{self.path.stem}-*{self.path.suffix}"
+        files = self.path.parent.glob(pattern)
+        return sorted(files, key=lambda path: (path.stat().st_mtime, path.name), reverse=True)
+
+    # Reading
+
+    def query(
+        self,
+        limit: Optional[int] = 100,
+        level: Optional[EventLevel] = None,
+        category: Optional[EventCategory] = None,
+        since: Optional[int] = None,
+        before: Optional[int] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        path: Optional[Path] = None,
+    ) -> List[Event]:
+        """Matching events in the current database (or ``path``), oldest first.
+
+        Cursors work as in ``EventLogger.get_events``: the first ``limit``
+        events after ID ``since``, else the last ``limit`` (before ID
+        ``before``). ``start`` and ``end`` bound the timestamps.
+        """
+        clauses, params = [], []
+        for clause, value in (
+            ("level = ?", level.value if level else None),
+            ("category = ?", category.value if category else None),
+            ("id > ?", since),
+            ("id < ?", before),
+            ("timestamp >= ?", start),
+            ("timestamp < ?", end),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = "SELECT id, timestamp, level, category, message, details FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id" if since is not None else " ORDER BY id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        rows = self._read(sql, params, path)
+        if since is None:
+            rows.reverse()
+        return [
+            Event(
+                id=event_id,
+                timestamp=timestamp,
+                level=level,
+                category=category,
+                message=message,
+                details=json.loads(details) if details else None,
+            )
+            for event_id, timestamp, level, category, message, details in rows
+        ]
+
+    def iter_chunks(
+        self,
+        chunk_size: int = 1000,
+        level: Optional[EventLevel] = None,
+        category: Optional[EventCategory] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Iterator[List[Event]]:
+        """Every matching event, rotated files included, oldest first, ``chunk_size`` at a time.
+
+        Each chunk is a separate query resuming after the last ID read, so
+        only one chunk is in memory however long the history is. The files
+        are listed once and rotation is held off until the generator
+        finishes or is closed, so nothing is skipped.
+        """
+        with self.reading():
+            since = 0  # IDs keep increasing from one file to the next
+            for path in self.rotated_files()[::-1] + [self.path]:
+                while True:
+                    chunk = self.query(
+                        limit=chunk_size,
+                        level=level,
+                        category=category,
+                        since=since,
+                        start=start,
+                        end=end,
+                        path=path,
+                    )
+                    if chunk:
+                        yield chunk
+                        since = chunk[-1].id
+                    if len(chunk) < chunk_size:
+                        break
+
+    def last_id(self) -> int:
+        """The newest stored event ID, looking in rotated files if the database is new."""
+        for path in [self.path] + self.rotated_files():
+            rows = self._read("SELECT MAX(id) FROM events", (), path)
+            if rows and rows[0][0] is not None:
+                return rows[0][0]
+        return 0
+
+    def _read(self, sql: str, params, path: Optional[Path] = None) -> list:
+        """Run a query on a separate connection (WAL lets it read while the writer appends).
+
+        A database that does not exist yet reads as empty; any other error
+        (locked, corrupt) is raised so a partial read is never taken for a
+        complete one.
+        """
+        path = Path(path or self.path)
+        with self.reading():
+            if not path.exists():
+                return []
+            try:
+                connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+                try:
+                    return connection.execute(sql, params).fetchall()
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                if not path.exists() or "no such table" in str(e):
+                    return []  # Pruned, or created but not set up yet
+                raise
+
+    @contextmanager
+    def reading(self):
+        """Hold off rotation while reading."""
+        depth = getattr(self.reading_here, "depth", 0)
+        with self.readers_changed:
+            # A thread already reading (an export's queries) must not wait on itself
+            while self.rotation_pending and not depth:
+                self.readers_changed.wait()
+            self.readers += 1
+        self.reading_here.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.reading_here.depth -= 1
+            with self.readers_changed:
+                self.readers -= 1
+                self.readers_changed.notify_all()
+
+    def get_stats(self) -> dict:
+        """Queue depth and write, overflow and rotation counts."""
+        return {
+            "path": str(self.path),
+            "running": self.is_running,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "queue_size": self.queue.maxsize,
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "overflowed": self.overflowed,
+            "conflicts": self.conflicts,
+            "rotations": self.rotations,
+            "rotated_files": len(self.rotated_files()),
+            "errors": self.errors,
+            "bytes": self.size(),
+        }
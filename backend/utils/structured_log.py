@@ -0,0 +1,143 @@
+"""Structured, non-blocking logging.
+
+Modules log through the standard ``logging`` module
+(``log = logging.getLogger(__name__)``), passing structured data as
+``extra={"fields": {...}}``. ``setup_logging`` routes every record through
+a bounded queue to a writer thread that formats it (as a JSON line by
+default) and writes it out, so the thread that logs, be it the audio
+callback or the event loop, only enqueues. When the writer falls behind,
+records are dropped and counted rather than blocking the caller.
+
+Records are formatted on the writer thread, so only log values that will not
+change afterwards.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with any fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class StderrHandler(logging.StreamHandler):
+    """Writes to whatever ``sys.stderr`` is at the time (tests replace it)."""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them; drops and counts them when full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the writer thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: str = "info",
+    levels: Optional[Dict[str, str]] = None,
+    format: str = "json",
+    path: Optional[str] = None,
+    queue_size: int = 10000,
+) -> DroppingQueueHandler:
+    """Send all logging through a background writer.
+
+    ``levels`` sets per-module levels, e.g. ``{"hardware.microphone":
+    "warning"}``. Output goes to ``path`` if set, else to stderr. Calling
+    it again replaces the previous setup.
+    """
+    global _handler, _listener
+    shutdown_logging()
+
+    output = logging.FileHandler(path) if path else StderrHandler()
+    output.setFormatter(JsonFormatter() if format == "json" else TextFormatter())
+
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level.upper())
+    return _handler
+
+
+def shutdown_logging():
+    """Write out queued records and stop the writer thread."""
+    global _handler, _listener
+    if _listener:
+        _listener.stop()  # Drains the queue
+        for output in _listener.handlers:
+            output.close()
+        _listener = None
+    if _handler:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+
+def get_stats() -> dict:
+    """Queue depth and records dropped because the writer fell behind."""
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queue_depth": _handler.queue.qsize(),
+        "queue_size": _handler.queue.maxsize,
+        "dropped": _handler.dropped,
+    }
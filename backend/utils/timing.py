@@ -0,0 +1,86 @@
+"""Deadline-based timing for scare sequences.
+
+Steps are scheduled against absolute deadlines on a monotonic clock, so
+event-loop lag and callback time in one step shorten the next sleep
+instead of accumulating as drift. How late each step woke is recorded.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+
+class DeadlineTimer:
+    """Sleeps until offsets from a fixed origin.
+
+    The timer learns how late the event loop usually wakes it (an EWMA of
+    past lateness) and wakes that much early, then yields until the
+    deadline. ``max_lead`` bounds how long it will yield-spin.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+        max_lead: float = 0.005,
+        alpha: float = 0.2,
+        history: int = 100,
+    ):
+        self.clock = clock
+        self.sleep = sleep
+        self.max_lead = max_lead
+        self.alpha = alpha
+
+        self.origin: Optional[float] = None
+        self.lag_ewma = 0.0
+        self.lateness: deque = deque(maxlen=history)
+        self.steps = 0
+        self.max_lateness = 0.0
+
+    def start(self, origin: Optional[float] = None) -> float:
+        """Start a new timeline at ``origin`` (now by default)."""
+        self.origin = self.clock() if origin is None else origin
+        return self.origin
+
+    def elapsed(self) -> float:
+        """Seconds since the timeline started."""
+        if self.origin is None:
+            return 0.0
+        return self.clock() - self.origin
+
+    async def wait_until(self, offset: float) -> float:
+        """Sleep until ``origin + offset``; returns how late the wake-up was."""
+        if self.origin is None:
+            self.start()
+        deadline = self.origin + offset
+
+        lead = min(self.lag_ewma, self.max_lead)
+        remaining = deadline - self.clock() - lead
+        if remaining > 0:
+            await self.sleep(remaining)
+        while self.clock() < deadline:
+            await self.sleep(0)
+
+        late = self.clock() - deadline
+        self._record(late)
+        return late
+
+    def _record(self, late: float):
+        self.steps += 1
+        self.lateness.append(late)
+        self.max_lateness = max(self.max_lateness, late)
+        # Only learn from lateness the event loop could plausibly cause
+        if late < self.max_lead * 4:
+            self.lag_ewma += self.alpha * (max(0.0, late) - self.lag_ewma)
+
+    def get_stats(self) -> dict:
+        """Step lateness statistics in milliseconds."""
+        recent = list(self.lateness)
+        return {
+            "steps": self.steps,
+            "last_lateness_ms": round(recent[-1] * 1000, 3) if recent else None,
+            "mean_lateness_ms": round(sum(recent) / len(recent) * 1000, 3) if recent else None,
+            "max_lateness_ms": round(self.max_lateness * 1000, 3),
+            "lag_compensation_ms": round(self.lag_ewma * 1000, 3),
+        }
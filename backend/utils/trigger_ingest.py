@@ -0,0 +1,123 @@
+"""Thread-safe trigger ingestion.
+
+Triggers can arrive from any thread (the microphone's PortAudio callback in
+particular). They are handed to the event loop with
+``call_soon_threadsafe`` and filtered there: a burst of triggers from one
+source is debounced into one, triggers from another source right after an
+accepted one are deduplicated, and a sliding-window rate limit caps how
+often the handler can fire.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+class TriggerIngest:
+    """Debounced, rate-limited trigger delivery onto an event loop.
+
+    ``window`` is both the debounce quiet period (a source must stay silent
+    that long before it can trigger again) and the deduplication window
+    across sources. ``gate`` is checked on the loop before accepting, e.g.
+    to ignore triggers while a sequence is running.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], Optional[Awaitable]],
+        window: float = 0.5,
+        max_triggers: int = 6,
+        period: float = 60.0,
+        gate: Optional[Callable[[], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.handler = handler
+        self.window = window
+        self.max_triggers = max_triggers
+        self.period = period
+        self.gate = gate
+        self.clock = clock
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_seen: Dict[str, float] = {}
+        self._last_accepted: Optional[float] = None
+        self._accepted_times: deque = deque()
+
+        self.received = 0
+        self.accepted = 0
+        self.debounced = 0
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self.ignored = 0
+        self.dropped = 0
+
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Deliver triggers on ``loop`` (the running loop by default)."""
+        self.loop = loop or asyncio.get_running_loop()
+
+    def submit(self, source: str = "audio"):
+        """Report a trigger; safe to call from any thread."""
+        timestamp = self.clock()
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            self.dropped += 1
+            return
+        try:
+            loop.call_soon_threadsafe(self._receive, source, timestamp)
+        except RuntimeError:
+            # Loop closed between the check and the call
+            self.dropped += 1
+
+    def _receive(self, source: str, timestamp: float):
+        """Filter one trigger; runs on the event loop."""
+        self.received += 1
+
+        # Debounce: a source re-triggering within the window is the same event
+        last_seen = self._last_seen.get(source)
+        self._last_seen[source] = timestamp
+        if last_seen is not None and timestamp - last_seen < self.window:
+            self.debounced += 1
+            return
+
+        # Deduplicate: another source right after an accepted trigger
+        if self._last_accepted is not None and timestamp - self._last_accepted < self.window:
+            self.deduplicated += 1
+            return
+
+        # Rate limit over a sliding window
+        while self._accepted_times and timestamp - self._accepted_times[0] >= self.period:
+            self._accepted_times.popleft()
+        if len(self._accepted_times) >= self.max_triggers:
+            self.rate_limited += 1
+            return
+
+        if self.gate is not None and not self.gate():
+            self.ignored += 1
+            return
+
+        self.accepted += 1
+        self._last_accepted = timestamp
+        self._accepted_times.append(timestamp)
+
+        try:
+            result = self.handler(source)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        except Exception as e:
+            log.error("Error in trigger handler: %s", e)
+
+    def get_stats(self) -> dict:
+        """Trigger counts by outcome."""
+        return {
+            "received": self.received,
+            "accepted": self.accepted,
+            "debounced": self.debounced,
+            "deduplicated": self.deduplicated,
+            "rate_limited": self.rate_limited,
+            "ignored": self.ignored,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,94 @@
+"""Virtual time for tests and simulations.
+
+A ``VirtualClock`` stands in for ``time.monotonic`` and ``asyncio.sleep``
+in code that accepts a ``clock`` and a ``sleep`` (the state machine's
+deadline timer, the light effect engine). Time only moves when the clock
+is advanced, and sleepers wake in deadline order as it passes them, so a
+scare sequence that lasts seconds on a real clock runs in a fraction of a
+millisecond and always with the same timing.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+from typing import List, Tuple
+
+
+class VirtualClock:
+    """A monotonic clock and sleep function that only move when told to.
+
+    Pass the clock itself as ``clock`` and ``clock.sleep`` as ``sleep``.
+    ``advance`` moves time forward, waking every sleeper it passes; ``run``
+    advances until nothing is sleeping. A zero sleep (a yield, as in a
+    spin-wait) moves time on by ``tick`` so spin-waits still finish.
+    """
+
+    def __init__(self, start: float = 0.0, tick: float = 1e-6, settle: int = 2):
+        self.now = start
+        self.tick = tick
+        # Loop iterations to let woken tasks run before moving time again
+        self.settle = settle
+
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self.wakeups = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        """Sleep ``delay`` seconds of virtual time."""
+        if delay <= 0:
+            self.now += self.tick
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + delay, next(self._order), future))
+        await future
+
+    @property
+    def pending(self) -> int:
+        """Tasks sleeping on this clock."""
+        return sum(1 for _, _, future in self._sleepers if not future.done())
+
+    def next_deadline(self) -> float:
+        """When the next sleeper wakes (infinity if none)."""
+        while self._sleepers and self._sleepers[0][2].done():
+            heapq.heappop(self._sleepers)  # Cancelled sleep
+        return self._sleepers[0][0] if self._sleepers else math.inf
+
+    async def _settle(self):
+        for _ in range(self.settle):
+            await asyncio.sleep(0)
+
+    async def advance(self, seconds: float = 0.0) -> int:
+        """Move time forward ``seconds``; returns how many sleepers woke."""
+        await self._settle()  # Let just-started tasks reach their first sleep
+        target = self.now + seconds
+        woken = 0
+        while self.next_deadline() <= target:
+            deadline, _, future = heapq.heappop(self._sleepers)
+            self.now = max(self.now, deadline)
+            future.set_result(None)
+            woken += 1
+            await self._settle()
+        self.now = max(self.now, target)
+        self.wakeups += woken
+        return woken
+
+    async def run(self, limit: float = math.inf) -> float:
+        """Advance until nothing sleeps or ``limit`` seconds pass; returns the time advanced.
+
+        Use a limit when something sleeps forever, e.g. a running effect engine.
+        """
+        started = self.now
+        await self._settle()
+        while True:
+            deadline = self.next_deadline()
+            if deadline == math.inf or deadline - started > limit:
+                break
+            await self.advance(deadline - self.now)
+        if math.isfinite(limit):
+            self.now = max(self.now, started + limit)
+        return self.now - started
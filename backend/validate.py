@@ -10,6 +10,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import asyncio
 from backend.state_machine import StateMachine, State, Mode
 from backend.utils.event_logger import EventLogger, EventCategory
+from backend.utils.virtual_clock import VirtualClock
 from backend.websocket.manager import ConnectionManager
 from backend.config import Config
 
@@ -20,10 +21,14 @@ async def validate_state_machine():
     print("Testing State Machine")
     print("=" * 60)
 
+    # Sequences run in virtual time: no real waiting
+    clock = VirtualClock()
     sm = StateMachine(
         countdown_duration=0.5,
         active_duration=0.2,
         reset_duration=0.3,
+        clock=clock,
+        sleep=clock.sleep,
     )
 
     print(f"✓ Initial state: {sm.get_state().value}")
@@ -46,8 +51,8 @@ async def validate_state_machine():
     print("\n  Triggering sequence...")
     await sm.trigger_sequence()
 
-    # Wait for completion
-    await asyncio.sleep(1.5)
+    # Run to completion
+    await clock.run()
 
     assert State.TRICK_COUNTDOWN in states_seen
     assert State.TRICK_ACTIVE in states_seen
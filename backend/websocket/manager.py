@@ -1,83 +1,209 @@
-"""WebSocket connection manager for real-time communication."""
+"""WebSocket connection manager for real-time communication.
 
+Every connection has its own bounded outbound queue and a task that sends
+from it, so broadcasting only enqueues and a slow client delays no one but
+itself. When a client's queue is full its oldest telemetry message (audio
+levels, light status) is dropped to make room. State changes, events and
+other messages are never dropped: a client with a full queue of those is
+too far behind to catch up and is disconnected instead.
+"""
+
+from collections import deque
 from fastapi import WebSocket
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 import json
 import asyncio
+import logging
+
+if TYPE_CHECKING:
+    from utils import Event
+
+log = logging.getLogger(__name__)
+
+# Message types that are superseded by the next one and may be dropped
+TELEMETRY_TYPES = {"audio_level", "light_status"}
+
+# Close code for clients disconnected for falling behind ("try again later")
+SLOW_CLIENT_CLOSE = 1013
+
+
+class ClientQueue:
+    """Bounded outbound messages for one connection, in the order queued.
+
+    Telemetry and other messages are held apart, each tagged with its
+    position, so the oldest telemetry message can be dropped in O(1).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.telemetry: deque = deque()
+        self.messages: deque = deque()
+        self.ready = asyncio.Event()
+        self.order = 0
+        self.closed = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self.telemetry) + len(self.messages)
+
+    def put(self, text: str, telemetry: bool = False) -> bool:
+        """Queue a message; returns False if the queue is full of undroppable messages."""
+        if self.closed:
+            return True
+        if len(self) >= self.size:
+            if self.telemetry:
+                self.telemetry.popleft()
+                self.dropped += 1
+            elif telemetry:
+                self.dropped += 1
+                return True
+            else:
+                return False
+        self.order += 1
+        (self.telemetry if telemetry else self.messages).append((self.order, text))
+        self.max_depth = max(self.max_depth, len(self))
+        self.ready.set()
+        return True
+
+    def close(self):
+        """Stop accepting messages and wake the sender so it can hang up."""
+        self.closed = True
+        self.ready.set()
+
+    async def get(self) -> Optional[str]:
+        """The next message to send, or None once closed."""
+        while not self.closed and not len(self):
+            self.ready.clear()
+            await self.ready.wait()
+        if self.closed:
+            return None
+        if not self.messages or (self.telemetry and self.telemetry[0][0] < self.messages[0][0]):
+            return self.telemetry.popleft()[1]
+        return self.messages.popleft()[1]
 
 
 class ConnectionManager:
-    """Manages WebSocket connections and broadcasting."""
+    """Manages WebSocket connections and broadcasting.
+
+    A connection can subscribe to one box; it then only receives that box's
+    messages and process-wide ones. Box messages carry a ``box`` field.
+    """
 
-    def __init__(self):
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
         self.active_connections: List[WebSocket] = []
+        self.subscriptions: Dict[WebSocket, Optional[str]] = {}
+        self.queues: Dict[WebSocket, ClientQueue] = {}
+        self.senders: Dict[WebSocket, asyncio.Task] = {}
+        self.slow_disconnects = 0
 
-    async def connect(self, websocket: WebSocket):
-        """Accept new WebSocket connection."""
+    async def connect(self, websocket: WebSocket, box: Optional[str] = None):
+        """Accept new WebSocket connection, optionally for a single box."""
         await websocket.accept()
         self.active_connections.append(websocket)
-        print(f"WebSocket client connected. Total: {len(self.active_connections)}")
+        self.subscriptions[websocket] = box
+        queue = self.queues[websocket] = ClientQueue(self.queue_size)
+        self.senders[websocket] = asyncio.create_task(self._send_from(websocket, queue))
+        log.info("WebSocket client connected. Total: %d", len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection."""
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
-        print(f"WebSocket client disconnected. Total: {len(self.active_connections)}")
-
-    async def send_personal(self, message: Dict[str, Any], websocket: WebSocket):
-        """Send message to specific client."""
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            print(f"Error sending to client: {e}")
-            self.disconnect(websocket)
-
-    async def broadcast(self, message: Dict[str, Any]):
-        """Broadcast message to all connected clients."""
-        disconnected = []
-
-        for connection in self.active_connections:
+        self.subscriptions.pop(websocket, None)
+        queue = self.queues.pop(websocket, None)
+        if queue is not None:
+            queue.close()
+        sender = self.senders.pop(websocket, None)
+        if sender and sender is not asyncio.current_task():
+            sender.cancel()
+        log.info("WebSocket client disconnected. Total: %d", len(self.active_connections))
+
+    async def _send_from(self, websocket: WebSocket, queue: ClientQueue):
+        """Send a client's queued messages until it disconnects or falls behind."""
+        while True:
+            text = await queue.get()
+            if text is None:
+                break
             try:
-                await connection.send_json(message)
+                await websocket.send_text(text)
             except Exception as e:
-                print(f"Error broadcasting to client: {e}")
-                disconnected.append(connection)
-
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
+                log.warning("Error sending to client: %s", e)
+                break
+            queue.sent += 1
+
+        if self.queues.get(websocket) is not queue:
+            return  # Already disconnected
+        if queue.closed:
+            # Fell behind: hang up so the client reconnects and starts fresh
+            try:
+                await websocket.close(code=SLOW_CLIENT_CLOSE)
+            except Exception:
+                pass
+        self.disconnect(websocket)
+
+    def _enqueue(self, websocket: WebSocket, text: str, telemetry: bool = False):
+        queue = self.queues.get(websocket)
+        if queue is not None and not queue.put(text, telemetry):
+            log.warning(
+                "WebSocket client too far behind; disconnecting",
+                extra={"fields": {"box": self.subscriptions.get(websocket), "depth": len(queue)}},
+            )
+            self.slow_disconnects += 1
+            queue.close()
 
-    async def broadcast_audio_level(self, audio_data: Dict[str, Any]):
+    async def send_personal(self, message: Dict[str, Any], websocket: WebSocket):
+        """Queue a message for one client."""
+        self._enqueue(websocket, json.dumps(message, default=str))
+
+    async def broadcast(self, message: Dict[str, Any], box: Optional[str] = None):
+        """Queue a message for every client subscribed to ``box``; never waits on a client."""
+        if box is not None:
+            message["box"] = box
+        telemetry = message.get("type") in TELEMETRY_TYPES
+        self._send_text(json.dumps(message, default=str), box, telemetry)
+
+    def _send_text(self, text: str, box: Optional[str] = None, telemetry: bool = False):
+        """Queue already-serialized JSON for every client subscribed to ``box``."""
+        for connection in list(self.active_connections):
+            subscribed = self.subscriptions.get(connection)
+            if box is not None and subscribed is not None and subscribed != box:
+                continue
+            self._enqueue(connection, text, telemetry)
+
+    async def broadcast_audio_level(self, audio_data: Dict[str, Any], box: Optional[str] = None):
         """Broadcast audio level data."""
         message = {
             "type": "audio_level",
             "data": audio_data,
         }
-        await self.broadcast(message)
+        await self.broadcast(message, box)
 
-    async def broadcast_light_status(self, light_data: Dict[str, Any]):
+    async def broadcast_light_status(self, light_data: Dict[str, Any], box: Optional[str] = None):
         """Broadcast light status data."""
         message = {
             "type": "light_status",
             "data": light_data,
         }
-        await self.broadcast(message)
+        await self.broadcast(message, box)
 
-    async def broadcast_event(self, event_data: Dict[str, Any]):
-        """Broadcast event data."""
-        message = {
-            "type": "event",
-            "data": event_data,
-        }
-        await self.broadcast(message)
+    async def broadcast_event(self, event: "Event", box: Optional[str] = None):
+        """Broadcast an event, reusing its cached JSON."""
+        text = '{"type":"event","data":' + event.to_json().decode()
+        if box is not None:
+            text += ',"box":' + json.dumps(box)
+        self._send_text(text + "}", box)
 
-    async def broadcast_state_change(self, state_data: Dict[str, Any]):
+    async def broadcast_state_change(self, state_data: Dict[str, Any], box: Optional[str] = None):
         """Broadcast state change data."""
         message = {
             "type": "state_change",
             "data": state_data,
         }
-        await self.broadcast(message)
+        await self.broadcast(message, box)
 
     async def broadcast_notification(
         self,
@@ -103,6 +229,26 @@ class ConnectionManager:
         """Get number of active connections."""
         return len(self.active_connections)
 
+    def get_stats(self) -> dict:
+        """Queue depth, messages sent and telemetry dropped, per client."""
+        clients = []
+        for websocket, queue in self.queues.items():
+            address = getattr(websocket, "client", None)
+            clients.append({
+                "client": f"{address.host}:{address.port}" if address else None,
+                "box": self.subscriptions.get(websocket),
+                "queue_depth": len(queue),
+                "max_queue_depth": queue.max_depth,
+                "sent": queue.sent,
+                "dropped": queue.dropped,
+            })
+        return {
+            "connections": len(self.active_connections),
+            "queue_size": self.queue_size,
+            "slow_disconnects": self.slow_disconnects,
+            "clients": clients,
+        }
+
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -1,7 +1,9 @@
 """Data streaming handlers for WebSocket communication."""
 
 import asyncio
+import logging
 import sys
+from typing import Optional
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -10,12 +12,19 @@ from hardware import AudioData
 from utils import Event
 from state_machine import StateChangeEvent
 
+log = logging.getLogger(__name__)
+
 
 class StreamManager:
-    """Manages real-time data streaming to WebSocket clients."""
+    """Manages real-time data streaming to WebSocket clients.
+
+    Streams of a box manager are tagged with the box name and only reach
+    clients subscribed to that box (or to every box).
+    """
 
-    def __init__(self, connection_manager: ConnectionManager):
+    def __init__(self, connection_manager: ConnectionManager, box: Optional[str] = None):
         self.manager = connection_manager
+        self.box = box
         self.is_streaming = False
         self.stream_tasks = []
 
@@ -39,21 +48,23 @@ class StreamManager:
             "frequency_peak": round(audio_data.frequency_peak, 2),
         }
 
-        await self.manager.broadcast_audio_level(data)
+        await self.manager.broadcast_audio_level(data, self.box)
 
     async def stream_light_status(self, light_status: dict):
         """Stream light status data to clients."""
         if not self.is_streaming:
             return
 
-        await self.manager.broadcast_light_status(light_status)
+        await self.manager.broadcast_light_status(light_status, self.box)
 
     async def stream_event(self, event: Event):
         """Stream event to clients."""
         if not self.is_streaming:
             return
 
-        await self.manager.broadcast_event(event.to_dict())
+        # Events logged by a box go to that box's subscribers
+        box = (event.details or {}).get("box", self.box)
+        await self.manager.broadcast_event(event, box)
 
     async def stream_state_change(self, state_event: StateChangeEvent):
         """Stream state change to clients."""
@@ -68,20 +79,27 @@ class StreamManager:
 
         if state_event.countdown_remaining is not None:
             data["countdown_remaining"] = round(state_event.countdown_remaining, 2)
+        if state_event.lateness is not None:
+            data["lateness_ms"] = round(state_event.lateness * 1000, 2)
 
-        await self.manager.broadcast_state_change(data)
+        await self.manager.broadcast_state_change(data, self.box)
 
     async def send_notification(self, level: str, title: str, message: str):
         """Send notification to clients."""
         await self.manager.broadcast_notification(level, title, message)
 
     async def periodic_light_status_stream(self, light_controller, interval: float = 0.5):
-        """Periodically stream light status."""
+        """Periodically stream light status when it has changed."""
+        last_version = None
+
         while self.is_streaming:
             try:
-                status = light_controller.get_status()
-                await self.stream_light_status(status)
+                version = light_controller.status_version
+                if version != last_version:
+                    status = light_controller.get_status()
+                    await self.stream_light_status(status)
+                    last_version = version
             except Exception as e:
-                print(f"Error streaming light status: {e}")
+                log.error("Error streaming light status: %s", e)
 
             await asyncio.sleep(interval)
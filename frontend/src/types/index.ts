@@ -23,6 +23,7 @@ export interface LightStatus {
 }
 
 export interface Event {
+  id: number;
   timestamp: number;
   level: string;
   category: string;